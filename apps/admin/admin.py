@@ -1,28 +1,46 @@
 from django.contrib import admin
 from django.contrib.admin.options import ModelAdmin
 
+from apps.db_router import read_database
 from apps.models import (Availability, Booking, City, Client, Country,
-                         Interpreter, Language, LanguagePair, Order,
-                         OrderInterpreter, Region, TranslationType)
+                         Interpreter, InterpreterLanguagePair, Language,
+                         LanguagePair, OfferWavePlan, Order, OrderInterpreter,
+                         OutboxMessage, Region, TranslationType)
+
+
+class ReplicaChangeListModelAdmin(ModelAdmin):
+    """Списки (GET changelist) читаются с реплики; формы и действия остаются на primary"""
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        if request.method == 'GET' and match and match.url_name and match.url_name.endswith('_changelist'):
+            return queryset.using(read_database())
+        return queryset
+
+
+class InterpreterLanguagePairInline(admin.TabularInline):
+    model = InterpreterLanguagePair
+    extra = 0
 
 
 @admin.register(Interpreter)
-class InterpreterModelAdmin(ModelAdmin):
-    pass
+class InterpreterModelAdmin(ReplicaChangeListModelAdmin):
+    inlines = InterpreterLanguagePairInline,
 
 
 @admin.register(Client)
-class ClientModelAdmin(ModelAdmin):
+class ClientModelAdmin(ReplicaChangeListModelAdmin):
     fields = 'email',
 
 
 @admin.register(Order)
-class OrderModelAdmin(ModelAdmin):
+class OrderModelAdmin(ReplicaChangeListModelAdmin):
     pass
 
 
 @admin.register(Booking)
-class BookingModelAdmin(ModelAdmin):
+class BookingModelAdmin(ReplicaChangeListModelAdmin):
     pass
 
 
@@ -47,15 +65,28 @@ class LanguageModelAdmin(ModelAdmin):
 
 
 @admin.register(Availability)
-class AvailabilityModelAdmin(ModelAdmin):
+class AvailabilityModelAdmin(ReplicaChangeListModelAdmin):
     pass
 
 
 @admin.register(OrderInterpreter)
-class OrderInterpreterModelAdmin(ModelAdmin):
+class OrderInterpreterModelAdmin(ReplicaChangeListModelAdmin):
     pass
 
 
+@admin.register(OfferWavePlan)
+class OfferWavePlanModelAdmin(ReplicaChangeListModelAdmin):
+    list_display = 'order', 'waves_sent', 'offers_sent', 'wave_size', 'finished_at'
+    list_filter = 'finished_at',
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageModelAdmin(ReplicaChangeListModelAdmin):
+    list_display = 'task', 'available_at', 'attempts', 'processed_at'
+    list_filter = 'task',
+    search_fields = 'dedup_key',
+
+
 @admin.register(TranslationType)
 class TranslationTypeModelAdmin(ModelAdmin):
     pass
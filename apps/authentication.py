@@ -0,0 +1,126 @@
+from typing import Optional, Tuple
+
+from django.contrib import auth
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+UserModel = get_user_model()
+
+
+class RoleAwareModelBackend(ModelBackend):
+    """
+    ModelBackend, загружающий пользователя вместе со строками Interpreter и Client
+
+    Один запрос с LEFT JOIN на обе таблицы подтипов: после него user.interpreter,
+    user.client и user.role_profile не делают дополнительных запросов
+    (отсутствующий подтип тоже закэширован и сразу поднимает DoesNotExist).
+    """
+
+    SUBTYPES = ('interpreter', 'client')
+
+    def get_queryset(self):
+        return UserModel._default_manager.select_related(*self.SUBTYPES)
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = self.get_queryset().get(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            # Хэширование пароля, чтобы время ответа не выдавало отсутствие пользователя
+            UserModel().set_password(password)
+            return None
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        try:
+            user = self.get_queryset().get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class SessionUserCache:
+    """
+    Кэш пользователя сессии (вместе с подтипом) в Redis
+
+    Ключ привязан к сессии, актуальность проверяется по версии пользователя:
+    сохранение User/Interpreter/Client (в том числе switch_role) увеличивает
+    версию через сигналы (apps/signals.py) после коммита транзакции, и все
+    сессии перечитывают его из БД.
+    """
+
+    KEY_PREFIX = 'session_user'
+    VERSION_KEY_PREFIX = 'session_user_version'
+    CACHE_TIMEOUT = 15 * 60  # 15 минут
+
+    @classmethod
+    def _key(cls, session_key) -> str:
+        return f"{cls.KEY_PREFIX}:{session_key}"
+
+    @classmethod
+    def _version_key(cls, user_id) -> str:
+        return f"{cls.VERSION_KEY_PREFIX}:{user_id}"
+
+    @classmethod
+    def get(cls, session_key, user_id) -> Tuple[Optional[UserModel], int]:
+        """
+        Получить пользователя сессии из кэша (один round trip в Redis)
+
+        Returns:
+            (пользователь или None, текущая версия пользователя)
+        """
+        values = cache.get_many([cls._key(session_key), cls._version_key(user_id)])
+        version = values.get(cls._version_key(user_id), 0)
+        cached = values.get(cls._key(session_key))
+
+        if cached is None:
+            return None, version
+        cached_version, user = cached
+        if cached_version != version or str(user.pk) != str(user_id):
+            return None, version
+        return user, version
+
+    @classmethod
+    def set(cls, session_key, user, version: int):
+        cache.set(cls._key(session_key), (version, user), cls.CACHE_TIMEOUT)
+
+    @classmethod
+    def invalidate(cls, user_id):
+        """Сбросить кэш пользователя во всех его сессиях"""
+        try:
+            cache.incr(cls._version_key(user_id))
+        except ValueError:
+            cache.set(cls._version_key(user_id), 1, None)
+
+    @classmethod
+    def resolve(cls, request):
+        """
+        Пользователь запроса: из кэша сессии или через auth.get_user()
+
+        Версия читается до загрузки из БД, поэтому изменение, сделанное
+        во время загрузки, не попадет в кэш под новой версией.
+        """
+        session_key = request.session.session_key
+        user_id = request.session.get(SESSION_KEY)
+        if not session_key or user_id is None:
+            return auth.get_user(request)
+
+        user, version = cls.get(session_key, user_id)
+        if user is not None and constant_time_compare(request.session.get(HASH_SESSION_KEY, ''),
+                                                      user.get_session_auth_hash()) \
+                and RoleAwareModelBackend().user_can_authenticate(user):
+            return user
+
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cls.set(session_key, user, version)
+        return user
@@ -0,0 +1,244 @@
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from apps.utils import logger
+
+
+class FakeCalendarState:
+    """
+    Состояние фейкового Google Calendar API
+
+    Календари хранятся по access token: каждый переводчик в бенчмарке
+    получает свой токен, поэтому события разных переводчиков не смешиваются.
+    Каждое изменение события увеличивает версию календаря, syncToken - это
+    версия на момент последней выдачи.
+    """
+
+    def __init__(self, seed: int = 42):
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.calendars = {}  # token -> {'version': int, 'events': {event_id: (version, event)}}
+        self.channels = {}
+        self.request_count = 0
+
+    def _calendar(self, token: str) -> dict:
+        return self.calendars.setdefault(token, {'version': 0, 'events': {}})
+
+    def seed_events(self, token: str, count: int, start: datetime = None):
+        """Создать count занятых событий в календаре токена"""
+        start = start or datetime.now(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+        with self.lock:
+            calendar = self._calendar(token)
+            for i in range(count):
+                event_start = start + timedelta(hours=3 * i)
+                self._put_event(calendar, {
+                    'id': uuid.uuid4().hex,
+                    'status': 'confirmed',
+                    'start': {'dateTime': event_start.isoformat()},
+                    'end': {'dateTime': (event_start + timedelta(hours=1)).isoformat()},
+                })
+
+    def mutate_events(self, token: str, count: int, cancel_ratio: float = 0.3):
+        """Изменить count событий: часть сдвинуть по времени, часть отменить"""
+        with self.lock:
+            calendar = self._calendar(token)
+            live = [e for _, e in calendar['events'].values() if e['status'] != 'cancelled']
+            for event in self.random.sample(live, min(count, len(live))):
+                event = dict(event)
+                if self.random.random() < cancel_ratio:
+                    event = {'id': event['id'], 'status': 'cancelled'}
+                else:
+                    start = datetime.fromisoformat(event['start']['dateTime']) + timedelta(minutes=30)
+                    event['start'] = {'dateTime': start.isoformat()}
+                    event['end'] = {'dateTime': (start + timedelta(hours=1)).isoformat()}
+                self._put_event(calendar, event)
+
+    def _put_event(self, calendar: dict, event: dict):
+        calendar['version'] += 1
+        calendar['events'][event['id']] = (calendar['version'], event)
+
+    def list_events(self, token: str, sync_token: str = None, page_token: str = None,
+                    max_results: int = 250) -> dict:
+        """events.list с пагинацией и sync token"""
+        with self.lock:
+            calendar = self._calendar(token)
+            since = int(sync_token) if sync_token else 0
+            changed = sorted(
+                (item for item in calendar['events'].values() if item[0] > since),
+                key=lambda item: item[0]
+            )
+            if not sync_token:
+                # Полная синхронизация не возвращает отмененные события
+                changed = [item for item in changed if item[1]['status'] != 'cancelled']
+
+            offset = int(page_token) if page_token else 0
+            page = changed[offset:offset + max_results]
+
+            result = {'kind': 'calendar#events', 'items': [event for _, event in page]}
+            if offset + max_results < len(changed):
+                result['nextPageToken'] = str(offset + max_results)
+            else:
+                result['nextSyncToken'] = str(calendar['version'])
+            return result
+
+    def busy_intervals(self, token: str, time_min: str, time_max: str) -> list:
+        """Занятые интервалы для freebusy.query"""
+        with self.lock:
+            calendar = self._calendar(token)
+            return [
+                {'start': event['start']['dateTime'], 'end': event['end']['dateTime']}
+                for _, event in calendar['events'].values()
+                if event['status'] != 'cancelled'
+                and event['end']['dateTime'] > time_min and event['start']['dateTime'] < time_max
+            ]
+
+
+class FakeGoogleCalendarHandler(BaseHTTPRequestHandler):
+    """HTTP обработчик: events.list, events.watch, channels.stop, freeBusy, token"""
+
+    API_PREFIX = '/calendar/v3/'
+
+    server: 'FakeGoogleCalendarServer'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method: str):
+        state = self.server.state
+        with state.lock:
+            state.request_count += 1
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        body = self._read_body()
+
+        if url.path == '/token':
+            # Новый access token равен refresh token, чтобы календарь токена сохранялся
+            return self._send(200, {
+                'access_token': body.get('refresh_token', ['refreshed'])[0],
+                'expires_in': 3600,
+                'token_type': 'Bearer',
+            })
+
+        if self.server.error_rate and state.random.random() < self.server.error_rate:
+            return self._send(503, {'error': {'code': 503, 'message': 'Backend Error'}})
+
+        token = self.headers.get('Authorization', '').replace('Bearer ', '')
+        path = url.path[len(self.API_PREFIX):] if url.path.startswith(self.API_PREFIX) else url.path
+
+        if method == 'GET' and path.startswith('calendars/') and path.endswith('/events'):
+            return self._send(200, state.list_events(
+                token,
+                sync_token=query.get('syncToken'),
+                page_token=query.get('pageToken'),
+                max_results=int(query.get('maxResults', self.server.page_size))
+            ))
+
+        if method == 'POST' and path.endswith('/events/watch'):
+            resource_id = uuid.uuid4().hex
+            with state.lock:
+                state.channels[body['id']] = resource_id
+            return self._send(200, {
+                'kind': 'api#channel',
+                'id': body['id'],
+                'resourceId': resource_id,
+                'resourceUri': f"{self.API_PREFIX}{path}",
+                'expiration': str(body.get('expiration')),
+            })
+
+        if method == 'POST' and path == 'channels/stop':
+            with state.lock:
+                state.channels.pop(body.get('id'), None)
+            return self._send(204, None)
+
+        if method == 'POST' and path == 'freeBusy':
+            return self._send(200, {
+                'kind': 'calendar#freeBusy',
+                'calendars': {
+                    item['id']: {'busy': state.busy_intervals(token, body['timeMin'], body['timeMax'])}
+                    for item in body.get('items', [])
+                }
+            })
+
+        return self._send(404, {'error': {'code': 404, 'message': 'Not Found'}})
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        raw = self.rfile.read(length).decode()
+        if self.headers.get('Content-Type', '').startswith('application/x-www-form-urlencoded'):
+            return parse_qs(raw)
+        return json.loads(raw)
+
+    def _send(self, status: int, payload):
+        self.send_response(status)
+        if payload is None:
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        data = json.dumps(payload).encode()
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeGoogleCalendarServer(ThreadingHTTPServer):
+    """
+    Локальный фейковый Google Calendar API с настраиваемой задержкой и ошибками
+
+    Использование:
+        with FakeGoogleCalendarServer(latency_ms=20, error_rate=0.01) as server:
+            settings.GOOGLE_CALENDAR_API_ENDPOINT = server.api_endpoint
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0,
+                 error_rate: float = 0, page_size: int = 250, seed: int = 42):
+        super().__init__((host, port), FakeGoogleCalendarHandler)
+        self.state = FakeCalendarState(seed=seed)
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_endpoint(self) -> str:
+        return f"{self.base_url}{FakeGoogleCalendarHandler.API_PREFIX}"
+
+    @property
+    def token_uri(self) -> str:
+        return f"{self.base_url}/token"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Fake Google Calendar API listening on {self.base_url}")
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
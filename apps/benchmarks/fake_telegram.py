@@ -0,0 +1,79 @@
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from apps.utils import logger
+
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    """Обработчик Bot API: /bot<token>/<method> всегда отвечает ok"""
+
+    server: 'FakeTelegramServer'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        method = self.path.rsplit('/', 1)[-1].split('?')[0]
+        with self.server.lock:
+            self.server.calls[method] += 1
+            message_id = sum(self.server.calls.values())
+
+        if method in ('sendMessage', 'editMessageText', 'editMessageReplyMarkup'):
+            result = {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': 0, 'type': 'private'},
+                'text': '',
+            }
+        else:
+            result = True
+
+        data = json.dumps({'ok': True, 'result': result}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeTelegramServer(ThreadingHTTPServer):
+    """
+    Локальный фейковый Telegram Bot API со счетчиком вызовов по методам
+
+    Использование:
+        with FakeTelegramServer(latency_ms=30) as server:
+            settings.TELEGRAM_API_SERVER = server.base_url
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0):
+        super().__init__((host, port), FakeTelegramHandler)
+        self.latency = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Fake Telegram Bot API listening on {self.base_url}")
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
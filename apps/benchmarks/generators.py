@@ -0,0 +1,153 @@
+import random
+import uuid
+from datetime import datetime, time, timedelta
+from typing import List
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.models import (Availability, City, Client, Interpreter,
+                         InterpreterLanguagePair, InterpreterSearchProjection,
+                         Language, LanguagePair, TranslationType)
+
+LANGUAGES = ['English', 'Russian', 'Uzbek', 'German', 'French', 'Turkish', 'Chinese', 'Korean']
+TRANSLATION_TYPES = ['synchronous', 'consecutive', 'written']
+SLOT_PERIODS = ['morning', 'evening']
+
+
+class SyntheticData:
+    """
+    Генератор синтетических данных для нагрузочных тестов
+
+    География берется из фикстур apps/fixtures (country, region, city),
+    остальное генерируется детерминированно от seed.
+    """
+
+    def __init__(self, seed: int = 42):
+        self.random = random.Random(seed)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.cities: List[City] = []
+        self.languages: List[Language] = []
+        self.translation_types: List[TranslationType] = []
+        self.language_pairs: List[LanguagePair] = []
+
+    def load_reference_data(self):
+        """Загрузить географию из фикстур и создать языки, направления и типы перевода"""
+        call_command('loaddata', 'country', 'region', 'city', verbosity=0)
+        self.cities = list(City.objects.all())
+        self.languages = [Language.objects.get_or_create(name=name)[0] for name in LANGUAGES]
+        self.translation_types = [TranslationType.objects.get_or_create(name=name)[0] for name in TRANSLATION_TYPES]
+        self.language_pairs = [
+            LanguagePair.objects.get_or_create(source=source, target=target)[0]
+            for source in self.languages for target in self.languages if source != target
+        ]
+
+    def create_interpreters(self, count: int) -> List[Interpreter]:
+        """Создать модерированных переводчиков с языками, направлениями, типами перевода, городом и Telegram"""
+        interpreters = []
+        language_links = []
+        translation_type_links = []
+        pairs_by_languages = {(pair.source_id, pair.target_id): pair for pair in self.language_pairs}
+        interpreter_pairs = []
+        pair_type_links = []
+
+        for i in range(count):
+            # bulk_create не поддерживает multi-table inheritance
+            interpreter = Interpreter.objects.create(
+                email=f"bench-interpreter-{self.run_id}-{i}@example.com",
+                first_name='Bench',
+                last_name=f"Interpreter {i}",
+                gender=self.random.choice(Interpreter.GenderType.values),
+                city=self.random.choice(self.cities),
+                is_ready_for_trips=self.random.random() < 0.3,
+                travel_radius_km=self.random.choice([30, 50, 100, 200]),
+                is_moderated=True,
+                telegram_chat_id=str(100000 + i),
+            )
+            interpreters.append(interpreter)
+
+            languages = self.random.sample(self.languages, self.random.randint(2, 4))
+            translation_types = self.random.sample(self.translation_types, self.random.randint(1, 3))
+            for language in languages:
+                language_links.append(Interpreter.language.through(interpreter_id=interpreter.pk,
+                                                                   language_id=language.pk))
+            for translation_type in translation_types:
+                translation_type_links.append(Interpreter.translation_type.through(
+                    interpreter_id=interpreter.pk, translationtype_id=translation_type.pk
+                ))
+
+            # Направления между языками переводчика, не все и не всегда в обе стороны
+            for source in languages:
+                for target in languages:
+                    if source == target or self.random.random() >= 0.7:
+                        continue
+                    interpreter_pair = InterpreterLanguagePair(interpreter=interpreter,
+                                                               pair=pairs_by_languages[(source.pk, target.pk)])
+                    interpreter_pairs.append(interpreter_pair)
+                    for translation_type in self.random.sample(translation_types,
+                                                               self.random.randint(1, len(translation_types))):
+                        pair_type_links.append(InterpreterLanguagePair.translation_types.through(
+                            interpreterlanguagepair_id=interpreter_pair.pk, translationtype_id=translation_type.pk
+                        ))
+
+        Interpreter.language.through.objects.bulk_create(language_links)
+        Interpreter.translation_type.through.objects.bulk_create(translation_type_links)
+        InterpreterLanguagePair.objects.bulk_create(interpreter_pairs, batch_size=5000)
+        InterpreterLanguagePair.translation_types.through.objects.bulk_create(pair_type_links, batch_size=5000)
+        # bulk_create связей не вызывает m2m_changed
+        InterpreterSearchProjection.rebuild([interpreter.pk for interpreter in interpreters])
+        return interpreters
+
+    def create_availabilities(self, interpreters: List[Interpreter], days: int = 30, busy_ratio: float = 0.2):
+        """Создать BUSY записи: каждый слот каждого дня занят с вероятностью busy_ratio"""
+        start = timezone.localdate()
+        rows = []
+        for interpreter in interpreters:
+            for day in range(days):
+                date = start + timedelta(days=day)
+                for period in SLOT_PERIODS:
+                    if self.random.random() >= busy_ratio:
+                        continue
+                    slot_start, slot_end = self._slot_bounds(date, period)
+                    rows.append(Availability(
+                        translator=interpreter,
+                        start_datetime=slot_start,
+                        end_datetime=slot_end,
+                        type=Availability.AvailabilityType.BUSY,
+                    ))
+        Availability.objects.bulk_create(rows, batch_size=5000)
+        return len(rows)
+
+    def create_clients(self, count: int) -> List[Client]:
+        return [
+            Client.objects.create(email=f"bench-client-{self.run_id}-{i}@example.com", first_name='Bench')
+            for i in range(count)
+        ]
+
+    def order_payload(self, days: int = 30) -> dict:
+        """Тело запроса для OrderCreateView"""
+        date = timezone.localdate() + timedelta(days=self.random.randint(1, days - 1))
+        periods = self.random.sample(SLOT_PERIODS, self.random.randint(1, 2))
+        onsite = self.random.random() < 0.6
+        slot_start, _ = self._slot_bounds(date, 'morning')
+        _, slot_end = self._slot_bounds(date, 'evening')
+
+        return {
+            'event_type': 'onsite' if onsite else 'online',
+            'city': str(self.random.choice(self.cities).pk) if onsite else None,
+            'address': 'Bench street 1' if onsite else '',
+            'language_pairs': [str(self.random.choice(self.language_pairs).pk)],
+            'translation_types': [str(self.random.choice(self.translation_types).pk)],
+            'selected_slots': [f"{date.isoformat()}-{period}" for period in periods],
+            'start_datetime': slot_start.isoformat(),
+            'end_datetime': slot_end.isoformat(),
+        }
+
+    @staticmethod
+    def _slot_bounds(date, period: str):
+        start_hour, end_hour = (9, 14) if period == 'morning' else (14, 18)
+        tz = timezone.get_current_timezone()
+        return (
+            timezone.make_aware(datetime.combine(date, time(start_hour)), tz),
+            timezone.make_aware(datetime.combine(date, time(end_hour)), tz),
+        )
@@ -0,0 +1,52 @@
+import json
+from typing import Dict, List, Tuple
+
+from django.db import connection
+
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+
+
+class StatementCapture:
+    """
+    execute_wrapper: запоминает выполненные SELECT/UPDATE/DELETE с параметрами
+
+    Одинаковый SQL сохраняется один раз (с параметрами первого вызова).
+    """
+
+    def __init__(self):
+        self.statements: Dict[str, tuple] = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith(EXPLAINABLE):
+            self.statements.setdefault(sql, params)
+        return execute(sql, params, many, context)
+
+
+def explain(sql: str, params) -> dict:
+    """План запроса без выполнения (EXPLAIN (FORMAT JSON))"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def table_rows() -> Dict[str, float]:
+    """Оценка числа строк (pg_class.reltuples) для таблиц текущей схемы после ANALYZE"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname, reltuples FROM pg_class "
+            "WHERE relkind IN ('r', 'p') AND relnamespace = current_schema()::regnamespace"
+        )
+        return dict(cursor.fetchall())
+
+
+def seq_scans(plan: dict) -> List[Tuple[str, float]]:
+    """Все узлы Seq Scan плана: (таблица, оценка возвращаемых строк)"""
+    found = []
+    if plan.get('Node Type') == 'Seq Scan':
+        found.append((plan['Relation Name'], plan.get('Plan Rows', 0)))
+    for child in plan.get('Plans', []):
+        found.extend(seq_scans(child))
+    return found
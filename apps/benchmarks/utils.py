@@ -0,0 +1,147 @@
+import math
+import time
+from contextlib import contextmanager
+from typing import List
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Перцентиль методом nearest-rank (values в любом порядке)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Sample:
+    """Одно измерение внутри сценария"""
+
+    def __init__(self):
+        self.items = 1
+        self.error = False
+        self.latency = 0.0
+        self.queries = 0
+        self.lock_wait = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper: время SELECT ... FOR UPDATE и UPDATE считается ожиданием блокировки строк"""
+        if 'FOR UPDATE' not in sql and not sql.lstrip().upper().startswith('UPDATE'):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.lock_wait += time.perf_counter() - started
+
+
+class ScenarioStats:
+    """Статистика сценария бенчмарка: латентность, пропускная способность, запросы к БД"""
+
+    def __init__(self, name: str, unit: str = 'items'):
+        self.name = name
+        self.unit = unit
+        self.samples: List[Sample] = []
+
+    @contextmanager
+    def measure(self):
+        """
+        Измерить один вызов: время и количество SQL запросов
+
+        Использование:
+            with stats.measure() as sample:
+                sample.items = do_work()
+        """
+        sample = Sample()
+        queries = CaptureQueriesContext(connection)
+        try:
+            with queries, connection.execute_wrapper(sample):
+                started = time.perf_counter()
+                try:
+                    yield sample
+                except Exception:
+                    sample.error = True
+                    raise
+                finally:
+                    sample.latency = time.perf_counter() - started
+        finally:
+            sample.queries = len(queries)
+            self.samples.append(sample)
+
+    @property
+    def total_items(self) -> int:
+        return sum(sample.items for sample in self.samples)
+
+    @property
+    def total_time(self) -> float:
+        return sum(sample.latency for sample in self.samples)
+
+    def summary(self) -> dict:
+        latencies = [sample.latency for sample in self.samples]
+        lock_waits = [sample.lock_wait for sample in self.samples]
+        total_queries = sum(sample.queries for sample in self.samples)
+        total_items = self.total_items
+        return {
+            'scenario': self.name,
+            'calls': len(self.samples),
+            'errors': sum(1 for sample in self.samples if sample.error),
+            self.unit: total_items,
+            f'{self.unit}_per_sec': total_items / self.total_time if self.total_time else 0.0,
+            f'queries_per_{self.unit.rstrip("s")}': total_queries / total_items if total_items else 0.0,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'lock_wait_total_ms': sum(lock_waits) * 1000,
+            'lock_wait_p95_ms': percentile(lock_waits, 95) * 1000,
+        }
+
+
+def format_report(summaries: List[dict]) -> str:
+    """Форматировать список summary() в текстовую таблицу"""
+    if not summaries:
+        return ''
+    lines = []
+    for summary in summaries:
+        lines.append(summary['scenario'])
+        for key, value in summary.items():
+            if key == 'scenario':
+                continue
+            value = f"{value:.2f}" if isinstance(value, float) else value
+            lines.append(f"  {key:<24} {value}")
+    return '\n'.join(lines)
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Создать отдельную тестовую БД (test_<NAME>) на время бенчмарка
+
+    В отличие от rollback_after данные коммитятся, поэтому их видят
+    параллельные потоки со своими соединениями.
+    """
+    old_name = connection.settings_dict['NAME']
+    # Пул соединений создан с именем исходной БД и держит соединения, мешающие DROP DATABASE
+    close_pool()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        close_pool()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def close_pool():
+    """Закрыть соединение и пул соединений default (если пул включен)"""
+    connection.close()
+    if getattr(connection, 'pool', None) is not None:
+        connection.close_pool()
+
+
+@contextmanager
+def rollback_after():
+    """Выполнить блок в транзакции и откатить все изменения в конце"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def sse(request):
+    """Открывать ли на странице потоки SSE (только под ASGI сервером)"""
+    return {'sse_enabled': settings.SSE_ENABLED}
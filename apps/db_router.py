@@ -0,0 +1,128 @@
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from apps.utils import logger
+
+# Состояние текущего запроса: была ли запись и закреплен ли он за primary
+_request_state: ContextVar[Optional[dict]] = ContextVar('db_request_state', default=None)
+
+# 0, если реплика догнала primary (или это не реплика), иначе задержка применения WAL в секундах
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+class ReplicaLag:
+    """
+    Задержка репликации по алиасам, проверяется не чаще REPLICA_LAG_CHECK_INTERVAL секунд
+
+    Недоступная реплика считается отстающей бесконечно до следующей проверки.
+    """
+
+    _lock = threading.Lock()
+    _lag: Dict[str, float] = {}
+    _checked_at: Dict[str, float] = {}
+
+    @classmethod
+    def get(cls, alias: str) -> float:
+        now = time.monotonic()
+        if now - cls._checked_at.get(alias, 0.0) < settings.REPLICA_LAG_CHECK_INTERVAL:
+            return cls._lag.get(alias, 0.0)
+
+        with cls._lock:
+            if now - cls._checked_at.get(alias, 0.0) >= settings.REPLICA_LAG_CHECK_INTERVAL:
+                cls._checked_at[alias] = now
+                cls._lag[alias] = cls._measure(alias)
+            return cls._lag[alias]
+
+    @staticmethod
+    def _measure(alias: str) -> float:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(LAG_SQL)
+                return float(cursor.fetchone()[0])
+        except DatabaseError as e:
+            logger.warning(f"Replica {alias} is unavailable: {e}")
+            return float('inf')
+
+    @classmethod
+    def max_lag(cls) -> float:
+        lags = [cls.get(alias) for alias in settings.REPLICA_DATABASES]
+        return max([lag for lag in lags if lag != float('inf')], default=0.0)
+
+
+def healthy_replicas() -> list:
+    return [alias for alias in settings.REPLICA_DATABASES
+            if ReplicaLag.get(alias) <= settings.REPLICA_MAX_LAG_SECONDS]
+
+
+def read_database() -> str:
+    """
+    Алиас БД для заведомо read-only запроса (поиск, справочники, списки в админке)
+
+    Возвращает primary, если:
+    - реплики не настроены или все отстают больше REPLICA_MAX_LAG_SECONDS;
+    - запрос выполняется внутри transaction.atomic (блокировки, условные UPDATE);
+    - текущий HTTP запрос уже писал в БД или пришел в окне прилипания после записи.
+    """
+    if not settings.REPLICA_DATABASES or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+
+    state = _request_state.get()
+    if state is not None and (state['pinned'] or state['wrote']):
+        return DEFAULT_DB_ALIAS
+
+    replicas = healthy_replicas()
+    return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+
+def begin_request(pinned: bool):
+    """Начать отслеживание записей для HTTP запроса (ReplicaStickinessMiddleware)"""
+    return _request_state.set({'pinned': pinned, 'wrote': False})
+
+
+def end_request(token) -> bool:
+    """Закончить отслеживание; True, если запрос писал в БД"""
+    wrote = _request_state.get()['wrote']
+    _request_state.reset(token)
+    return wrote
+
+
+def sticky_seconds() -> int:
+    """Окно прилипания к primary после записи: не меньше текущей задержки реплик"""
+    return int(max(settings.REPLICA_STICKY_SECONDS, ReplicaLag.max_lag() + 1))
+
+
+class ReplicaRouter:
+    """
+    Роутер primary/реплики
+
+    Записи всегда идут в primary и помечают текущий запрос как писавший.
+    Чтения по умолчанию остаются на primary: на реплику их явно отправляют
+    через .using(read_database()) только read-only участки кода.
+    """
+
+    def db_for_read(self, model, **hints):
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
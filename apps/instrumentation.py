@@ -0,0 +1,230 @@
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from typing import Optional
+
+import redis
+from django.conf import settings
+from django.core.cache.backends.redis import RedisCache
+from django.db import connection
+
+from apps.utils import logger
+
+_current: ContextVar[Optional['RequestMetrics']] = ContextVar('instrumentation_metrics', default=None)
+
+_IN_LIST_RE = re.compile(r'\((?:%s,\s*)+%s\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql: str) -> str:
+    """Нормализовать SQL: параметры уже вынесены в %s, схлопываем IN (...) и пробелы"""
+    return _WHITESPACE_RE.sub(' ', _IN_LIST_RE.sub('(%s...)', sql)).strip()
+
+
+def current_metrics() -> Optional['RequestMetrics']:
+    """Метрики текущего запроса/задачи или None, если он не попал в выборку"""
+    return _current.get()
+
+
+def is_sampled() -> bool:
+    return settings.INSTRUMENTATION_ENABLED and random.random() < settings.INSTRUMENTATION_SAMPLE_RATE
+
+
+class RequestMetrics:
+    """
+    Метрики одного запроса или Celery задачи
+
+    Используется как execute_wrapper соединения: считает SQL запросы,
+    их суммарное время и повторяющиеся запросы (признак N+1).
+    """
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.queries = 0
+        self.sql_time = 0.0
+        self.fingerprints = Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.http_time = 0.0
+        self.http_calls = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self) -> dict:
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing"""
+        duplicate_count = sum(count - 1 for count in self.duplicates.values())
+        return ', '.join([
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries, {duplicate_count} duplicates"',
+            f'cache;desc="hits={self.cache_hits} misses={self.cache_misses}"',
+            f'http;dur={self.http_time * 1000:.1f};desc="{self.http_calls} calls"',
+            f'total;dur={self.duration * 1000:.1f}',
+        ])
+
+
+class MetricsRegistry:
+    """
+    Агрегаты метрик в Redis, общие для всех web и Celery процессов
+
+    На каждый попавший в выборку запрос - один pipeline с HINCRBYFLOAT.
+    """
+
+    PREFIX = 'instrumentation'
+    TOP_DUPLICATES = 5
+    FINGERPRINT_MAX_LENGTH = 200
+
+    def __init__(self):
+        self._client = None
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.Redis.from_url(settings.CACHES['default']['LOCATION'])
+        return self._client
+
+    def record(self, metrics: RequestMetrics):
+        endpoint = f"{metrics.kind}:{metrics.name}"
+        key = f"{self.PREFIX}:{endpoint}"
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.sadd(f"{self.PREFIX}:endpoints", endpoint)
+            pipe.hincrby(key, 'count', 1)
+            pipe.hincrbyfloat(key, 'duration_seconds', metrics.duration)
+            pipe.hincrby(key, 'queries', metrics.queries)
+            pipe.hincrbyfloat(key, 'sql_seconds', metrics.sql_time)
+            pipe.hincrby(key, 'duplicate_queries', sum(count - 1 for count in metrics.duplicates.values()))
+            pipe.hincrby(key, 'cache_hits', metrics.cache_hits)
+            pipe.hincrby(key, 'cache_misses', metrics.cache_misses)
+            pipe.hincrbyfloat(key, 'http_seconds', metrics.http_time)
+            for sql, count in metrics.duplicates.items():
+                pipe.zincrby(f"{key}:duplicates", count - 1, sql[:self.FINGERPRINT_MAX_LENGTH])
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Failed to record metrics for {endpoint}: {e}")
+
+    def render_prometheus(self) -> str:
+        """Текст в формате Prometheus exposition"""
+        lines = []
+        endpoints = sorted(member.decode() for member in self.client.smembers(f"{self.PREFIX}:endpoints"))
+
+        for endpoint in endpoints:
+            kind, name = endpoint.split(':', 1)
+            labels = f'kind="{kind}",name="{name}"'
+            key = f"{self.PREFIX}:{endpoint}"
+
+            for field, value in sorted(self.client.hgetall(key).items()):
+                lines.append(f"linguatime_{field.decode()}_total{{{labels}}} {value.decode()}")
+
+            top = self.client.zrevrange(f"{key}:duplicates", 0, self.TOP_DUPLICATES - 1, withscores=True)
+            for sql, count in top:
+                escaped = sql.decode().replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'linguatime_duplicate_query_total{{{labels},sql="{escaped}"}} {count:g}')
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def start(kind: str, name: str) -> tuple:
+    """
+    Начать сбор метрик в текущем контексте
+
+    Returns:
+        (RequestMetrics, ExitStack) - стек нужно закрыть в stop()
+    """
+    metrics = RequestMetrics(kind, name)
+    stack = ExitStack()
+    stack.enter_context(connection.execute_wrapper(metrics))
+    token = _current.set(metrics)
+    stack.callback(_current.reset, token)
+    return metrics, stack
+
+
+def stop(metrics: RequestMetrics, stack: ExitStack, name: Optional[str] = None):
+    """Закончить сбор и записать агрегаты"""
+    stack.close()
+    metrics.finish()
+    if name:
+        metrics.name = name
+    registry.record(metrics)
+
+
+class InstrumentedRedisCache(RedisCache):
+    """RedisCache, считающий попадания и промахи для текущего запроса"""
+
+    _missing = object()
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._missing, version)
+        metrics = _current.get()
+        if metrics is not None:
+            if value is self._missing:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is self._missing else value
+
+
+def _instrument_requests():
+    """Учитывать время исходящих HTTP запросов через requests"""
+    import requests
+
+    original_send = requests.Session.send
+
+    def send(self, request, **kwargs):
+        metrics = _current.get()
+        if metrics is None:
+            return original_send(self, request, **kwargs)
+        started = time.perf_counter()
+        try:
+            return original_send(self, request, **kwargs)
+        finally:
+            metrics.http_time += time.perf_counter() - started
+            metrics.http_calls += 1
+
+    requests.Session.send = send
+
+
+def _connect_celery_signals():
+    from celery.signals import task_postrun, task_prerun
+
+    active = {}
+
+    @task_prerun.connect(weak=False)
+    def on_task_prerun(task_id=None, task=None, **kwargs):
+        if is_sampled():
+            active[task_id] = start('task', task.name)
+
+    @task_postrun.connect(weak=False)
+    def on_task_postrun(task_id=None, **kwargs):
+        started = active.pop(task_id, None)
+        if started:
+            stop(*started)
+
+
+def setup():
+    """Подключить хуки инструментирования (вызывается из AppConfig.ready)"""
+    if not settings.INSTRUMENTATION_ENABLED:
+        return
+    _instrument_requests()
+    _connect_celery_signals()
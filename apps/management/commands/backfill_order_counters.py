@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.services.order_workflow import OrderWorkflowService
+
+
+class Command(BaseCommand):
+    help = ("Заполнить Order.required_count и Order.accepted_count для существующих заказов "
+            "(после добавления счетчиков миграцией все заказы получили значения по умолчанию)")
+
+    def handle(self, *args, **options):
+        required_updated, accepted_updated = OrderWorkflowService.backfill_counters()
+        self.stdout.write(f"Updated required_count for {required_updated} orders, "
+                          f"accepted_count for {accepted_updated} orders")
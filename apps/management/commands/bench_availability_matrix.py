@@ -0,0 +1,113 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from apps.benchmarks.generators import SyntheticData
+from apps.benchmarks.utils import (ScenarioStats, benchmark_database,
+                                   format_report)
+from apps.models import Availability, InterpreterSearchProjection, Order
+from apps.services.availability_matrix import AvailabilityMatrix
+
+
+class Command(BaseCommand):
+    help = ("Бенчмарк проверки занятости в поиске: битовая матрица AvailabilityMatrix (NumPy) против "
+            "NOT EXISTS по Availability. Сравнивает результаты, время поиска, построение и инкрементальное "
+            "обновление матрицы и ее размер в памяти")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interpreters', type=int, default=50000)
+        parser.add_argument('--days', type=int, default=90, help='Горизонт занятости и матрицы')
+        parser.add_argument('--busy-ratio', type=float, default=0.2, help='Доля занятых слотов')
+        parser.add_argument('--searches', type=int, default=200)
+        parser.add_argument('--updates', type=int, default=500, help='Переводчиков с новой занятостью')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        from apps.services.interpreter_search import InterpreterSearchService
+
+        with override_settings(AVAILABILITY_MATRIX_DAYS=options['days']), benchmark_database():
+            data = SyntheticData(seed=options['seed'])
+            data.load_reference_data()
+            with transaction.atomic():
+                interpreters = data.create_interpreters(options['interpreters'])
+            records = data.create_availabilities(interpreters, days=options['days'],
+                                                 busy_ratio=options['busy_ratio'])
+            self.stdout.write(f"Seeded {len(interpreters)} interpreters, {records} busy records")
+
+            AvailabilityMatrix.reset()
+            orders = [self._order(data, options['days']) for _ in range(options['searches'])]
+            candidates = InterpreterSearchProjection.objects.filter(is_active=True, is_moderated=True)
+
+            started = time.perf_counter()
+            AvailabilityMatrix.busy_interpreters([(orders[0].start_datetime, orders[0].end_datetime)])
+            build_time = time.perf_counter() - started
+            stats = AvailabilityMatrix.stats()
+            if not stats['bytes']:
+                raise CommandError('Availability matrix was not built (memory limit or Redis unavailable)')
+
+            sql = ScenarioStats('sql_not_exists', unit='searches')
+            matrix = ScenarioStats('bitmap_matrix', unit='searches')
+            bitmap_only = ScenarioStats('bitmap_check_only', unit='searches')
+            mismatches = 0
+            for order in orders:
+                service = InterpreterSearchService(order)
+                with override_settings(AVAILABILITY_MATRIX_ENABLED=False), sql.measure():
+                    expected = set(service._filter_by_availability(candidates).values_list(
+                        'interpreter_id', flat=True))
+                with matrix.measure():
+                    found = set(service._filter_by_availability(candidates).values_list('interpreter_id', flat=True))
+                ranges = service._convert_slots_to_datetime_ranges(order.selected_slots)
+                with bitmap_only.measure():
+                    AvailabilityMatrix.busy_interpreters([(slot['start'], slot['end']) for slot in ranges])
+                mismatches += expected != found
+
+            update_time = self._incremental_update(data, interpreters, orders[0], options)
+
+        report = [sql.summary(), matrix.summary(), bitmap_only.summary(), {
+            'scenario': 'bitmap_matrix_memory',
+            'rows': stats['rows'],
+            'capacity': stats['capacity'],
+            'matrix_mb': stats['bytes'] / 2 ** 20,
+            'bytes_per_interpreter': options['days'] * 12,
+            'build_s': build_time,
+            'incremental_update_ms': update_time * 1000,
+        }]
+        self.stdout.write(format_report(report))
+
+        if mismatches:
+            raise CommandError(f"Bitmap and SQL availability disagree for {mismatches} searches")
+
+    @staticmethod
+    def _order(data: SyntheticData, days: int) -> Order:
+        """Несохраненный заказ со слотами из order_payload (проверка занятости читает только слоты)"""
+        payload = data.order_payload(days)
+        return Order(location_type=Order.LocationType.ONLINE, selected_slots=payload['selected_slots'],
+                     start_datetime=datetime.fromisoformat(payload['start_datetime']),
+                     end_datetime=datetime.fromisoformat(payload['end_datetime']))
+
+    @staticmethod
+    def _incremental_update(data: SyntheticData, interpreters: list, order: Order, options: dict) -> float:
+        """Занять окно заказа у части переводчиков и замерить перечитывание помеченных строк"""
+        from apps.services.interpreter_search import InterpreterSearchService
+
+        service = InterpreterSearchService(order)
+        slot = service._convert_slots_to_datetime_ranges(order.selected_slots)[0]
+        updated = data.random.sample(interpreters, min(options['updates'], len(interpreters)))
+        # bulk_create не вызывает сигналы: пометка как после коммита
+        Availability.objects.bulk_create([
+            Availability(translator=interpreter, start_datetime=order.start_datetime, end_datetime=order.end_datetime,
+                         type=Availability.AvailabilityType.BUSY)
+            for interpreter in updated
+        ])
+        AvailabilityMatrix.mark_dirty(interpreter.pk for interpreter in updated)
+
+        started = time.perf_counter()
+        busy = set(AvailabilityMatrix.busy_interpreters([(slot['start'], slot['end'])]))
+        update_time = time.perf_counter() - started
+
+        if not {interpreter.pk for interpreter in updated} <= busy:
+            raise CommandError('Incremental update did not mark updated interpreters busy')
+        return update_time
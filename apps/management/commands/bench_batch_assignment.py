@@ -0,0 +1,150 @@
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.benchmarks.generators import SyntheticData
+from apps.benchmarks.utils import benchmark_database, format_report
+from apps.models import Order
+from apps.services.batch_assignment import BatchAssignmentService, OrderDemand
+
+
+class Command(BaseCommand):
+    help = ("Бенчмарк пакетного назначения: время сбора кандидатов и решения задачи о назначениях для "
+            "N заказов x M переводчиков и симуляция ответов переводчиков - оферов на одно назначение "
+            "при пакетном назначении против рассылки каждого заказа отдельно")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interpreters', type=int, default=10000)
+        parser.add_argument('--orders', type=int, default=1000)
+        parser.add_argument('--days', type=int, default=14, help='Горизонт заказов и доступности')
+        parser.add_argument('--broadcast-offers', type=int, default=10, help='Оферов на заказ при рассылке')
+        parser.add_argument('--accept-rate', type=float, default=0.6, help='Вероятность принять офер')
+        parser.add_argument('--rounds', type=int, default=3, help='Раундов оферов (повтор для незакрытых мест)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            data = SyntheticData(seed=options['seed'])
+            data.load_reference_data()
+            with transaction.atomic():
+                interpreters = data.create_interpreters(options['interpreters'])
+            data.create_availabilities(interpreters, days=options['days'])
+            client = data.create_clients(1)[0]
+            with transaction.atomic():
+                self._create_orders(data, client, options)
+            self.stdout.write(f"Seeded {len(interpreters)} interpreters and {options['orders']} orders")
+
+            started = time.perf_counter()
+            demands = BatchAssignmentService.collect(limit=options['orders'])
+            collect_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            assignments = BatchAssignmentService.solve(demands, {})
+            solve_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            offers_sent = BatchAssignmentService.send(assignments)
+            send_time = time.perf_counter() - started
+
+        report = [{
+            'scenario': 'batch_solver',
+            'orders': len(demands),
+            'open_slots': sum(demand.slots for demand in demands),
+            'candidates_total': sum(len(demand.candidates) for demand in demands),
+            'time_groups': len(BatchAssignmentService.time_groups(demands)),
+            'assigned': sum(len(interpreter_ids) for interpreter_ids in assignments.values()),
+            'collect_s': collect_time,
+            'solve_s': solve_time,
+            'send_s': send_time,
+            'offers_sent': offers_sent,
+        }]
+        for strategy in ('broadcast', 'batch'):
+            report.append(self._simulate(strategy, demands, data, options))
+        self.stdout.write(format_report(report))
+
+        broadcast, batch = report[1], report[2]
+        if batch['offers_per_assignment'] > broadcast['offers_per_assignment']:
+            raise CommandError('Batch assignment sent more offers per assignment than per-order broadcast')
+
+    @staticmethod
+    def _create_orders(data: SyntheticData, client, options: dict):
+        """Заказы NEW с направлениями и типами перевода из order_payload"""
+        synchronous = next(t for t in data.translation_types if t.name == 'synchronous')
+        pair_links, type_links = [], []
+        for _ in range(options['orders']):
+            payload = data.order_payload(options['days'])
+            interpreter_count = data.random.choice([1, 1, 1, 2])
+            is_synchronous = payload['translation_types'] == [str(synchronous.pk)]
+            order = Order.objects.create(
+                client=client,
+                location_type=payload['event_type'], city_id=payload['city'], address=payload['address'],
+                selected_slots=payload['selected_slots'],
+                start_datetime=payload['start_datetime'], end_datetime=payload['end_datetime'],
+                interpreter_count=interpreter_count,
+                required_count=max(interpreter_count, 2 if is_synchronous else 1),
+                status=Order.OrderStatus.NEW,
+            )
+            pair_links += [Order.language_pairs.through(order_id=order.pk, languagepair_id=pair_id)
+                           for pair_id in payload['language_pairs']]
+            type_links += [Order.translation_types.through(order_id=order.pk, translationtype_id=type_id)
+                           for type_id in payload['translation_types']]
+        Order.language_pairs.through.objects.bulk_create(pair_links)
+        Order.translation_types.through.objects.bulk_create(type_links)
+
+    @staticmethod
+    def _simulate(strategy: str, demands: list, data: SyntheticData, options: dict) -> dict:
+        """
+        Раунды оферов и ответов в памяти
+
+        Переводчик принимает офер с вероятностью accept-rate, если в это время
+        еще не занят другим принятым заказом и у заказа остались места;
+        остальные оферы потрачены впустую (отказ, истечение, отмена).
+        """
+        rng = data.random
+        remaining = {demand.order_id: demand.slots for demand in demands}
+        contacted = defaultdict(set)
+        busy = defaultdict(list)  # переводчик -> [(start, end)] принятых заказов
+        offers_sent = assignments = 0
+
+        def is_free(interpreter_id, demand: OrderDemand) -> bool:
+            return all(end <= demand.start or start >= demand.end for start, end in busy[interpreter_id])
+
+        by_id = {demand.order_id: demand for demand in demands}
+        for _ in range(options['rounds']):
+            open_demands = []
+            for demand in demands:
+                if remaining[demand.order_id] <= 0:
+                    continue
+                candidates = [interpreter_id for interpreter_id in demand.candidates
+                              if interpreter_id not in contacted[demand.order_id] and is_free(interpreter_id, demand)]
+                open_demands.append(demand._replace(slots=remaining[demand.order_id], candidates=candidates,
+                                                    minimum=min(demand.minimum, remaining[demand.order_id])))
+
+            if strategy == 'batch':
+                offers = BatchAssignmentService.solve(open_demands, {})
+            else:
+                offers = {demand.order_id: demand.candidates[:options['broadcast_offers']] for demand in open_demands}
+
+            responses = [(order_id, interpreter_id) for order_id, interpreter_ids in offers.items()
+                         for interpreter_id in interpreter_ids]
+            rng.shuffle(responses)
+            for order_id, interpreter_id in responses:
+                demand = by_id[order_id]
+                contacted[order_id].add(interpreter_id)
+                offers_sent += 1
+                accepted = rng.random() < options['accept_rate']
+                if accepted and remaining[order_id] > 0 and is_free(interpreter_id, demand):
+                    remaining[order_id] -= 1
+                    busy[interpreter_id].append((demand.start, demand.end))
+                    assignments += 1
+
+        return {
+            'scenario': f'simulated_{strategy}',
+            'offers_sent': offers_sent,
+            'assignments': assignments,
+            'offers_per_assignment': offers_sent / assignments if assignments else 0.0,
+            'orders_filled': sum(1 for slots in remaining.values() if slots <= 0),
+            'open_slots_left': sum(max(slots, 0) for slots in remaining.values()),
+        }
@@ -0,0 +1,137 @@
+import uuid
+from datetime import timedelta
+
+from celery import current_app
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client as HttpClient
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.benchmarks.fake_google_calendar import FakeGoogleCalendarServer
+from apps.benchmarks.utils import ScenarioStats, format_report, rollback_after
+from apps.models import (Availability, GoogleCalendarCredentials,
+                         GoogleCalendarWebhookChannel, Interpreter)
+
+
+class Command(BaseCommand):
+    help = ("Бенчмарк синхронизации Google Calendar на локальном фейковом API: "
+            "sync_calendar, renew_expiring_channels и webhook -> sync_interpreter_calendar")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interpreters', type=int, default=20)
+        parser.add_argument('--events', type=int, default=500, help='Событий в календаре каждого переводчика')
+        parser.add_argument('--mutations', type=int, default=50, help='Изменений на инкрементальную синхронизацию')
+        parser.add_argument('--page-size', type=int, default=250)
+        parser.add_argument('--latency-ms', type=float, default=0)
+        parser.add_argument('--error-rate', type=float, default=0)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        from apps.services.google_calendar import GoogleCalendarService
+
+        # Задачи Celery выполняются синхронно в этом процессе
+        current_app.conf.task_always_eager = True
+
+        fake = FakeGoogleCalendarServer(
+            latency_ms=options['latency_ms'],
+            error_rate=options['error_rate'],
+            page_size=options['page_size'],
+            seed=options['seed'],
+        )
+
+        with fake, override_settings(GOOGLE_CALENDAR_API_ENDPOINT=fake.api_endpoint,
+                                     WEBHOOK_URL_BASE='http://testserver'), rollback_after():
+            interpreters = self._seed(fake, options['interpreters'], options['events'])
+
+            def sync_all(stats):
+                for interpreter, _ in interpreters:
+                    with stats.measure() as sample:
+                        result = GoogleCalendarService(interpreter).sync_calendar()
+                        sample.items = result.get('synced_count', 0)
+                        sample.error = not result['success']
+                return stats
+
+            full_sync = sync_all(ScenarioStats('full_sync', unit='events'))
+
+            for _, token in interpreters:
+                fake.state.mutate_events(token, options['mutations'])
+            incremental_sync = sync_all(ScenarioStats('incremental_sync', unit='events'))
+
+            token_refresh = ScenarioStats('token_refresh', unit='refreshes')
+            for interpreter, _ in interpreters:
+                service = GoogleCalendarService(interpreter)
+                credentials_model = GoogleCalendarCredentials.objects.get(user=interpreter)
+                with token_refresh.measure():
+                    service.refresh_credentials(service._credentials_from_model(credentials_model), credentials_model)
+
+            renew_channels = self._bench_renew_channels(interpreters)
+            webhook = self._bench_webhook(fake, interpreters, options['mutations'])
+
+            summaries = [stats.summary() for stats in
+                         (full_sync, incremental_sync, token_refresh, renew_channels, webhook)]
+
+        self.stdout.write(format_report(summaries))
+        self.stdout.write(f"fake API requests: {fake.state.request_count}")
+
+    def _seed(self, fake: FakeGoogleCalendarServer, count: int, events: int) -> list:
+        """Создать переводчиков с credentials, указывающими на фейковый API"""
+        run_id = uuid.uuid4().hex[:8]
+        interpreters = []
+        for i in range(count):
+            interpreter = Interpreter.objects.create(
+                email=f"bench-calendar-{run_id}-{i}@example.com",
+                google_calendar_connected=True,
+                is_moderated=True,
+            )
+            token = f"bench-{run_id}-{i}"
+            GoogleCalendarCredentials.objects.create(
+                user=interpreter,
+                token=token,
+                refresh_token=token,
+                token_uri=fake.token_uri,
+                client_id='bench',
+                client_secret='bench',
+                scopes=' '.join(settings.GOOGLE_OAUTH_SCOPES['calendar']),
+            )
+            fake.state.seed_events(token, events)
+            interpreters.append((interpreter, token))
+        return interpreters
+
+    def _bench_renew_channels(self, interpreters: list) -> ScenarioStats:
+        """Создать каналы, состарить их и обновить через renew_expiring_channels (только каналы бенчмарка)"""
+        from apps.services.google_calendar import GoogleCalendarService
+        from apps.tasks.calendar_tasks import renew_expiring_channels
+
+        for interpreter, _ in interpreters:
+            GoogleCalendarService(interpreter).setup_watch_channel()
+
+        GoogleCalendarWebhookChannel.objects.filter(
+            interpreter__in=[interpreter for interpreter, _ in interpreters],
+            is_active=True
+        ).update(expiration=timezone.now() + timedelta(hours=1))
+
+        stats = ScenarioStats('renew_expiring_channels', unit='channels')
+        with stats.measure() as sample:
+            sample.items = renew_expiring_channels(
+                [str(interpreter.id) for interpreter, _ in interpreters])['renewed_count']
+        return stats
+
+    def _bench_webhook(self, fake: FakeGoogleCalendarServer, interpreters: list, mutations: int) -> ScenarioStats:
+        """Webhook 'exists' -> sync_interpreter_calendar (eager) для каждого переводчика"""
+        http = HttpClient()
+        stats = ScenarioStats('webhook_sync', unit='events')
+
+        for interpreter, token in interpreters:
+            fake.state.mutate_events(token, mutations)
+            started = timezone.now()
+            with stats.measure() as sample:
+                response = http.post('/webhook/google-calendar/', headers={
+                    'X-Goog-Channel-ID': 'bench',
+                    'X-Goog-Resource-State': 'exists',
+                    'X-Goog-Channel-Token': str(interpreter.id),
+                })
+                sample.error = response.status_code != 200
+            # События, сохраненные синхронизацией (как synced_count в sync_calendar)
+            sample.items = Availability.objects.filter(translator=interpreter, last_synced_at__gte=started).count()
+        return stats
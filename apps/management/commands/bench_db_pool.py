@@ -0,0 +1,120 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from celery import current_app
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from apps.benchmarks.generators import SyntheticData
+from apps.benchmarks.utils import (ScenarioStats, benchmark_database,
+                                   format_report)
+from apps.models import Order
+from root.db_pool import pool_options
+
+MODES = ('no_pool', 'persistent', 'pool')
+
+
+class Command(BaseCommand):
+    help = ("Бенчмарк соединений с БД для коротких задач Celery (notify_client): новое соединение на задачу, "
+            "постоянные соединения (CONN_MAX_AGE) и пул psycopg_pool. Показывает задач в секунду по режимам")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=4, help='Потоков, выполняющих задачи')
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        from apps.tasks import notify_client
+
+        current_app.conf.task_always_eager = True
+        summaries = []
+
+        with benchmark_database():
+            data = SyntheticData(seed=options['seed'])
+            data.load_reference_data()
+            client = data.create_clients(1)[0]
+            start = timezone.now() + timedelta(days=1)
+            order = Order.objects.create(
+                client=client,
+                location_type=Order.LocationType.ONLINE,
+                address='',
+                start_datetime=start,
+                end_datetime=start + timedelta(hours=1),
+                status=Order.OrderStatus.SEARCHING,
+            )
+            order_id = str(order.id)
+            original = self._connection_settings()
+
+            try:
+                for mode in options['modes']:
+                    if mode == 'pool' and not self._pool_supported():
+                        self.stderr.write('pool: skipped, psycopg 3 with psycopg_pool is not installed')
+                        continue
+                    self._configure(mode, original, options['concurrency'])
+                    stats = ScenarioStats(mode, unit='tasks')
+
+                    def run_task(_):
+                        try:
+                            with stats.measure():
+                                notify_client.apply(args=[order_id, 'bench'])
+                        finally:
+                            # Как DjangoWorkerFixup после каждой задачи: вернуть соединение в пул
+                            # или закрыть его, если оно устарело
+                            for conn in connections.all(initialized_only=True):
+                                conn.close_if_unusable_or_obsolete()
+
+                    with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                        list(executor.map(run_task, range(options['tasks'])))
+                        # Постоянные соединения потоков закрываются в своих потоках: по одному вызову на поток
+                        barrier = threading.Barrier(options['concurrency'])
+                        list(executor.map(lambda _: (barrier.wait(), connection.close()),
+                                          range(options['concurrency'])))
+                    summaries.append(stats.summary())
+            finally:
+                self._configure(None, original, options['concurrency'])
+
+        self.stdout.write(format_report(summaries))
+        errors = [summary['scenario'] for summary in summaries if summary['errors']]
+        if errors:
+            raise CommandError(f"Tasks failed in modes: {', '.join(errors)}")
+
+    @staticmethod
+    def _connection_settings() -> dict:
+        return {
+            'CONN_MAX_AGE': connection.settings_dict['CONN_MAX_AGE'],
+            'OPTIONS': dict(connection.settings_dict['OPTIONS']),
+        }
+
+    @staticmethod
+    def _configure(mode, original: dict, concurrency: int):
+        """Переключить режим соединений default; None - вернуть исходные настройки"""
+        connection.close()
+        if getattr(connection, 'pool', None) is not None:
+            connection.close_pool()
+
+        options = {key: value for key, value in original['OPTIONS'].items() if key != 'pool'}
+        conn_max_age = 0
+        if mode is None:
+            options, conn_max_age = dict(original['OPTIONS']), original['CONN_MAX_AGE']
+        elif mode == 'persistent':
+            conn_max_age = 600
+        elif mode == 'pool':
+            options['pool'] = pool_options(max_size=concurrency)
+
+        # Потоки создают свои DatabaseWrapper из connections.settings
+        for settings_dict in {id(d): d for d in (connection.settings_dict, connections.settings['default'])}.values():
+            settings_dict['CONN_MAX_AGE'] = conn_max_age
+            settings_dict['OPTIONS'] = options
+
+    @staticmethod
+    def _pool_supported() -> bool:
+        from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            return False
+        return is_psycopg3
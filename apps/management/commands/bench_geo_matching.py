@@ -0,0 +1,105 @@
+import math
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.benchmarks.generators import SyntheticData
+from apps.benchmarks.utils import (ScenarioStats, benchmark_database,
+                                   format_report)
+from apps.models import City, InterpreterSearchProjection, Order
+from apps.services.geo import EARTH_RADIUS_KM, haversine_km
+
+
+def haversine_python(latitude, longitude, latitudes, longitudes) -> list:
+    """Поэлементный haversine для сравнения с векторным"""
+    result = []
+    lat1 = math.radians(latitude)
+    for lat, lng in zip(latitudes, longitudes):
+        lat2 = math.radians(lat)
+        a = (math.sin((lat2 - lat1) / 2) ** 2
+             + math.cos(lat1) * math.cos(lat2) * math.sin(math.radians(lng - longitude) / 2) ** 2)
+        result.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0))))
+    return result
+
+
+class Command(BaseCommand):
+    help = ("Бенчмарк поиска переводчиков для onsite заказов с учетом расстояния: bounding box в SQL + "
+            "haversine в NumPy против точного совпадения города. Также сравнивает NumPy с циклом Python")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interpreters', type=int, default=100000)
+        parser.add_argument('--searches', type=int, default=50, help='Поисков на каждый город')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        from apps.services.interpreter_search import InterpreterSearchService
+
+        summaries = []
+        coverage = []
+        # Каждый повтор - полный поиск, а не попадание в кэш результатов
+        with override_settings(SEARCH_CACHE_ENABLED=False), benchmark_database():
+            data = SyntheticData(seed=options['seed'])
+            data.load_reference_data()
+            with transaction.atomic():
+                data.create_interpreters(options['interpreters'])
+            client = data.create_clients(1)[0]
+            self.stdout.write(f"Seeded {options['interpreters']} interpreters in {len(data.cities)} cities")
+
+            start = timezone.now() + timedelta(days=1)
+            geo = ScenarioStats('geo_search', unit='searches')
+            exact = ScenarioStats('exact_city_search', unit='searches')
+
+            for city in City.objects.exclude(latitude=None):
+                order = Order.objects.create(
+                    client=client, location_type=Order.LocationType.ONSITE, city=city, address='',
+                    start_datetime=start, end_datetime=start + timedelta(hours=2),
+                    status=Order.OrderStatus.NEW,
+                )
+                for _ in range(options['searches']):
+                    with geo.measure():
+                        geo_count = InterpreterSearchService(order).find_available_interpreters().count()
+                    with exact.measure():
+                        exact_count = InterpreterSearchProjection.objects.filter(
+                            is_active=True, is_moderated=True, city_id=city.id
+                        ).count()
+                coverage.append((city.name, exact_count, geo_count))
+
+            summaries += [geo.summary(), exact.summary()]
+            summaries.append(self._vector_vs_loop())
+
+        self.stdout.write(format_report(summaries))
+        self.stdout.write('city                     same_city  with_travel')
+        for name, exact_count, geo_count in sorted(coverage, key=lambda row: row[1]):
+            self.stdout.write(f"{name:<24} {exact_count:>9}  {geo_count:>11}")
+
+        if any(geo_count < exact_count for _, exact_count, geo_count in coverage):
+            raise CommandError('Distance-aware search returned fewer interpreters than exact city match')
+
+    def _vector_vs_loop(self) -> dict:
+        """Время ранжирования одних и тех же кандидатов: NumPy против цикла Python"""
+        rows = list(InterpreterSearchProjection.objects.exclude(latitude=None).values_list('latitude', 'longitude'))
+        latitudes, longitudes = (np.array(column, dtype=np.float64) for column in zip(*rows))
+        origin = (float(latitudes[0]), float(longitudes[0]))
+
+        started = time.perf_counter()
+        vectorized = haversine_km(origin[0], origin[1], latitudes, longitudes)
+        numpy_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        looped = haversine_python(origin[0], origin[1], latitudes.tolist(), longitudes.tolist())
+        python_time = time.perf_counter() - started
+
+        if not np.allclose(vectorized, looped):
+            raise CommandError('NumPy and Python haversine disagree')
+        return {
+            'scenario': 'haversine_ranking',
+            'candidates': len(rows),
+            'numpy_ms': numpy_time * 1000,
+            'python_ms': python_time * 1000,
+            'speedup': python_time / numpy_time if numpy_time else 0.0,
+        }
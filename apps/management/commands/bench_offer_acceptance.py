@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from celery import current_app
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.benchmarks.fake_telegram import FakeTelegramServer
+from apps.benchmarks.generators import SyntheticData
+from apps.benchmarks.utils import (ScenarioStats, benchmark_database,
+                                   format_report)
+from apps.models import Booking, Order, OrderInterpreter
+
+
+class Command(BaseCommand):
+    help = ("Бенчмарк конкурентного принятия оферов: N переводчиков одновременно принимают один заказ. "
+            "Показывает пропускную способность, ожидание блокировок и проверяет, что мест не больше required_count")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accepts', type=int, default=1000)
+        parser.add_argument('--required', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        from apps.services.order_workflow import OrderWorkflowService
+
+        current_app.conf.task_always_eager = True
+
+        with FakeTelegramServer() as telegram, \
+                override_settings(TELEGRAM_API_SERVER=telegram.base_url, TELEGRAM_BOT_TOKEN='123456:bench'), \
+                benchmark_database():
+            data = SyntheticData(seed=options['seed'])
+            data.load_reference_data()
+            interpreters = data.create_interpreters(options['accepts'])
+            client = data.create_clients(1)[0]
+
+            start = timezone.now() + timedelta(days=1)
+            order = Order.objects.create(
+                client=client,
+                location_type=Order.LocationType.ONLINE,
+                address='',
+                start_datetime=start,
+                end_datetime=start + timedelta(hours=4),
+                status=Order.OrderStatus.SEARCHING,
+                required_count=options['required'],
+            )
+            bookings = Booking.objects.bulk_create([
+                Booking(order=order, interpreter=interpreter, rate=0,
+                        offer_expires_at=timezone.now() + timedelta(hours=3))
+                for interpreter in interpreters
+            ])
+
+            stats = ScenarioStats('concurrent_accept', unit='accepts')
+            outcomes = []
+
+            def accept(booking_id):
+                try:
+                    with stats.measure():
+                        result = OrderWorkflowService(order).handle_interpreter_response(str(booking_id), True)
+                    outcomes.append(result['success'])
+                finally:
+                    connection.close()
+
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                list(pool.map(accept, [booking.id for booking in bookings]))
+
+            order.refresh_from_db()
+            assigned = OrderInterpreter.objects.filter(order=order).count()
+            accepted = Booking.objects.filter(order=order, status=Booking.Status.ACCEPTED).count()
+            summary = stats.summary()
+
+        self.stdout.write(format_report([summary]))
+        self.stdout.write(f"won: {sum(outcomes)}, lost: {len(outcomes) - sum(outcomes)}, "
+                          f"accepted_count: {order.accepted_count}/{order.required_count}, "
+                          f"assigned: {assigned}, accepted bookings: {accepted}, status: {order.status}")
+
+        if not (order.accepted_count == assigned == accepted == options['required']):
+            raise CommandError('Acceptance invariant violated: assignments do not match required_count')
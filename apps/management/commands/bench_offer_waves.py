@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from celery import current_app
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.benchmarks.fake_telegram import FakeTelegramServer
+from apps.benchmarks.generators import SyntheticData
+from apps.benchmarks.utils import benchmark_database, format_report
+from apps.models import Booking, OfferWavePlan, Order
+
+
+class Command(BaseCommand):
+    help = ("Бенчмарк волн оферов: одни и те же заказы и ответы переводчиков (принять, отказать, промолчать) "
+            "при рассылке всем сразу и волнами. Показывает оферов на заполненный заказ, отмененные оферы "
+            "и сколько раундов таймаута волн нужно до завершения")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=200)
+        parser.add_argument('--candidates', type=int, default=15, help='Выбранных переводчиков на заказ')
+        parser.add_argument('--interpreters', type=int, default=500)
+        parser.add_argument('--accept-rate', type=float, default=0.3)
+        parser.add_argument('--decline-rate', type=float, default=0.3, help='Остальные не отвечают (таймаут)')
+        parser.add_argument('--wave-size', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        from apps.services.offer_waves import OfferWaves
+
+        current_app.conf.task_always_eager = True
+
+        with FakeTelegramServer() as telegram, \
+                override_settings(TELEGRAM_API_SERVER=telegram.base_url, TELEGRAM_BOT_TOKEN='123456:bench',
+                                  OFFER_WAVE_SIZE=options['wave_size']), \
+                benchmark_database():
+            data = SyntheticData(seed=options['seed'])
+            data.load_reference_data()
+            interpreters = [str(interpreter.id) for interpreter in data.create_interpreters(options['interpreters'])]
+            client = data.create_clients(1)[0]
+
+            # Ответ каждого переводчика на каждый заказ одинаков в обоих режимах
+            scenarios = []
+            for _ in range(options['orders']):
+                candidates = data.random.sample(interpreters, options['candidates'])
+                responses = {}
+                for interpreter_id in candidates:
+                    roll = data.random.random()
+                    responses[interpreter_id] = (True if roll < options['accept_rate'] else
+                                                 False if roll < options['accept_rate'] + options['decline_rate'] else
+                                                 None)
+                scenarios.append((data.random.choice([1, 1, 2]), candidates, responses))
+
+            since = timezone.now()
+            timeout_rounds = {waves: self._run(client, scenarios, waves) for waves in (False, True)}
+            metrics = OfferWaves.metrics(since)
+
+        report = []
+        for mode, waves in (('broadcast', False), ('waves', True)):
+            report.append({'scenario': mode, **metrics[mode], 'timeout_rounds': timeout_rounds[waves]})
+        self.stdout.write(format_report(report))
+
+        broadcast, waves = metrics['broadcast'], metrics['waves']
+        if waves['offers_per_filled_order'] > broadcast['offers_per_filled_order']:
+            raise CommandError('Offer waves sent more offers per filled order than broadcast')
+        if waves['filled'] < broadcast['filled']:
+            raise CommandError('Offer waves filled fewer orders than broadcast with the same responses')
+
+    @staticmethod
+    def _run(client, scenarios: list, waves: bool) -> int:
+        """
+        Отправить оферы и проиграть ответы раундами
+
+        Раунд: каждый новый офер получает ответ переводчика (молчание - без ответа),
+        релей outbox выполняет задачи (отказ сразу открывает следующую волну),
+        затем истекает таймаут волны у незавершенных планов.
+
+        Returns:
+            Число раундов таймаута волн (ожиданий OFFER_WAVE_TIMEOUT_MINUTES)
+        """
+        from apps.services.offer_waves import OfferWaves
+        from apps.services.order_workflow import OrderWorkflowService
+        from apps.services.outbox import OutboxRelay
+
+        start = timezone.now() + timedelta(days=1)
+        orders, responses_by_order = {}, {}
+        for required, candidates, responses in scenarios:
+            order = Order.objects.create(
+                client=client, location_type=Order.LocationType.ONLINE, address='',
+                start_datetime=start, end_datetime=start + timedelta(hours=2),
+                status=Order.OrderStatus.NEW, interpreter_count=required, required_count=required,
+            )
+            OrderWorkflowService(order).send_offers(candidates, waves=waves)
+            orders[order.id], responses_by_order[order.id] = order, responses
+        OutboxRelay.drain()
+
+        answered = set()
+        timeouts = 0
+        while True:
+            offers = list(Booking.objects.filter(order_id__in=list(orders), status=Booking.Status.OFFERED,
+                                                 is_expired=False).exclude(id__in=answered)
+                          .values_list('id', 'order_id', 'interpreter_id'))
+            for booking_id, order_id, interpreter_id in offers:
+                answered.add(booking_id)
+                accepted = responses_by_order[order_id][str(interpreter_id)]
+                if accepted is not None:
+                    OrderWorkflowService(orders[order_id]).handle_interpreter_response(str(booking_id), accepted)
+            OutboxRelay.drain()
+
+            open_plans = list(OfferWavePlan.objects.filter(order_id__in=list(orders), finished_at__isnull=True)
+                              .values_list('order_id', 'waves_sent'))
+            if not open_plans:
+                return timeouts
+            for order_id, waves_sent in open_plans:
+                OfferWaves.dispatch(order_id, waves_sent + 1)
+            timeouts += 1
+            OutboxRelay.drain()
@@ -0,0 +1,145 @@
+import asyncio
+import time
+import tracemalloc
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client as HttpClient
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.benchmarks.generators import SyntheticData
+from apps.benchmarks.utils import benchmark_database, percentile
+from apps.models import Order
+from apps.services.order_events import OrderEvents, hub
+
+
+class StreamConnection:
+    """Одно SSE подключение к ASGI приложению в этом же процессе"""
+
+    def __init__(self, application, path: str, cookie: str, client_index: int):
+        self.scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+            'root_path': '', 'server': ('testserver', 80), 'client': ('127.0.0.1', 50000),
+            'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode())],
+        }
+        self.application = application
+        self.client_index = client_index
+        self.status = None
+        self.events = 0
+        self.received = asyncio.Event()
+        self.disconnect = asyncio.Event()
+        self._request_sent = False
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.application(self.scope, self._receive, self._send))
+
+    async def _receive(self):
+        if not self._request_sent:
+            self._request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def _send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+        elif message['type'] == 'http.response.body':
+            events = message.get('body', b'').count(b'\ndata: ')
+            if events:
+                self.events += events
+                self.received.set()
+
+
+class Command(BaseCommand):
+    help = ("Нагрузочный тест SSE потока статусов заказов: N подключений к /api/orders/stream/ в одном "
+            "процессе (ASGI). Показывает удерживаемые подключения, память на подключение (tracemalloc) "
+            "и задержку доставки событий через одну подписку Redis")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=1000)
+        parser.add_argument('--clients', type=int, default=100, help='Клиентов, между которыми делятся подключения')
+        parser.add_argument('--events', type=int, default=20, help='Опубликованных изменений заказов')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with override_settings(SSE_ENABLED=True), benchmark_database():
+            data = SyntheticData(seed=options['seed'])
+            clients = data.create_clients(options['clients'])
+            start = timezone.now() + timedelta(days=1)
+            orders = [
+                Order.objects.create(
+                    client=client, location_type=Order.LocationType.ONLINE, address='',
+                    start_datetime=start, end_datetime=start + timedelta(hours=2),
+                    status=Order.OrderStatus.SEARCHING, required_count=2,
+                )
+                for client in clients
+            ]
+            cookies = []
+            for client in clients:
+                http = HttpClient()
+                http.force_login(client)
+                cookies.append(f"{settings.SESSION_COOKIE_NAME}={http.cookies[settings.SESSION_COOKIE_NAME].value}")
+
+            report = asyncio.run(self._run(cookies, orders, options))
+
+        for key, value in report.items():
+            value = f"{value:.2f}" if isinstance(value, float) else value
+            self.stdout.write(f"  {key:<28} {value}")
+
+        if report['held_connections'] != options['connections']:
+            raise CommandError('Not every stream connection was held open')
+
+    async def _run(self, cookies: list, orders: list, options: dict) -> dict:
+        application = get_asgi_application()
+        count = options['connections']
+
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        connect_started = time.perf_counter()
+
+        connections = [
+            StreamConnection(application, '/api/orders/stream/', cookies[i % len(cookies)], i % len(cookies))
+            for i in range(count)
+        ]
+        for connection in connections:
+            connection.start()
+        # Снимок активных заказов - первое событие каждого потока
+        await asyncio.wait_for(asyncio.gather(*(connection.received.wait() for connection in connections)), 120)
+        connect_time = time.perf_counter() - connect_started
+
+        held, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        held_connections = hub.connections
+
+        # Изменения заказов: каждое должно дойти до всех подключений клиента через одну подписку
+        latencies = []
+        for i in range(options['events']):
+            # Заказ i принадлежит клиенту i: его слушают подключения с этим cookie
+            client_index = i % len(orders)
+            listeners = [connection for connection in connections if connection.client_index == client_index]
+            for connection in listeners:
+                connection.received.clear()
+            published = time.perf_counter()
+            await sync_to_async(OrderEvents.publish)(orders[client_index].id, 'bench')
+            await asyncio.wait_for(asyncio.gather(*(connection.received.wait() for connection in listeners)), 30)
+            latencies.append(time.perf_counter() - published)
+
+        for connection in connections:
+            connection.disconnect.set()
+        await asyncio.gather(*(connection.task for connection in connections), return_exceptions=True)
+
+        return {
+            'held_connections': held_connections,
+            'rejected_connections': sum(1 for connection in connections if connection.status != 200),
+            'connect_all_s': connect_time,
+            'memory_per_connection_kb': (held - baseline) / count / 1024,
+            'fanout_p50_ms': percentile(latencies, 50) * 1000,
+            'fanout_p95_ms': percentile(latencies, 95) * 1000,
+            'connections_after_close': hub.connections,
+        }
@@ -0,0 +1,131 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from celery import current_app
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client as HttpClient
+from django.test.utils import override_settings
+
+from apps.benchmarks.fake_telegram import FakeTelegramServer
+from apps.benchmarks.generators import SyntheticData
+from apps.benchmarks.utils import (ScenarioStats, benchmark_database,
+                                   format_report)
+
+# Пороги регрессии по этапам: превышение любого значения завершает команду с ошибкой
+DEFAULT_THRESHOLDS = {
+    'order_create': {'p95_ms': 1500, 'queries_per_call': 60},
+    'send_offers': {'p95_ms': 3000, 'queries_per_offer': 20},
+    'interpreter_response': {'p95_ms': 1000, 'queries_per_call': 40, 'lock_wait_p95_ms': 500},
+}
+
+
+class Command(BaseCommand):
+    help = ("Нагрузочный тест workflow заказа: OrderCreateView -> create_and_search -> send_offers -> "
+            "ответ переводчика (handle_interpreter_response) на отдельной тестовой БД")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interpreters', type=int, default=500)
+        parser.add_argument('--clients', type=int, default=20)
+        parser.add_argument('--orders', type=int, default=100)
+        parser.add_argument('--days', type=int, default=30, help='Горизонт заказов и доступности в днях')
+        parser.add_argument('--offers', type=int, default=10, help='Оферов на заказ')
+        parser.add_argument('--concurrency', type=int, default=8, help='Параллельных ответов на заказ')
+        parser.add_argument('--telegram-latency-ms', type=float, default=0)
+        parser.add_argument('--thresholds', help='JSON файл с порогами регрессии (по умолчанию DEFAULT_THRESHOLDS)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        thresholds = DEFAULT_THRESHOLDS
+        if options['thresholds']:
+            with open(options['thresholds']) as f:
+                thresholds = json.load(f)
+
+        # Задачи Celery выполняются синхронно в вызывающем потоке
+        current_app.conf.task_always_eager = True
+
+        with FakeTelegramServer(latency_ms=options['telegram_latency_ms']) as telegram, \
+                override_settings(TELEGRAM_API_SERVER=telegram.base_url, TELEGRAM_BOT_TOKEN='123456:bench'), \
+                benchmark_database():
+            data = SyntheticData(seed=options['seed'])
+            data.load_reference_data()
+            interpreters = data.create_interpreters(options['interpreters'])
+            busy_count = data.create_availabilities(interpreters, days=options['days'])
+            clients = data.create_clients(options['clients'])
+            self.stdout.write(f"Seeded {len(interpreters)} interpreters, {busy_count} busy slots, "
+                              f"{len(clients)} clients")
+
+            summaries = self._run(data, clients, options)
+
+        self.stdout.write(format_report(summaries))
+        self.stdout.write(f"telegram calls: {dict(telegram.calls)}")
+
+        failures = self._check_thresholds(summaries, thresholds)
+        if failures:
+            raise CommandError('Regression thresholds exceeded:\n' + '\n'.join(failures))
+
+    def _run(self, data: SyntheticData, clients: list, options: dict) -> list:
+        from apps.models import Booking
+        from apps.services.outbox import OutboxRelay
+
+        http = HttpClient()
+        order_create = ScenarioStats('order_create', unit='calls')
+        send_offers = ScenarioStats('send_offers', unit='offers')
+        responses = ScenarioStats('interpreter_response', unit='calls')
+
+        for i in range(options['orders']):
+            http.force_login(clients[i % len(clients)])
+
+            with order_create.measure() as sample:
+                response = http.post('/api/orders/create/', data=data.order_payload(options['days']),
+                                     content_type='application/json')
+                sample.error = response.status_code != 200
+            if sample.error:
+                continue
+
+            result = response.json()
+            candidate_ids = [item['id'] for item in result['interpreters']][:options['offers']]
+            if not candidate_ids:
+                continue
+
+            with send_offers.measure() as sample:
+                response = http.post(f"/api/orders/{result['order_id']}/send-offers/",
+                                     data={'interpreter_ids': candidate_ids, 'waves': False},
+                                     content_type='application/json')
+                sample.items = len(candidate_ids)
+                sample.error = response.status_code != 200
+                # Оферы уходят в Telegram через outbox: релей выполняет задачи синхронно (eager)
+                OutboxRelay.drain()
+
+            # Все получившие офер отвечают одновременно: большинство принимает
+            booking_ids = Booking.objects.filter(order_id=result['order_id']).values_list('id', flat=True)
+            answers = [(booking_id, data.random.random() < 0.8) for booking_id in booking_ids]
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                list(pool.map(lambda answer: self._respond(responses, *answer), answers))
+            OutboxRelay.drain()
+
+        return [stats.summary() for stats in (order_create, send_offers, responses)]
+
+    def _respond(self, stats: ScenarioStats, booking_id, accepted: bool):
+        """Ответ переводчика так, как его обрабатывает Telegram callback"""
+        from apps.models import Booking
+        from apps.services.order_workflow import OrderWorkflowService
+
+        try:
+            with stats.measure():
+                booking = Booking.objects.select_related('order').get(id=booking_id)
+                OrderWorkflowService(booking.order).handle_interpreter_response(str(booking_id), accepted)
+        except Exception as e:
+            self.stderr.write(f"Response for booking {booking_id} failed: {e}")
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _check_thresholds(summaries: list, thresholds: dict) -> list:
+        failures = []
+        for summary in summaries:
+            for metric, limit in thresholds.get(summary['scenario'], {}).items():
+                value = summary.get(metric)
+                if value is not None and value > limit:
+                    failures.append(f"{summary['scenario']}.{metric} = {value:.2f} > {limit}")
+        return failures
@@ -0,0 +1,79 @@
+import time
+from datetime import timedelta
+
+from celery import current_app
+from celery.signals import after_task_publish
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.benchmarks.generators import SyntheticData
+from apps.benchmarks.utils import benchmark_database
+from apps.models import Booking, Order, OutboxMessage
+
+
+class Command(BaseCommand):
+    help = ("Бенчмарк transactional outbox: оферы и ответы переводчиков пишутся в outbox, затем релей "
+            "публикует их по одному сообщению (как прежний .delay()) и с группировкой. "
+            "Показывает число обращений к брокеру (in-memory транспорт) и скорость релея")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=200)
+        parser.add_argument('--offers', type=int, default=20, help='Оферов на заказ')
+        parser.add_argument('--interpreters', type=int, default=200)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        from apps.services.order_workflow import OrderWorkflowService
+        from apps.services.outbox import OutboxRelay
+
+        # Публикация в брокер без внешнего Redis: счетчик after_task_publish видит каждый вызов
+        current_app.conf.update(task_always_eager=False, broker_url='memory://',
+                                result_backend='cache+memory://', task_ignore_result=True)
+        broker_calls = []
+        after_task_publish.connect(lambda **kwargs: broker_calls.append(1), weak=False)
+
+        rows = []
+        with benchmark_database():
+            data = SyntheticData(seed=options['seed'])
+            data.load_reference_data()
+            interpreters = data.create_interpreters(options['interpreters'])
+            interpreter_ids = [str(interpreter.id) for interpreter in interpreters]
+            client = data.create_clients(1)[0]
+
+            for mode, group in (('per_message', False), ('grouped', True)):
+                OutboxMessage.objects.all().delete()
+
+                enqueue_started = time.perf_counter()
+                for _ in range(options['orders']):
+                    start = timezone.now() + timedelta(days=1)
+                    order = Order.objects.create(
+                        client=client, location_type=Order.LocationType.ONLINE, address='',
+                        start_datetime=start, end_datetime=start + timedelta(hours=2),
+                        status=Order.OrderStatus.NEW, required_count=1,
+                    )
+                    workflow = OrderWorkflowService(order)
+                    workflow.send_offers(data.random.sample(interpreter_ids, options['offers']), waves=False)
+                    booking_id = Booking.objects.filter(order=order).values_list('id', flat=True).first()
+                    workflow.handle_interpreter_response(str(booking_id), True)
+                enqueue_time = time.perf_counter() - enqueue_started
+
+                broker_calls.clear()
+                relay_started = time.perf_counter()
+                result = OutboxRelay.drain(options['batch_size'], group=group)
+                relay_time = time.perf_counter() - relay_started
+
+                if result['failed'] or len(broker_calls) != result['broker_calls']:
+                    raise CommandError(f"{mode}: relay failed or publish count mismatch: {result}")
+                rows.append((mode, result['messages'], len(broker_calls), enqueue_time, relay_time))
+
+        for mode, messages, calls, enqueue_time, relay_time in rows:
+            self.stdout.write(mode)
+            self.stdout.write(f"  {'messages':<24} {messages}")
+            self.stdout.write(f"  {'broker_calls':<24} {calls}")
+            self.stdout.write(f"  {'messages_per_call':<24} {messages / calls if calls else 0.0:.2f}")
+            self.stdout.write(f"  {'enqueue_s':<24} {enqueue_time:.2f}")
+            self.stdout.write(f"  {'relay_messages_per_sec':<24} {messages / relay_time if relay_time else 0.0:.2f}")
+        baseline, grouped = rows[0][2], rows[1][2]
+        if baseline:
+            self.stdout.write(f"broker call reduction: {100 * (1 - grouped / baseline):.1f}%")
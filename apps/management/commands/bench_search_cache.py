@@ -0,0 +1,123 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from apps.benchmarks.generators import SyntheticData
+from apps.benchmarks.utils import (ScenarioStats, benchmark_database,
+                                   format_report)
+from apps.models import Availability, Order
+from apps.services.search_cache import SearchResultCache
+
+
+class Command(BaseCommand):
+    help = ("Бенчмарк кэша результатов поиска: полный поиск против попадания в кэш для повторных заказов, "
+            "затем занятость части найденных переводчиков меняется, и проверяется, что сброшены только "
+            "затронутые записи и результаты из кэша совпадают с поиском без кэша")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interpreters', type=int, default=10000)
+        parser.add_argument('--orders', type=int, default=300)
+        parser.add_argument('--days', type=int, default=30, help='Горизонт заказов и занятости')
+        parser.add_argument('--changes', type=int, default=20, help='Переводчиков, занятых в окне заказа')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with override_settings(SEARCH_CACHE_ENABLED=True), benchmark_database():
+            data = SyntheticData(seed=options['seed'])
+            data.load_reference_data()
+            with transaction.atomic():
+                interpreters = data.create_interpreters(options['interpreters'])
+            data.create_availabilities(interpreters, days=options['days'])
+            client = data.create_clients(1)[0]
+            orders = [self._create_order(data, client, options['days']) for _ in range(options['orders'])]
+            self.stdout.write(f"Seeded {len(interpreters)} interpreters and {len(orders)} orders")
+
+            SearchResultCache.reset_stats()
+            uncached = ScenarioStats('search_without_cache', unit='searches')
+            cold = ScenarioStats('search_cache_miss', unit='searches')
+            warm = ScenarioStats('search_cache_hit', unit='searches')
+            results = {}
+            for order in orders:
+                with override_settings(SEARCH_CACHE_ENABLED=False), uncached.measure():
+                    expected = self._search(order)
+                with cold.measure():
+                    self._search(order)
+                with warm.measure():
+                    results[order.id] = self._search(order)
+                if results[order.id] != expected:
+                    raise CommandError(f"Cached search differs from uncached search for order {order.id}")
+            warm_stats = SearchResultCache.stats()
+
+            changed_orders = self._change_availability(data, orders, results, options['changes'])
+            SearchResultCache.reset_stats()
+            mismatches = 0
+            for order in orders:
+                with override_settings(SEARCH_CACHE_ENABLED=False):
+                    expected = self._search(order)
+                mismatches += self._search(order) != expected
+            after_change = SearchResultCache.stats()
+
+        report = [uncached.summary(), cold.summary(), warm.summary(), {
+            'scenario': 'cache_counters',
+            'hit_rate_repeat': warm_stats['hit_rate'],
+            'orders_changed': len(changed_orders),
+            'stale_after_change': after_change['stale'],
+            'hits_after_change': after_change['hits'],
+            'avg_hit_age_s': after_change['avg_hit_age_s'],
+        }]
+        self.stdout.write(format_report(report))
+
+        if mismatches:
+            raise CommandError(f"{mismatches} searches returned stale results after availability changes")
+        if after_change['stale'] < len(changed_orders):
+            raise CommandError('Availability change did not invalidate every affected search')
+
+    @staticmethod
+    def _create_order(data: SyntheticData, client, days: int) -> Order:
+        payload = data.order_payload(days)
+        order = Order.objects.create(
+            client=client,
+            location_type=payload['event_type'], city_id=payload['city'], address=payload['address'],
+            selected_slots=payload['selected_slots'],
+            start_datetime=payload['start_datetime'], end_datetime=payload['end_datetime'],
+            status=Order.OrderStatus.NEW,
+        )
+        order.language_pairs.set(payload['language_pairs'])
+        order.translation_types.set(payload['translation_types'])
+        # Даты из строк payload: поиск читает их как datetime
+        order.start_datetime = datetime.fromisoformat(payload['start_datetime'])
+        order.end_datetime = datetime.fromisoformat(payload['end_datetime'])
+        return order
+
+    @staticmethod
+    def _search(order: Order) -> set:
+        from apps.services.interpreter_search import InterpreterSearchService
+
+        return set(InterpreterSearchService(order).find_available_interpreters().values_list('interpreter_id',
+                                                                                             flat=True))
+
+    @staticmethod
+    def _change_availability(data: SyntheticData, orders: list, results: dict, count: int) -> set:
+        """
+        Занять найденных переводчиков в окне случайных заказов (сигналы сбрасывают кэш после коммита)
+
+        Returns:
+            ID заказов, результат которых изменился
+        """
+        changed = []
+        for order in data.random.sample(orders, min(count, len(orders))):
+            if not results[order.id]:
+                continue
+            interpreter_id = data.random.choice(sorted(results[order.id]))
+            Availability.objects.create(translator_id=interpreter_id, start_datetime=order.start_datetime,
+                                        end_datetime=order.end_datetime, type=Availability.AvailabilityType.BUSY)
+            changed.append((interpreter_id, order.start_datetime, order.end_datetime))
+
+        # Изменившиеся результаты: переводчик найден в заказе, пересекающемся с новой занятостью
+        return {
+            order.id for order in orders
+            if any(interpreter_id in results[order.id] and start < order.end_datetime and end > order.start_datetime
+                   for interpreter_id, start, end in changed)
+        }
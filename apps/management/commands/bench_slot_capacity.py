@@ -0,0 +1,112 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.benchmarks.generators import SyntheticData
+from apps.benchmarks.utils import (ScenarioStats, benchmark_database,
+                                   format_report)
+from apps.models import Availability, Order, SlotCapacity
+
+
+class Command(BaseCommand):
+    help = ("Бенчмарк куба свободных слотов: полный пересчет, инкрементальный пересчет после изменения "
+            "занятости и ответ календаря из куба против поиска по каждой ячейке. Проверяет, что online "
+            "ячейки совпадают с InterpreterSearchService, а инкрементальный куб - с полным пересчетом")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interpreters', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=31, help='Горизонт занятости и куба')
+        parser.add_argument('--cells', type=int, default=100, help='Ячеек календаря для сравнения с поиском')
+        parser.add_argument('--changes', type=int, default=200, help='Переводчиков с новой занятостью')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        from apps.services.slot_capacity import (ONLINE_SCOPE, PERIODS,
+                                                 SlotCapacityCube)
+
+        with override_settings(SLOT_CAPACITY_DAYS=options['days'], SEARCH_CACHE_ENABLED=False), \
+                benchmark_database():
+            data = SyntheticData(seed=options['seed'])
+            data.load_reference_data()
+            with transaction.atomic():
+                interpreters = data.create_interpreters(options['interpreters'])
+            records = data.create_availabilities(interpreters, days=options['days'])
+            client = data.create_clients(1)[0]
+            self.stdout.write(f"Seeded {len(interpreters)} interpreters, {records} busy records")
+
+            rebuild = SlotCapacityCube.run(full=True)
+
+            today = timezone.localdate()
+            search = ScenarioStats('search_per_cell', unit='cells')
+            cube = ScenarioStats('cube_calendar', unit='calendars')
+            mismatches = 0
+            for _ in range(options['cells']):
+                day = today + timedelta(days=data.random.randrange(options['days']))
+                period = data.random.choice(PERIODS)
+                pair = data.random.choice(data.language_pairs)
+                translation_type = data.random.choice(data.translation_types)
+                with search.measure():
+                    expected = self._search_count(client, pair, translation_type, day, period)
+                with cube.measure():
+                    calendar = SlotCapacityCube.counts(ONLINE_SCOPE, [str(pair.pk)], str(translation_type.pk),
+                                                       today, today + timedelta(days=options['days'] - 1))
+                mismatches += calendar[day.isoformat()][period] != expected
+
+            changed = data.random.sample(interpreters, min(options['changes'], len(interpreters)))
+            for interpreter in changed:
+                day = today + timedelta(days=data.random.randrange(options['days']))
+                start, end = data._slot_bounds(day, data.random.choice(PERIODS))
+                # Сигналы помечают вклад переводчика, как при синхронизации календаря
+                Availability.objects.create(translator=interpreter, start_datetime=start, end_datetime=end,
+                                            type=Availability.AvailabilityType.BUSY)
+
+            started = time.perf_counter()
+            incremental = SlotCapacityCube.run()
+            incremental_time = time.perf_counter() - started
+            after_incremental = self._cube()
+            SlotCapacityCube.run(full=True)
+            stale_rows = len(set(after_incremental.items()) ^ set(self._cube().items()))
+
+        report = [search.summary(), cube.summary(), {
+            'scenario': 'cube_refresh',
+            'rebuild_s': rebuild['elapsed_s'],
+            'rows': rebuild['rows'],
+            'incremental_interpreters': incremental['interpreters'],
+            'incremental_ms': incremental_time * 1000,
+            'stale_rows': stale_rows,
+        }]
+        self.stdout.write(format_report(report))
+
+        if mismatches:
+            raise CommandError(f"Cube and search disagree for {mismatches} online cells")
+        if incremental.get('mode') != 'incremental':
+            raise CommandError('Availability changes triggered a full rebuild instead of an incremental one')
+        if stale_rows:
+            raise CommandError(f"Incremental cube differs from a full rebuild in {stale_rows} rows")
+
+    @staticmethod
+    def _search_count(client, pair, translation_type, day, period) -> int:
+        """Свободные переводчики ячейки поиском по online заказу на один слот"""
+        from apps.services.interpreter_search import InterpreterSearchService
+
+        start, end = SyntheticData._slot_bounds(day, period)
+        order = Order.objects.create(client=client, location_type=Order.LocationType.ONLINE, address='',
+                                     selected_slots=[f"{day.isoformat()}-{period}"],
+                                     start_datetime=start, end_datetime=end, status=Order.OrderStatus.NEW)
+        order.language_pairs.set([pair])
+        order.translation_types.set([translation_type])
+        return InterpreterSearchService(order).find_available_interpreters().count()
+
+    @staticmethod
+    def _cube() -> dict:
+        """Непустые строки куба"""
+        return {
+            (group_key, day): (morning, evening)
+            for group_key, day, morning, evening in SlotCapacity.objects.values_list(
+                'group_key', 'date', 'morning', 'evening')
+            if morning or evening
+        }
@@ -0,0 +1,93 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.benchmarks.utils import (ScenarioStats, benchmark_database,
+                                   format_report)
+from apps.models.base import uuid7
+
+# Таблица повторяет колонки и индексы apps_booking, но без внешних ключей,
+# чтобы измерять только влияние порядка первичного ключа
+TABLE_SQL = """
+CREATE TABLE {table} (
+    id uuid PRIMARY KEY,
+    order_id uuid NOT NULL,
+    interpreter_id uuid NOT NULL,
+    status varchar(20) NOT NULL,
+    rate numeric(10, 2) NOT NULL,
+    offered_at timestamptz NOT NULL,
+    created_at timestamptz NOT NULL,
+    updated_at timestamptz NOT NULL
+)
+"""
+
+INSERT_SQL = """
+INSERT INTO {table} (id, order_id, interpreter_id, status, rate, offered_at, created_at, updated_at)
+SELECT {key_function}, gen_random_uuid(), gen_random_uuid(), 'offered', 0, now(), now(), now()
+FROM generate_series(1, %s)
+"""
+
+KEY_FUNCTIONS = {
+    'uuid4': 'gen_random_uuid()',
+    'uuid7': 'uuid_generate_v7()',
+}
+
+
+class Command(BaseCommand):
+    help = ("Бенчмарк первичных ключей: вставка N бронирований с uuid4 и uuid7 (DB default), "
+            "пропускная способность по пачкам и размер таблицы и PK индекса")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000)
+        parser.add_argument('--batch-size', type=int, default=100_000)
+        parser.add_argument('--python-keys', type=int, default=1_000_000,
+                            help='Сколько ключей сгенерировать в Python для сравнения uuid.uuid4 и uuid7')
+
+    def handle(self, *args, **options):
+        summaries = [self._python_keys('python_uuid4', uuid.uuid4, options['python_keys']),
+                     self._python_keys('python_uuid7', uuid7, options['python_keys'])]
+
+        # benchmark_database прогоняет миграции, а с ними pre_migrate создает uuid_generate_v7()
+        with benchmark_database():
+            for name, key_function in KEY_FUNCTIONS.items():
+                summary = self._insert(name, key_function, options['rows'], options['batch_size'])
+                summaries.append(summary)
+                self.stdout.write(f"{name}: table {summary['table_mb']:.1f} MB, "
+                                  f"pk index {summary['pk_index_mb']:.1f} MB")
+
+        self.stdout.write(format_report(summaries))
+
+    @staticmethod
+    def _python_keys(name: str, generate, count: int) -> dict:
+        started = time.perf_counter()
+        for _ in range(count):
+            generate()
+        elapsed = time.perf_counter() - started
+        return {'scenario': name, 'keys': count, 'keys_per_sec': count / elapsed if elapsed else 0.0}
+
+    @staticmethod
+    def _insert(name: str, key_function: str, rows: int, batch_size: int) -> dict:
+        table = f"bench_booking_{name}"
+        stats = ScenarioStats(f"insert_{name}", unit='rows')
+
+        with connection.cursor() as cursor:
+            cursor.execute(TABLE_SQL.format(table=table))
+
+            inserted = 0
+            while inserted < rows:
+                count = min(batch_size, rows - inserted)
+                with stats.measure() as sample:
+                    cursor.execute(INSERT_SQL.format(table=table, key_function=key_function), [count])
+                    sample.items = count
+                inserted += count
+
+            cursor.execute(f"ANALYZE {table}")
+            cursor.execute("SELECT pg_relation_size(%s), pg_relation_size(%s)", [table, f"{table}_pkey"])
+            table_size, index_size = cursor.fetchone()
+
+        summary = stats.summary()
+        summary['table_mb'] = table_size / 2 ** 20
+        summary['pk_index_mb'] = index_size / 2 ** 20
+        return summary
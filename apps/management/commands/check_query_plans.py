@@ -0,0 +1,180 @@
+import json
+import random
+from datetime import timedelta
+
+from celery import current_app
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.benchmarks.fake_telegram import FakeTelegramServer
+from apps.benchmarks.generators import SyntheticData
+from apps.benchmarks.plans import (StatementCapture, explain, seq_scans,
+                                   table_rows)
+from apps.benchmarks.utils import benchmark_database, rollback_after
+from apps.models import Booking, GoogleCalendarWebhookChannel, Order
+
+
+class Command(BaseCommand):
+    help = ("Проверка планов горячих запросов: на засеянной тестовой БД выполняет реальные вызовы сервисов и задач, "
+            "строит EXPLAIN (FORMAT JSON) для каждого SQL и падает, если последовательное сканирование большой "
+            "таблицы возвращает лишь малую долю ее строк (признак отсутствующего индекса)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interpreters', type=int, default=3000)
+        parser.add_argument('--orders', type=int, default=2000)
+        parser.add_argument('--offers', type=int, default=10, help='Оферов на заказ')
+        parser.add_argument('--days', type=int, default=60)
+        parser.add_argument('--min-rows', type=int, default=2000,
+                            help='Таблицы меньше этого размера можно сканировать последовательно')
+        parser.add_argument('--max-fraction', type=float, default=0.05,
+                            help='Seq Scan допустим, если возвращает больше этой доли строк таблицы')
+        parser.add_argument('--verbose-plans', action='store_true', help='Печатать планы всех запросов')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        current_app.conf.task_always_eager = True
+
+        with FakeTelegramServer() as telegram, \
+                override_settings(TELEGRAM_API_SERVER=telegram.base_url, TELEGRAM_BOT_TOKEN='123456:bench',
+                                  SEARCH_CACHE_ENABLED=False), \
+                benchmark_database():
+            seeded = self._seed(options)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            rows = table_rows()
+
+            failures = []
+            for name, scenario in self._scenarios(seeded):
+                capture = StatementCapture()
+                with rollback_after(), connection.execute_wrapper(capture):
+                    scenario()
+
+                for sql, params in capture.statements.items():
+                    plan = explain(sql, params)
+                    if options['verbose_plans']:
+                        self.stdout.write(f"[{name}] {sql}\n{json.dumps(plan, indent=2)}")
+                    for table, returned in seq_scans(plan):
+                        total = rows.get(table, 0)
+                        if total >= options['min_rows'] and returned <= total * options['max_fraction']:
+                            failures.append(f"[{name}] Seq Scan on {table} ({returned:.0f} of {total:.0f} rows): "
+                                            f"{sql[:300]}")
+
+                self.stdout.write(f"{name}: {len(capture.statements)} statements checked")
+
+        if failures:
+            raise CommandError('Sequential scans on hot paths:\n' + '\n'.join(failures))
+        self.stdout.write('No unexpected sequential scans')
+
+    def _seed(self, options: dict) -> dict:
+        data = SyntheticData(seed=options['seed'])
+        data.load_reference_data()
+        interpreters = data.create_interpreters(options['interpreters'])
+        data.create_availabilities(interpreters, days=options['days'])
+        clients = data.create_clients(20)
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+
+        orders = Order.objects.bulk_create([
+            Order(
+                client=rng.choice(clients),
+                location_type=Order.LocationType.ONLINE,
+                address='',
+                start_datetime=now + timedelta(days=rng.randint(1, options['days'] - 1)),
+                end_datetime=now + timedelta(days=options['days']),
+                status=Order.OrderStatus.SEARCHING,
+                required_count=2,
+            )
+            for _ in range(options['orders'])
+        ])
+        Booking.objects.bulk_create([
+            Booking(
+                order=order,
+                interpreter=interpreter,
+                rate=0,
+                status=rng.choice([Booking.Status.OFFERED, Booking.Status.DECLINED, Booking.Status.EXPIRED]),
+                offer_expires_at=now + timedelta(hours=rng.randint(-72, 3)),
+            )
+            for order in orders
+            for interpreter in rng.sample(interpreters, options['offers'])
+        ], batch_size=5000)
+        GoogleCalendarWebhookChannel.objects.bulk_create([
+            GoogleCalendarWebhookChannel(
+                interpreter=interpreter,
+                channel_id=f"plan-check-{interpreter.pk}-{i}",
+                resource_id='plan-check',
+                resource_uri='',
+                # Истекают не раньше чем через 2 дня, чтобы renew_expiring_channels не ходил в Google
+                expiration=now + timedelta(days=rng.randint(2, 7)),
+                is_active=i == 0,
+            )
+            for interpreter in interpreters
+            for i in range(3)
+        ], batch_size=5000)
+
+        search_order = Order.objects.create(
+            client=clients[0],
+            location_type=Order.LocationType.ONSITE,
+            city=data.cities[0],
+            address='Plan check street 1',
+            start_datetime=now + timedelta(days=1),
+            end_datetime=now + timedelta(days=1, hours=4),
+            status=Order.OrderStatus.NEW,
+        )
+        search_order.languages.set(data.languages[:2])
+        search_order.translation_types.set(data.translation_types[:1])
+
+        pair_order = Order.objects.create(
+            client=clients[0],
+            location_type=Order.LocationType.ONLINE,
+            address='',
+            start_datetime=now + timedelta(days=1),
+            end_datetime=now + timedelta(days=1, hours=4),
+            status=Order.OrderStatus.NEW,
+        )
+        pair_order.language_pairs.set(data.language_pairs[:2])
+        pair_order.translation_types.set(data.translation_types[:2])
+
+        return {
+            'search_order': search_order,
+            'pair_order': pair_order,
+            'order': orders[0],
+            'booking': Booking.objects.filter(order=orders[0]).first(),
+            'interpreter': interpreters[0],
+        }
+
+    @staticmethod
+    def _scenarios(seeded: dict) -> list:
+        """Реальные вызовы сервисов и задач горячего пути"""
+        from apps.services.calendar_status import CalendarStatusCache
+        from apps.services.google_calendar import GoogleCalendarService
+        from apps.services.interpreter_search import InterpreterSearchService
+        from apps.services.order_workflow import OrderWorkflowService
+        from apps.services.search_results import \
+            InterpreterSearchResultSerializer
+        from apps.tasks.calendar_tasks import (prune_old_availability,
+                                               renew_expiring_channels)
+        from apps.tasks.telegram_tasks import (expire_order_offers,
+                                               notify_other_interpreters)
+
+        search_order, order, booking, interpreter = (
+            seeded['search_order'], seeded['order'], seeded['booking'], seeded['interpreter']
+        )
+
+        def search(target_order):
+            queryset = InterpreterSearchService(target_order).find_available_interpreters()
+            InterpreterSearchResultSerializer(target_order.id, queryset).page()
+
+        return [
+            ('search', lambda: search(search_order)),
+            ('search_language_pairs', lambda: search(seeded['pair_order'])),
+            ('interpreter_response',
+             lambda: OrderWorkflowService(order).handle_interpreter_response(str(booking.id), True)),
+            ('expire_order_offers', lambda: expire_order_offers(str(order.id))),
+            ('notify_other_interpreters', lambda: notify_other_interpreters(str(order.id), str(booking.id))),
+            ('calendar_status', lambda: CalendarStatusCache._build_status(interpreter.id)),
+            ('sync_calendar', lambda: GoogleCalendarService(interpreter).sync_calendar()),
+            ('renew_expiring_channels', renew_expiring_channels),
+            ('prune_old_availability', prune_old_availability),
+        ]
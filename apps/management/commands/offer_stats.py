@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.services.offer_waves import OfferWaves
+
+
+class Command(BaseCommand):
+    help = "Оферы на заполненный заказ за период: рассылка волнами против рассылки всем выбранным сразу"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Заказы, созданные за последние N дней')
+
+    def handle(self, *args, **options):
+        metrics = OfferWaves.metrics(timezone.now() - timedelta(days=options['days']))
+        for mode, values in metrics.items():
+            self.stdout.write(f"{mode}:")
+            for key, value in values.items():
+                value = f"{value:.3f}" if isinstance(value, float) else value
+                self.stdout.write(f"  {key:<24} {value}")
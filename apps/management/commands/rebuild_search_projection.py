@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.models import InterpreterSearchProjection
+
+
+class Command(BaseCommand):
+    help = ("Пересчитать InterpreterSearchProjection для всех переводчиков "
+            "(первичное заполнение и восстановление после массовых изменений в обход сигналов)")
+
+    def handle(self, *args, **options):
+        count = InterpreterSearchProjection.rebuild()
+        self.stdout.write(f"Rebuilt search projection for {count} interpreters")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.services.slot_capacity import SlotCapacityCube
+
+
+class Command(BaseCommand):
+    help = ("Пересчитать куб свободных переводчиков по слотам страницы нового заказа: помеченных "
+            "переводчиков или (--full) весь куб")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Пересчитать весь куб')
+
+    def handle(self, *args, **options):
+        stats = SlotCapacityCube.run(full=options['full'])
+        for key, value in stats.items():
+            value = f"{value:.3f}" if isinstance(value, float) else value
+            self.stdout.write(f"  {key:<16} {value}")
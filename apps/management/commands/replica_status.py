@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.db_router import ReplicaLag, read_database, sticky_seconds
+
+
+class Command(BaseCommand):
+    help = "Состояние реплик для чтения: задержка, доступность и куда сейчас идут read-only запросы"
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASES:
+            self.stdout.write('No replicas configured (POSTGRES_REPLICAS is empty), all reads go to default')
+            return
+
+        for alias in settings.REPLICA_DATABASES:
+            lag = ReplicaLag.get(alias)
+            database = settings.DATABASES[alias]
+            state = 'unavailable' if lag == float('inf') else (
+                'healthy' if lag <= settings.REPLICA_MAX_LAG_SECONDS else 'lagging')
+            self.stdout.write(f"{alias} ({database['HOST']}:{database['PORT']}): lag {lag:.2f}s, {state}")
+
+        self.stdout.write(f"read_database() -> {read_database()}")
+        self.stdout.write(f"sticky window after write: {sticky_seconds()}s")
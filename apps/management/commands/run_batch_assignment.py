@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.services.batch_assignment import BatchAssignmentService
+
+
+class Command(BaseCommand):
+    help = ("Пакетное назначение переводчиков на ожидающие заказы: задача о назначениях минимальной "
+            "стоимости по кандидатам InterpreterSearchService и адресные оферы")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Только решить назначение, оферы не отправлять')
+        parser.add_argument('--limit', type=int, default=None, help='Максимум заказов')
+
+    def handle(self, *args, **options):
+        stats = BatchAssignmentService.run(dry_run=options['dry_run'], limit=options['limit'])
+        for key, value in stats.items():
+            value = f"{value:.3f}" if isinstance(value, float) else value
+            self.stdout.write(f"  {key:<16} {value}")
@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.services.outbox import OutboxRelay
+
+
+class Command(BaseCommand):
+    help = ("Релей transactional outbox: публикует сообщения OutboxMessage в брокер Celery пачками "
+            "(FOR UPDATE SKIP LOCKED, можно запускать несколько экземпляров)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Опубликовать готовые сообщения и выйти')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--interval', type=float, default=None, help='Пауза опроса в секундах')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] if options['interval'] is not None else settings.OUTBOX_POLL_INTERVAL
+
+        while True:
+            result = OutboxRelay.drain(options['batch_size'])
+            if result['messages']:
+                self.stdout.write(f"Relayed {result['messages']} messages in {result['broker_calls']} broker calls"
+                                  f" ({result['failed']} failed)")
+            if options['once']:
+                return
+
+            close_old_connections()
+            time.sleep(interval)
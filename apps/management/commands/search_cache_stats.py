@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.services.search_cache import SearchResultCache
+
+
+class Command(BaseCommand):
+    help = ("Счетчики кэша результатов поиска всех процессов: попадания, промахи, устаревшие записи "
+            "(сброшенные версиями) и средний возраст отданных из кэша результатов")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Обнулить счетчики после вывода')
+
+    def handle(self, *args, **options):
+        for key, value in SearchResultCache.stats().items():
+            value = f"{value:.3f}" if isinstance(value, float) else value
+            self.stdout.write(f"  {key:<16} {value}")
+        if options['reset']:
+            SearchResultCache.reset_stats()
@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.functional import SimpleLazyObject
+
+from apps import db_router, instrumentation
+from apps.authentication import SessionUserCache
+
+
+class InstrumentationMiddleware:
+    """
+    Opt-in сбор метрик по view: SQL запросы, дубликаты, время SQL, кэш, исходящий HTTP
+
+    Включается INSTRUMENTATION_ENABLED, доля запросов - INSTRUMENTATION_SAMPLE_RATE.
+    Для попавших в выборку запросов добавляет заголовок Server-Timing,
+    агрегаты доступны на /metrics/ в формате Prometheus.
+    """
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not instrumentation.is_sampled():
+            return self.get_response(request)
+
+        metrics, stack = instrumentation.start('view', request.path)
+        try:
+            response = self.get_response(request)
+        finally:
+            match = getattr(request, 'resolver_match', None)
+            instrumentation.stop(metrics, stack, name=match.view_name if match else 'unresolved')
+
+        response['Server-Timing'] = metrics.server_timing()
+        return response
+
+
+def get_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = SessionUserCache.resolve(request)
+    return request._cached_user
+
+
+class RoleAwareAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware с кэшем пользователя сессии в Redis
+
+    request.user загружается RoleAwareModelBackend вместе с Interpreter/Client
+    и кэшируется на сессию, так что проверки роли и доступ к подтипу
+    не стоят запросов к БД.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Прилипание к primary после записи
+
+    Если запрос писал в БД, клиент получает cookie на окно прилипания
+    (REPLICA_STICKY_SECONDS, но не меньше текущей задержки реплик), и пока
+    она жива, read_database() для его запросов возвращает primary.
+    """
+
+    COOKIE_NAME = 'db_primary'
+
+    def __init__(self, get_response):
+        if not settings.REPLICA_DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = db_router.begin_request(pinned=self.COOKIE_NAME in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = db_router.end_request(token)
+
+        if wrote:
+            response.set_cookie(self.COOKIE_NAME, '1', max_age=db_router.sticky_seconds(),
+                                httponly=True, samesite='Lax')
+        return response
@@ -1,6 +1,9 @@
 from apps.models.bookings import Booking
 from apps.models.cities import City, Country, Region
 from apps.models.google_calendar import GoogleCalendarCredentials, GoogleCalendarWebhookChannel
-from apps.models.interpreters import Availability, Language, LanguagePair, TranslationType
-from apps.models.orders import Order, OrderInterpreter
+from apps.models.interpreters import (Availability, InterpreterLanguagePair, Language, LanguagePair,
+                                      TranslationType)
+from apps.models.orders import OfferWavePlan, Order, OrderInterpreter
+from apps.models.outbox import OutboxMessage
+from apps.models.search import InterpreterSearchProjection, SlotCapacity, SlotCapacityInterpreter
 from apps.models.users import Client, Interpreter, User
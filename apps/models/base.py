@@ -1,3 +1,6 @@
+import secrets
+import threading
+import time
 import uuid
 
 from django.db.models import (CharField, DateTimeField, Func, Model,
@@ -15,6 +18,43 @@ class GenRandomUUID(Func):
     output_field = UUIDField()
 
 
+class GenUUIDv7(Func):
+    """
+    Represents uuid_generate_v7() (created in pre_migrate, see apps/signals.py).
+    """
+    function = "uuid_generate_v7"
+    template = "%(function)s()"  # no args
+    output_field = UUIDField()
+
+
+_uuid7_lock = threading.Lock()
+_uuid7_last = (0, 0)  # (unix_ts_ms, rand_a) последнего выданного ключа
+
+
+def uuid7() -> uuid.UUID:
+    """
+    UUID версии 7 (RFC 9562): 48 бит unix времени в мс, затем случайные биты
+
+    Ключи растут со временем, поэтому вставки попадают в правый край B-tree
+    индекса, а не на случайные страницы. Внутри одной миллисекунды порядок
+    сохраняет 12-битный счетчик в rand_a.
+    """
+    global _uuid7_last
+
+    with _uuid7_lock:
+        timestamp_ms = time.time_ns() // 1_000_000
+        last_ms, counter = _uuid7_last
+        if timestamp_ms > last_ms:
+            counter = secrets.randbits(11)  # старший бит - запас для инкрементов
+        else:
+            timestamp_ms, counter = last_ms, counter + 1
+            if counter > 0xFFF:
+                timestamp_ms, counter = last_ms + 1, secrets.randbits(11)
+        _uuid7_last = (timestamp_ms, counter)
+
+    return uuid.UUID(int=(timestamp_ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | secrets.randbits(62))
+
+
 class UUIDBaseModel(Model):
     id = UUIDField(primary_key=True, default=uuid.uuid4, db_default=GenRandomUUID(), editable=False)
 
@@ -31,6 +71,23 @@ class CreatedBaseModel(UUIDBaseModel):
         ordering = ('-created_at',)
 
 
+class TimeOrderedUUIDBaseModel(Model):
+    """UUIDv7 первичный ключ для таблиц с интенсивной вставкой"""
+    id = UUIDField(primary_key=True, default=uuid7, db_default=GenUUIDv7(), editable=False)
+
+    class Meta:
+        abstract = True
+
+
+class TimeOrderedCreatedBaseModel(TimeOrderedUUIDBaseModel):
+    updated_at = DateTimeField(auto_now=True)
+    created_at = DateTimeField(auto_now_add=True)
+
+    class Meta:
+        abstract = True
+        ordering = ('-created_at',)
+
+
 class SlugBasedModel(UUIDBaseModel):
     slug = SlugField(unique=True, editable=False)
 
@@ -1,15 +1,15 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db.models import (CASCADE, BooleanField, CharField, DateTimeField,
-                              DecimalField, ForeignKey,
-                              PositiveSmallIntegerField, TextChoices,
+                              DecimalField, ForeignKey, Index,
+                              PositiveSmallIntegerField, Q, TextChoices,
                               TextField)
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from apps.models.base import CreatedBaseModel
+from apps.models.base import CreatedBaseModel, TimeOrderedCreatedBaseModel
 
 
-class Booking(CreatedBaseModel):
+class Booking(TimeOrderedCreatedBaseModel):
     """Модель для взаимодействия между заказом и переводчиком"""
 
     class Status(TextChoices):
@@ -39,6 +39,13 @@ class Booking(CreatedBaseModel):
         verbose_name = _('Бронирование')
         verbose_name_plural = _('Бронирования')
         unique_together = ['order', 'interpreter']  # чтобы не было дубликатов предложений
+        indexes = [
+            # Оферы заказа по статусу: expire_order_offers, notify_other_interpreters, подсчет принятых
+            Index(fields=['order', 'status'], name='booking_order_status'),
+            # Неотвеченные оферы по сроку истечения
+            Index(fields=['offer_expires_at'], condition=Q(status='offered', is_expired=False),
+                  name='booking_pending_expiry'),
+        ]
 
     def __str__(self):
         return f"{self.interpreter} — {self.order} ({self.get_status_display()})"
@@ -1,4 +1,7 @@
-from django.db.models import CASCADE, CharField, ForeignKey
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models import CASCADE, CharField, FloatField, ForeignKey, Index
+from django.db.models.functions import Upper
+from location_field.models.plain import PlainLocationField
 
 from apps.models.base import UUIDBaseModel
 
@@ -21,9 +24,35 @@ class Region(UUIDBaseModel):
 class City(UUIDBaseModel):
     name = CharField(max_length=155)
     region = ForeignKey(Region, CASCADE, related_name='cities')
+    # Точка на карте в админке ("lat,lng"); для запросов разбирается в latitude/longitude
+    location = PlainLocationField(based_fields=['name'], zoom=9, blank=True, null=True)
+    latitude = FloatField(null=True, blank=True, editable=False)
+    longitude = FloatField(null=True, blank=True, editable=False)
 
     class Meta:
         unique_together = ('name', 'region')
+        indexes = [
+            # Для автодополнения: name__icontains/istartswith компилируются в UPPER(name) LIKE ...
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='city_name_upper_trgm'),
+            Index(fields=['latitude', 'longitude'], name='city_coordinates'),
+        ]
 
     def __str__(self):
         return f"{self.name}, {self.region.name}"
+
+    def save(self, *, force_insert=False, force_update=False, using=None, update_fields=None):
+        self.latitude, self.longitude = self.parse_location(self.location)
+        if update_fields is not None and 'location' in update_fields:
+            update_fields = {*update_fields, 'latitude', 'longitude'}
+        super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
+
+    @staticmethod
+    def parse_location(location):
+        """
+        "41.2995,69.2401" -> (41.2995, 69.2401); пустое или некорректное значение -> (None, None)
+        """
+        try:
+            latitude, longitude = (float(part) for part in (location or '').split(','))
+        except ValueError:
+            return None, None
+        return latitude, longitude
@@ -1,4 +1,4 @@
-from django.db.models import BooleanField, DateTimeField, ForeignKey, CASCADE, OneToOneField
+from django.db.models import BooleanField, DateTimeField, F, ForeignKey, CASCADE, Index, OneToOneField, Q
 from django.db.models.fields import CharField, TextField
 from django.utils.translation import gettext_lazy as _
 
@@ -22,6 +22,13 @@ class GoogleCalendarWebhookChannel(CreatedBaseModel):
         verbose_name = _('Google Calendar Webhook канал')
         verbose_name_plural = _('Google Calendar Webhook каналы')
         ordering = ['-created_at']
+        indexes = [
+            # renew_expiring_channels
+            Index(fields=['expiration'], condition=Q(is_active=True), name='channel_active_expiration'),
+            # CalendarStatusCache: ближайшее истечение активного канала переводчика
+            Index(F('interpreter'), F('expiration').desc(nulls_last=True), condition=Q(is_active=True),
+                  name='channel_active_interpreter'),
+        ]
 
     def __str__(self):
         return f"Канал {self.channel_id[:8]} для {self.interpreter}"
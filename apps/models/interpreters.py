@@ -1,13 +1,13 @@
 from django.core.exceptions import ValidationError
-from django.db.models import (BooleanField, DateTimeField,
+from django.db.models import (BooleanField, DateTimeField, Index, Q,
                               TextChoices, TextField)
-from django.db.models import CASCADE, CharField, ForeignKey
+from django.db.models import CASCADE, CharField, ForeignKey, ManyToManyField
 from django.utils.translation import gettext_lazy as _
 
-from apps.models.base import UUIDBaseModel, CreatedBaseModel
+from apps.models.base import TimeOrderedCreatedBaseModel, UUIDBaseModel
 
 
-class Availability(CreatedBaseModel):
+class Availability(TimeOrderedCreatedBaseModel):
     """Модель доступности переводчика"""
 
     class AvailabilityType(TextChoices):
@@ -31,6 +31,17 @@ class Availability(CreatedBaseModel):
         verbose_name = _('Доступность переводчика')
         verbose_name_plural = _('Доступности переводчиков')
         ordering = ['-start_datetime']
+        indexes = [
+            # NOT EXISTS в поиске: занятость переводчика в окне заказа, end_datetime без обращения к таблице
+            Index(fields=['translator', 'type', 'start_datetime'], include=['end_datetime'],
+                  name='availability_conflicts'),
+            # sync_calendar: последний sync token переводчика
+            Index(fields=['translator', '-last_synced_at'],
+                  condition=Q(is_google_calendar_event=True, google_sync_token__isnull=False),
+                  name='availability_sync_token'),
+            # prune_old_availability
+            Index(fields=['end_datetime'], name='availability_end'),
+        ]
 
     def __str__(self):
         return f"{self.translator} - {self.get_type_display()} ({self.start_datetime.date()})"
@@ -73,5 +84,26 @@ class LanguagePair(UUIDBaseModel):
         return f'{self.source} → {self.target}'
 
 
+class InterpreterLanguagePair(UUIDBaseModel):
+    """
+    Направление перевода переводчика (source → target) и типы перевода по нему
+
+    Ключи (пара, тип перевода) копируются в InterpreterSearchProjection.pair_type_keys:
+    поиск по парам заказа - пересечение списков GIN индекса, а не JOIN этой таблицы.
+    """
+
+    interpreter = ForeignKey('apps.Interpreter', CASCADE, related_name='language_pairs')
+    pair = ForeignKey('apps.LanguagePair', CASCADE, related_name='interpreter_pairs')
+    translation_types = ManyToManyField('apps.TranslationType', verbose_name=_('Translation Types'))
+
+    class Meta:
+        verbose_name = _('Language pair of interpreter')
+        verbose_name_plural = _('Language pairs of interpreters')
+        unique_together = ('interpreter', 'pair')
+
+    def __str__(self):
+        return f'{self.interpreter} - {self.pair}'
+
+
 class TranslationType(UUIDBaseModel):
     name = CharField(max_length=100)
@@ -1,14 +1,16 @@
+from django.contrib.postgres.fields import ArrayField
 from django.core.exceptions import ValidationError
 from django.db.models import (CASCADE, PROTECT, CharField, DateTimeField,
                               ForeignKey, JSONField, ManyToManyField,
+                              OneToOneField, PositiveIntegerField,
                               PositiveSmallIntegerField, TextChoices,
-                              TextField)
+                              TextField, UUIDField)
 from django.utils.translation import gettext_lazy as _
 
-from apps.models.base import CreatedBaseModel, UUIDBaseModel
+from apps.models.base import TimeOrderedCreatedBaseModel, UUIDBaseModel
 
 
-class Order(CreatedBaseModel):
+class Order(TimeOrderedCreatedBaseModel):
     """Модель заказа на перевод"""
 
     # ===== CHOICES =====
@@ -56,11 +58,21 @@ class Order(CreatedBaseModel):
     translation_types = ManyToManyField('apps.TranslationType', verbose_name=_("Translation Types"))
     interpreter_count = PositiveSmallIntegerField(default=1)
     languages = ManyToManyField('apps.Language', related_name='orders')
+    # Направления перевода; если заданы, поиск идет по ним, а не по languages
+    language_pairs = ManyToManyField('apps.LanguagePair', related_name='orders', blank=True)
     formality_level = CharField(max_length=20, choices=FormalityLevel.choices, default=FormalityLevel.BUSINESS)
     status = CharField(_('Статус заказа'), max_length=20, choices=OrderStatus.choices, default=OrderStatus.NEW)
     notes = TextField(blank=True)
 
     # Order Workflow Fields
+    required_count = PositiveSmallIntegerField(
+        _('Требуется переводчиков'), default=1,
+        help_text=_('Вычисляется при создании заказа (синхронный перевод требует 2 переводчиков)')
+    )
+    accepted_count = PositiveSmallIntegerField(
+        _('Принято оферов'), default=0,
+        help_text=_('Счетчик принятых оферов, увеличивается условным UPDATE')
+    )
     selected_slots = JSONField(
         _('Выбранные слоты'),
         null=True,
@@ -163,3 +175,26 @@ class OrderInterpreter(UUIDBaseModel):
 
     def __str__(self):
         return f"{self.interpreter} → Заказ #{str(self.order.id)[:8]}"
+
+
+class OfferWavePlan(TimeOrderedCreatedBaseModel):
+    """
+    Волны оферов заказа (apps/services/offer_waves.py)
+
+    Очередь кандидатов в порядке ранжирования; каждая волна отправляет следующим
+    wave_size переводчикам на свободное место, пока заказ не заполнится.
+    """
+
+    order = OneToOneField('apps.Order', CASCADE, related_name='offer_wave_plan', verbose_name=_('Заказ'))
+    queue = ArrayField(UUIDField(), default=list, verbose_name=_('Очередь кандидатов'))
+    wave_size = PositiveSmallIntegerField(_('Оферов в волне на место'), default=3)
+    waves_sent = PositiveSmallIntegerField(_('Отправлено волн'), default=0)
+    offers_sent = PositiveIntegerField(_('Отправлено оферов'), default=0)
+    finished_at = DateTimeField(_('Завершено'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Волны оферов')
+        verbose_name_plural = _('Волны оферов')
+
+    def __str__(self):
+        return f"Волна {self.waves_sent} заказа #{str(self.order_id)[:8]}"
@@ -0,0 +1,37 @@
+from django.db.models import (CharField, DateTimeField, Index, JSONField,
+                              PositiveSmallIntegerField, Q, TextField)
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from apps.models.base import TimeOrderedCreatedBaseModel
+
+
+class OutboxMessage(TimeOrderedCreatedBaseModel):
+    """
+    Исходящее сообщение (вызов задачи Celery), записанное в транзакции изменения состояния
+
+    Публикует в брокер OutboxRelay (apps/services/outbox.py) после коммита,
+    поэтому воркер никогда не увидит незакоммиченных строк. Доставка "хотя бы
+    один раз": задачи должны быть идемпотентны, дубли при записи отсекает dedup_key.
+    """
+
+    task = CharField(_('Задача'), max_length=255)
+    args = JSONField(_('Аргументы'), default=list)
+    kwargs = JSONField(_('Именованные аргументы'), default=dict)
+    dedup_key = CharField(_('Ключ дедупликации'), max_length=255, null=True, blank=True, unique=True)
+    available_at = DateTimeField(_('Отправить не раньше'), default=timezone.now)
+    attempts = PositiveSmallIntegerField(_('Попыток публикации'), default=0)
+    last_error = TextField(_('Последняя ошибка'), blank=True)
+    processed_at = DateTimeField(_('Опубликовано'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Сообщение outbox')
+        verbose_name_plural = _('Сообщения outbox')
+        indexes = [
+            # Очередь релея: только неопубликованные сообщения
+            Index(fields=['available_at'], condition=Q(processed_at__isnull=True), name='outbox_pending'),
+            Index(fields=['processed_at'], condition=Q(processed_at__isnull=False), name='outbox_processed'),
+        ]
+
+    def __str__(self):
+        return f"{self.task}{self.args}"
@@ -0,0 +1,235 @@
+from collections import defaultdict
+from itertools import chain
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.db.models import (CASCADE, SET_NULL, BinaryField, BooleanField,
+                              CharField, DateField, FloatField, ForeignKey,
+                              Index, IntegerField, Model, OneToOneField,
+                              PositiveIntegerField, PositiveSmallIntegerField,
+                              Q, UniqueConstraint, UUIDField)
+from django.utils.translation import gettext_lazy as _
+
+# Поля User/Interpreter, изменение которых требует пересчета проекции
+SEARCH_FIELDS = frozenset({'is_active', 'is_moderated', 'city', 'gender', 'telegram_chat_id',
+                           'is_ready_for_trips', 'travel_radius_km'})
+
+
+def pair_type_key(pair_id, translation_type_id) -> str:
+    """Ключ инвертированного индекса: направление перевода и тип перевода"""
+    return f"{pair_id}:{translation_type_id}"
+
+
+class InterpreterSearchProjection(Model):
+    """
+    Плоская проекция переводчика для поиска
+
+    Одна строка на переводчика, только поля для фильтрации: поиск не делает
+    JOIN apps_user/apps_interpreter и M2M таблиц языков и типов перевода.
+    Поддерживается сигналами (apps/signals.py) в той же транзакции, что и
+    изменение переводчика; изменения в обход сигналов исправляет периодическая
+    задача reconcile_search_projection, полный пересчет - rebuild_search_projection.
+    """
+
+    interpreter = OneToOneField('apps.Interpreter', CASCADE, primary_key=True, related_name='search_projection')
+    is_active = BooleanField(default=True)
+    is_moderated = BooleanField(default=False)
+    city = ForeignKey('apps.City', SET_NULL, null=True, related_name='+', db_index=False)
+    gender = CharField(max_length=6, null=True)
+    telegram_chat_id = CharField(max_length=255, null=True)
+    language_ids = ArrayField(UUIDField(), default=list)
+    translation_type_ids = ArrayField(UUIDField(), default=list)
+    # Ключи pair_type_key(пара, тип) из InterpreterLanguagePair: GIN индекс - списки переводчиков по ключу
+    pair_type_keys = ArrayField(CharField(max_length=73), default=list)
+    # Выезд в другие города: координаты города переводчика копируются из City
+    is_ready_for_trips = BooleanField(default=False)
+    travel_radius_km = PositiveSmallIntegerField(default=0)
+    latitude = FloatField(null=True)
+    longitude = FloatField(null=True)
+
+    # Поля проекции, которые пересчитываются из переводчика
+    PROJECTED_FIELDS = ('is_active', 'is_moderated', 'city_id', 'gender', 'telegram_chat_id', 'language_ids',
+                        'translation_type_ids', 'pair_type_keys', 'is_ready_for_trips', 'travel_radius_km',
+                        'latitude', 'longitude')
+
+    class Meta:
+        verbose_name = _('Проекция переводчика для поиска')
+        verbose_name_plural = _('Проекции переводчиков для поиска')
+        indexes = [
+            # Onsite заказы: город + пол, index-only scan без обращения к таблице
+            Index(fields=['city', 'gender', 'interpreter'], include=['telegram_chat_id'],
+                  condition=Q(is_active=True, is_moderated=True), name='search_proj_city_gender'),
+            # Online заказы: только пол
+            Index(fields=['gender', 'interpreter'], include=['telegram_chat_id'],
+                  condition=Q(is_active=True, is_moderated=True), name='search_proj_gender'),
+            # Onsite заказы с выездом: bounding box вокруг города заказа
+            Index(fields=['latitude', 'longitude'], include=['travel_radius_km'],
+                  condition=Q(is_active=True, is_moderated=True, is_ready_for_trips=True),
+                  name='search_proj_travel_box'),
+            GinIndex(fields=['language_ids'], name='search_proj_languages'),
+            GinIndex(fields=['translation_type_ids'], name='search_proj_translation_types'),
+            GinIndex(fields=['pair_type_keys'], name='search_proj_pair_types'),
+        ]
+
+    def __str__(self):
+        return str(self.interpreter_id)
+
+    @classmethod
+    def rebuild(cls, interpreter_ids=None) -> int:
+        """
+        Пересчитать проекцию
+
+        Args:
+            interpreter_ids: ID переводчиков (None - все переводчики)
+
+        Returns:
+            int: Количество записанных строк
+        """
+        if interpreter_ids is not None:
+            interpreter_ids = list(interpreter_ids)
+        projections = cls._compute(interpreter_ids)
+
+        from apps.services.search_cache import SearchResultCache
+        if interpreter_ids is None:
+            SearchResultCache.invalidate_all()
+        elif settings.SEARCH_CACHE_ENABLED:
+            # Языки до и после пересчета: кэш поиска сбрасывается только для них
+            old_rows = cls.objects.filter(interpreter_id__in=interpreter_ids).values_list('language_ids',
+                                                                                          'pair_type_keys')
+            new_rows = ((projection.language_ids, projection.pair_type_keys) for projection in projections)
+            languages = set()
+            for language_ids, keys in chain(old_rows, new_rows):
+                languages |= SearchResultCache.interpreter_languages(language_ids, keys)
+            SearchResultCache.invalidate_capabilities(languages)
+
+        # Группы переводчика в кубе свободных слотов зависят от проекции
+        from apps.services.slot_capacity import SlotCapacityCube
+        SlotCapacityCube.mark_dirty(interpreter_ids)
+
+        cls.objects.bulk_create(
+            projections,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['interpreter'],
+            update_fields=['is_active', 'is_moderated', 'city', 'gender', 'telegram_chat_id',
+                           'language_ids', 'translation_type_ids', 'pair_type_keys', 'is_ready_for_trips',
+                           'travel_radius_km', 'latitude', 'longitude'],
+        )
+        return len(projections)
+
+    @classmethod
+    def reconcile(cls) -> int:
+        """
+        Пересчитать только разошедшиеся строки проекции
+
+        Сигналы не видят QuerySet.update() полей User/Interpreter и bulk_create
+        переводчиков. Проекция сравнивается с пересчетом в памяти, и rebuild()
+        вызывается только для отличающихся переводчиков, поэтому кэш поиска и
+        куб слотов сбрасываются только для них.
+
+        Returns:
+            int: Количество пересчитанных переводчиков
+        """
+        def row(projection):
+            return tuple(sorted(value) if isinstance(value, list) else value
+                         for value in (getattr(projection, field) for field in cls.PROJECTED_FIELDS))
+
+        current = {projection.interpreter_id: row(projection) for projection in cls.objects.all()}
+        drifted = [projection.interpreter_id for projection in cls._compute(None)
+                   if current.get(projection.interpreter_id) != row(projection)]
+        if drifted:
+            cls.rebuild(drifted)
+        return len(drifted)
+
+    @classmethod
+    def _compute(cls, interpreter_ids=None) -> list:
+        """Строки проекции из переводчиков, их языков и направлений (без записи)"""
+        from apps.models import Interpreter, InterpreterLanguagePair
+
+        interpreters = Interpreter.objects.all()
+        pair_types = InterpreterLanguagePair.translation_types.through.objects.all()
+        if interpreter_ids is not None:
+            interpreters = interpreters.filter(id__in=interpreter_ids)
+            pair_types = pair_types.filter(interpreterlanguagepair__interpreter_id__in=interpreter_ids)
+
+        # Отдельным запросом: третий ArrayAgg в annotate умножил бы строки JOIN
+        pair_type_keys = defaultdict(list)
+        for interpreter_id, pair_id, translation_type_id in pair_types.values_list(
+                'interpreterlanguagepair__interpreter_id', 'interpreterlanguagepair__pair_id', 'translationtype_id'):
+            pair_type_keys[interpreter_id].append(pair_type_key(pair_id, translation_type_id))
+
+        rows = interpreters.annotate(
+            language_ids=ArrayAgg('language', distinct=True, filter=Q(language__isnull=False)),
+            translation_type_ids=ArrayAgg('translation_type', distinct=True,
+                                          filter=Q(translation_type__isnull=False)),
+        ).values_list('id', 'is_active', 'is_moderated', 'city_id', 'gender', 'telegram_chat_id',
+                      'language_ids', 'translation_type_ids', 'is_ready_for_trips', 'travel_radius_km',
+                      'city__latitude', 'city__longitude')
+
+        return [
+            cls(interpreter_id=pk, is_active=is_active, is_moderated=is_moderated, city_id=city_id,
+                gender=gender, telegram_chat_id=telegram_chat_id,
+                language_ids=language_ids or [], translation_type_ids=translation_type_ids or [],
+                pair_type_keys=sorted(pair_type_keys.get(pk, ())),
+                is_ready_for_trips=is_ready_for_trips, travel_radius_km=travel_radius_km,
+                latitude=latitude, longitude=longitude)
+            for (pk, is_active, is_moderated, city_id, gender, telegram_chat_id, language_ids, translation_type_ids,
+                 is_ready_for_trips, travel_radius_km, latitude, longitude) in rows
+        ]
+
+
+class SlotCapacity(Model):
+    """
+    Куб свободных переводчиков для выбора слотов на странице нового заказа
+
+    Строка - группа (область, направление перевода, тип перевода) и день,
+    значения - число свободных модерированных переводчиков в утреннем и
+    вечернем слоте. Поддерживается задачей refresh_slot_capacity
+    (apps/services/slot_capacity.py).
+    """
+
+    # "<online или ID города>|<ID направления>|<ID типа перевода или any>"
+    group_key = CharField(max_length=110)
+    date = DateField()
+    morning = IntegerField(default=0)
+    evening = IntegerField(default=0)
+
+    class Meta:
+        verbose_name = _('Свободные переводчики по слотам')
+        verbose_name_plural = _('Свободные переводчики по слотам')
+        constraints = [
+            UniqueConstraint(fields=['group_key', 'date'], name='slot_capacity_group_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.group_key} {self.date}"
+
+
+class SlotCapacityInterpreter(Model):
+    """
+    Вклад переводчика в SlotCapacity на момент последнего пересчета
+
+    Изменение переводчика вычитает из куба старый вклад и добавляет новый.
+    Сигналы помечают строку dirty и увеличивают version; пометка снимается,
+    только если version не менялась во время пересчета.
+    """
+
+    interpreter = OneToOneField('apps.Interpreter', CASCADE, primary_key=True, related_name='slot_capacity')
+    groups = ArrayField(CharField(max_length=110), default=list)
+    # np.packbits свободных слотов: два бита на день горизонта (утро, вечер) с horizon_start
+    free = BinaryField(default=bytes)
+    horizon_start = DateField(null=True)
+    dirty = BooleanField(default=True)
+    version = PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = _('Вклад переводчика в свободные слоты')
+        verbose_name_plural = _('Вклады переводчиков в свободные слоты')
+        indexes = [
+            Index(fields=['interpreter'], condition=Q(dirty=True), name='slot_capacity_dirty'),
+        ]
+
+    def __str__(self):
+        return str(self.interpreter_id)
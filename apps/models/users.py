@@ -1,8 +1,10 @@
 from django.contrib.auth.models import (AbstractUser, BaseUserManager,
                                         PermissionsMixin)
+from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import (SET_NULL, BooleanField, CharField, DateTimeField,
                               EmailField, ForeignKey, JSONField,
-                              ManyToManyField, TextChoices)
+                              ManyToManyField, PositiveSmallIntegerField,
+                              TextChoices)
 from django.utils.translation import gettext_lazy as _
 
 from apps.models.base import CreatedBaseModel, UUIDBaseModel
@@ -70,6 +72,14 @@ class User(AbstractUser, UUIDBaseModel):
         """Проверяет, является ли пользователь клиентом в текущей роли"""
         return self.current_role == self.UserType.CLIENT
 
+    @property
+    def role_profile(self):
+        """Interpreter или Client для текущей роли (None, если строки подтипа нет)"""
+        try:
+            return self.interpreter if self.is_interpreter else self.client
+        except ObjectDoesNotExist:
+            return None
+
     def can_be_interpreter(self):
         """Проверяет, может ли пользователь работать как переводчик"""
         return self.user_type in [self.UserType.INTERPRETER, self.UserType.BOTH]
@@ -108,6 +118,10 @@ class Interpreter(User, CreatedBaseModel):
 
     gender = CharField(_("Gender"), max_length=6, choices=GenderType.choices, blank=True, null=True)
     is_ready_for_trips = BooleanField(default=False)
+    travel_radius_km = PositiveSmallIntegerField(_('Радиус выезда, км'), default=100,
+                                                 help_text=_('Максимальное расстояние до города заказа при '
+                                                             'готовности к поездкам')
+                                                 )
     is_moderated = BooleanField(_('Passed moderation'), default=False)
 
     # Google Calendar Integration Fields
@@ -0,0 +1,291 @@
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import redis
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from apps.models import Availability
+
+logger = logging.getLogger(__name__)
+
+BUCKET = timedelta(minutes=15)
+BUCKETS_PER_DAY = 96
+BYTES_PER_DAY = BUCKETS_PER_DAY // 8
+
+# Пометка переводчиков атомарно с увеличением счетчика: читатель, увидевший
+# счетчик N, найдет в sorted set все пометки со score <= N
+MARK_DIRTY_SCRIPT = """
+local sequence = redis.call('INCR', KEYS[1])
+for _, interpreter_id in ipairs(ARGV) do
+    redis.call('ZADD', KEYS[2], sequence, interpreter_id)
+end
+return sequence
+"""
+
+
+class MatrixCapacityExceeded(Exception):
+    """Строки переводчиков не помещаются в AVAILABILITY_MATRIX_MAX_MB"""
+
+
+class AvailabilityMatrix:
+    """
+    Занятость переводчиков в памяти процесса: строка - переводчик, бит - 15 минут
+
+    Горизонт - AVAILABILITY_MATRIX_DAYS суток от полуночи UTC текущего дня,
+    сутки - 96 бит (12 байт, np.packbits). Строки есть только у переводчиков
+    с BUSY записями в горизонте: нет строки - свободен. Проверка заказа - AND
+    маски слотов заказа со столбцами всех строк и any() по строке вместо
+    NOT EXISTS по Availability. Интервалы округляются до 15 минут наружу,
+    поэтому для слотов заказа (кратных часу) результат совпадает с SQL.
+
+    Изменения Availability (сигналы в apps/signals.py) после коммита помечают
+    переводчика в Redis: sorted set DIRTY_KEY, score - счетчик SEQUENCE_KEY.
+    Перед проверкой процесс перечитывает из БД строки, помеченные после его
+    последней синхронизации. При смене суток столбцы сдвигаются на 12 байт
+    за сутки, и новые сутки дочитываются одним запросом.
+
+    Память ограничена AVAILABILITY_MATRIX_MAX_MB: если строки не помещаются,
+    busy_interpreters() возвращает None и поиск идет через SQL.
+    """
+
+    SEQUENCE_KEY = 'availability_matrix:sequence'
+    DIRTY_KEY = 'availability_matrix:dirty'
+
+    _lock = threading.Lock()
+    _client: Optional[redis.Redis] = None
+    _mark_script = None
+
+    _matrix: Optional[np.ndarray] = None
+    _rows: Dict[uuid.UUID, int] = {}
+    _ids: List[uuid.UUID] = []
+    _start: Optional[datetime] = None
+    _days = 0
+    _sequence = 0
+
+    @classmethod
+    def client(cls) -> redis.Redis:
+        if cls._client is None:
+            cls._client = redis.Redis.from_url(settings.CACHES['default']['LOCATION'])
+        return cls._client
+
+    @staticmethod
+    def horizon_start() -> datetime:
+        """Начало горизонта: полночь UTC текущего дня (в UTC сутки всегда 96 интервалов)"""
+        return timezone.now().astimezone(dt_timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    @classmethod
+    def mark_dirty(cls, interpreter_ids: Iterable):
+        """
+        Пометить строки переводчиков устаревшими во всех процессах (вызывать после коммита)
+
+        Args:
+            interpreter_ids: ID переводчиков, у которых изменились записи Availability
+        """
+        interpreter_ids = [str(interpreter_id) for interpreter_id in interpreter_ids]
+        if not interpreter_ids:
+            return
+        try:
+            if cls._mark_script is None:
+                cls._mark_script = cls.client().register_script(MARK_DIRTY_SCRIPT)
+            cls._mark_script(keys=[cls.SEQUENCE_KEY, cls.DIRTY_KEY], args=interpreter_ids)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to mark availability matrix rows dirty: {e}")
+
+    @classmethod
+    def busy_interpreters(cls, ranges: List[Tuple[datetime, datetime]]) -> Optional[List[uuid.UUID]]:
+        """
+        Переводчики, занятые хотя бы в одном из интервалов
+
+        Args:
+            ranges: Интервалы заказа (start, end); naive datetime - в текущей временной зоне
+
+        Returns:
+            Список ID занятых переводчиков или None, если матрица недоступна
+            (отключена, интервал вне горизонта, превышен лимит памяти, нет Redis)
+        """
+        if not settings.AVAILABILITY_MATRIX_ENABLED or not ranges:
+            return None
+
+        with cls._lock:
+            try:
+                cls._sync()
+            except redis.RedisError as e:
+                logger.warning(f"Availability matrix sync failed: {e}")
+                return None
+            if cls._matrix is None:
+                return None
+
+            spans = [cls._bucket_span(start, end) for start, end in ranges]
+            if None in spans:
+                return None
+
+            first_byte = min(first for first, _ in spans) // 8
+            last_byte = (max(last for _, last in spans) + 7) // 8
+            window = np.zeros((last_byte - first_byte) * 8, dtype=bool)
+            for first, last in spans:
+                window[first - first_byte * 8:last - first_byte * 8] = True
+            mask = np.packbits(window)
+
+            rows = cls._matrix[:len(cls._ids), first_byte:last_byte]
+            return [cls._ids[row] for row in np.flatnonzero((rows & mask).any(axis=1))]
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Размер матрицы процесса (для бенчмарков и диагностики)"""
+        with cls._lock:
+            return {
+                'rows': len(cls._ids),
+                'capacity': 0 if cls._matrix is None else cls._matrix.shape[0],
+                'bytes': 0 if cls._matrix is None else cls._matrix.nbytes,
+                'days': cls._days,
+                'sequence': cls._sequence,
+            }
+
+    @classmethod
+    def reset(cls):
+        """Сбросить матрицу процесса: следующая проверка построит ее заново"""
+        with cls._lock:
+            cls._matrix, cls._rows, cls._ids, cls._start, cls._days, cls._sequence = None, {}, [], None, 0, 0
+
+    @classmethod
+    def _bucket_span(cls, start: datetime, end: datetime) -> Optional[Tuple[int, int]]:
+        """Интервалы [first, last) горизонта, покрывающие [start, end); None - вне горизонта"""
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start)
+        if timezone.is_naive(end):
+            end = timezone.make_aware(end)
+        first = (start - cls._start) // BUCKET
+        last = -((cls._start - end) // BUCKET)
+        if first < 0 or last > cls._days * BUCKETS_PER_DAY:
+            return None
+        return first, max(first, last)
+
+    @classmethod
+    def _sync(cls):
+        """Построить матрицу, сдвинуть горизонт или перечитать помеченные строки"""
+        start = cls.horizon_start()
+        if cls._start is None or cls._days != settings.AVAILABILITY_MATRIX_DAYS:
+            cls._rebuild(start)
+            return
+        if start != cls._start:
+            # Сутки сменились; после превышения лимита памяти - повторная попытка раз в сутки
+            if cls._matrix is None:
+                cls._rebuild(start)
+                return
+            cls._shift(start)
+        if cls._matrix is None:
+            return
+
+        client = cls.client()
+        sequence = int(client.get(cls.SEQUENCE_KEY) or 0)
+        if sequence == cls._sequence:
+            return
+        if sequence < cls._sequence:
+            # Счетчик в Redis сброшен: пометки могли потеряться
+            cls._rebuild(start)
+            return
+
+        dirty = client.zrangebyscore(cls.DIRTY_KEY, f"({cls._sequence}", sequence)
+        cls._sequence = sequence
+        cls._fill([uuid.UUID(interpreter_id.decode()) for interpreter_id in dirty])
+
+    @classmethod
+    def _rebuild(cls, start: datetime):
+        # Счетчик читается до БД: пометки, пришедшие во время загрузки, будут перечитаны
+        sequence = int(cls.client().get(cls.SEQUENCE_KEY) or 0)
+        cls._start, cls._days, cls._sequence = start, settings.AVAILABILITY_MATRIX_DAYS, sequence
+        cls._matrix = np.zeros((min(1024, cls._max_rows()), cls._days * BYTES_PER_DAY), dtype=np.uint8)
+        cls._rows, cls._ids = {}, []
+        cls._fill()
+        if cls._matrix is not None:
+            logger.info(f"Availability matrix built: {len(cls._ids)} rows, {cls._matrix.nbytes // 2 ** 20} MB")
+
+    @classmethod
+    def _shift(cls, start: datetime):
+        days = (start - cls._start).days
+        if not 0 < days < cls._days:
+            cls._rebuild(start)
+            return
+
+        cls._start = start
+        shift = days * BYTES_PER_DAY
+        cls._matrix[:, :-shift] = cls._matrix[:, shift:]
+        cls._matrix[:, -shift:] = 0
+        cls._fill(first_day=cls._days - days)
+
+    @classmethod
+    def _fill(cls, interpreter_ids: Optional[List[uuid.UUID]] = None, first_day: int = 0):
+        """
+        Загрузить BUSY записи в строки матрицы
+
+        Args:
+            interpreter_ids: Перечитать только этих переводчиков (их строки очищаются), None - всех
+            first_day: Заполнять сутки горизонта начиная с этого дня
+        """
+        if interpreter_ids is not None:
+            if not interpreter_ids:
+                return
+            for interpreter_id in interpreter_ids:
+                row = cls._rows.get(interpreter_id)
+                if row is not None:
+                    cls._matrix[row, first_day * BYTES_PER_DAY:] = 0
+
+        window_start = cls._start + timedelta(days=first_day)
+        window_end = cls._start + timedelta(days=cls._days)
+        buckets = (cls._days - first_day) * BUCKETS_PER_DAY
+
+        # Только основная БД: реплика может не содержать изменения, о котором пришла пометка
+        records = Availability.objects.using(DEFAULT_DB_ALIAS).filter(
+            type=Availability.AvailabilityType.BUSY,
+            start_datetime__lt=window_end,
+            end_datetime__gt=window_start,
+        )
+        if interpreter_ids is not None:
+            records = records.filter(translator_id__in=interpreter_ids)
+        records = records.order_by('translator_id').values_list('translator_id', 'start_datetime', 'end_datetime')
+
+        try:
+            for interpreter_id, intervals in groupby(records.iterator(chunk_size=10000), key=lambda record: record[0]):
+                bits = np.zeros(buckets, dtype=bool)
+                for _, start, end in intervals:
+                    first = max((start - window_start) // BUCKET, 0)
+                    last = min(-((window_start - end) // BUCKET), buckets)
+                    bits[first:last] = True
+                cls._matrix[cls._row(interpreter_id), first_day * BYTES_PER_DAY:] = np.packbits(bits)
+        except MatrixCapacityExceeded:
+            logger.warning(f"Availability matrix exceeds {settings.AVAILABILITY_MATRIX_MAX_MB} MB, "
+                           f"falling back to SQL until {cls._start + timedelta(days=1)}")
+            cls._matrix, cls._rows, cls._ids = None, {}, []
+
+    @classmethod
+    def _row(cls, interpreter_id: uuid.UUID) -> int:
+        """Строка переводчика; матрица растет вдвое, но не больше лимита памяти"""
+        row = cls._rows.get(interpreter_id)
+        if row is not None:
+            return row
+
+        row = len(cls._ids)
+        capacity = cls._matrix.shape[0]
+        if row == capacity:
+            max_rows = cls._max_rows()
+            if capacity >= max_rows:
+                raise MatrixCapacityExceeded()
+            grown = np.zeros((min(capacity * 2, max_rows), cls._matrix.shape[1]), dtype=np.uint8)
+            grown[:capacity] = cls._matrix
+            cls._matrix = grown
+
+        cls._rows[interpreter_id] = row
+        cls._ids.append(interpreter_id)
+        return row
+
+    @classmethod
+    def _max_rows(cls) -> int:
+        return max(1, settings.AVAILABILITY_MATRIX_MAX_MB * 2 ** 20 // (cls._days * BYTES_PER_DAY))
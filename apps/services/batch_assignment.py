@@ -0,0 +1,256 @@
+import logging
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F
+from django.utils import timezone
+from scipy.optimize import linear_sum_assignment
+
+from apps.models import Booking, Order
+from apps.services.order_workflow import SYNCHRONOUS_TYPE_MARKER
+from apps.services.reference_data import ReferenceData
+
+logger = logging.getLogger(__name__)
+
+PENDING_STATUSES = (Order.OrderStatus.NEW, Order.OrderStatus.SEARCHING, Order.OrderStatus.PARTIALLY_ASSIGNED)
+
+
+class OrderDemand(NamedTuple):
+    """Незакрытые места заказа и его кандидаты для одного запуска"""
+    order_id: uuid.UUID
+    start: datetime
+    end: datetime
+    slots: int  # сколько оферов можно отправить сейчас
+    minimum: int  # меньше стольких оферов не отправлять (синхронный перевод - пара)
+    candidates: List[uuid.UUID]
+    distances: Dict[uuid.UUID, float]
+
+
+class BatchAssignmentService:
+    """
+    Пакетное назначение переводчиков на ожидающие заказы
+
+    Вместо рассылки оферов каждому заказу отдельно периодически берет все
+    NEW/SEARCHING (и частично назначенные) заказы с кандидатами из
+    InterpreterSearchService и решает задачу о назначениях минимальной
+    стоимости (scipy linear_sum_assignment):
+    строка - свободное место заказа (required_count - accepted_count с учетом
+    ожидающих оферов), столбец - переводчик. Стоимость растет с числом
+    заказов, претендующих на переводчика в этом запуске, с его ожидающими
+    оферами и с расстоянием выезда, поэтому популярные переводчики остаются
+    заказам, у которых мало кандидатов.
+
+    Заказы, пересекающиеся по времени, решаются вместе, и переводчик
+    получает в такой группе не больше одного офера; непересекающиеся группы
+    решаются независимо. Синхронный перевод получает оферы только парой.
+    """
+
+    # Ключ pg_try_advisory_lock: один запуск одновременно (снимается и при возврате соединения в пул)
+    LOCK_KEY = 0x4C540047
+    POPULARITY_WEIGHT = 1.0
+    LOAD_WEIGHT = 0.5
+    DISTANCE_WEIGHT = 0.5
+
+    @classmethod
+    def run(cls, dry_run: bool = False, limit: Optional[int] = None) -> dict:
+        """
+        Собрать заказы, решить назначение и отправить оферы
+
+        Args:
+            dry_run: Только решить, оферы не отправлять
+            limit: Максимум заказов (по умолчанию BATCH_ASSIGNMENT_MAX_ORDERS)
+
+        Returns:
+            dict со статистикой запуска (skipped=True, если идет другой запуск)
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [cls.LOCK_KEY])
+            if not cursor.fetchone()[0]:
+                return {'skipped': True}
+
+        try:
+            started = time.perf_counter()
+            demands = cls.collect(limit)
+            collected = time.perf_counter()
+            assignments = cls.solve(demands, cls.interpreter_load(demands))
+            solved = time.perf_counter()
+            offers_sent = 0 if dry_run else cls.send(assignments)
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [cls.LOCK_KEY])
+
+        stats = {
+            'orders': len(demands),
+            'open_slots': sum(demand.slots for demand in demands),
+            'assigned': sum(len(interpreter_ids) for interpreter_ids in assignments.values()),
+            'offers_sent': offers_sent,
+            'collect_s': collected - started,
+            'solve_s': solved - collected,
+        }
+        logger.info(f"Batch assignment: {stats}")
+        return stats
+
+    @classmethod
+    def collect(cls, limit: Optional[int] = None) -> List[OrderDemand]:
+        """
+        Ожидающие заказы с местами, на которые можно отправить оферы, и их кандидаты
+
+        Переводчики, которым офер по заказу уже отправлялся (в любом статусе), исключаются.
+        """
+        from apps.services.interpreter_search import InterpreterSearchService
+
+        orders = list(
+            Order.objects.filter(status__in=PENDING_STATUSES, start_datetime__gt=timezone.now(),
+                                 accepted_count__lt=F('required_count'))
+            .order_by('created_at')[:limit or settings.BATCH_ASSIGNMENT_MAX_ORDERS]
+        )
+        if not orders:
+            return []
+
+        order_ids = [order.id for order in orders]
+        contacted = defaultdict(set)
+        outstanding = Counter()
+        for order_id, interpreter_id, status, is_expired in Booking.objects.filter(order_id__in=order_ids).values_list(
+                'order_id', 'interpreter_id', 'status', 'is_expired'):
+            contacted[order_id].add(interpreter_id)
+            if status == Booking.Status.OFFERED and not is_expired:
+                outstanding[order_id] += 1
+
+        synchronous_type_ids = {translation_type.id for translation_type in ReferenceData.translation_types()
+                                if SYNCHRONOUS_TYPE_MARKER in translation_type.name.lower()}
+        synchronous_orders = set(
+            Order.translation_types.through.objects.filter(order_id__in=order_ids,
+                                                           translationtype_id__in=synchronous_type_ids)
+            .values_list('order_id', flat=True)
+        )
+
+        per_slot = settings.BATCH_ASSIGNMENT_OFFERS_PER_SLOT
+        demands = []
+        for order in orders:
+            slots = (order.required_count - order.accepted_count) * per_slot - outstanding[order.id]
+            if slots <= 0:
+                continue
+
+            minimum = 1
+            if order.id in synchronous_orders:
+                # Пара синхронистов: первые оферы отправляются только обоим сразу
+                minimum = max(1, (2 - order.accepted_count) * per_slot - outstanding[order.id])
+
+            search = InterpreterSearchService(order)
+            candidates = [
+                interpreter_id for interpreter_id in
+                search.find_available_interpreters().values_list('interpreter_id', flat=True)
+                if interpreter_id not in contacted[order.id]
+            ]
+            if len(candidates) < minimum:
+                continue
+            demands.append(OrderDemand(order.id, order.start_datetime, order.end_datetime, slots, minimum,
+                                       candidates, search.distances or {}))
+        return demands
+
+    @staticmethod
+    def interpreter_load(demands: List[OrderDemand]) -> Dict[uuid.UUID, int]:
+        """Ожидающие оферы кандидатов по всем заказам"""
+        candidate_ids = {interpreter_id for demand in demands for interpreter_id in demand.candidates}
+        if not candidate_ids:
+            return {}
+        return dict(
+            Booking.objects.filter(interpreter_id__in=candidate_ids, status=Booking.Status.OFFERED, is_expired=False)
+            .values('interpreter_id').annotate(count=Count('id')).values_list('interpreter_id', 'count')
+        )
+
+    @classmethod
+    def solve(cls, demands: List[OrderDemand], load: Optional[Dict[uuid.UUID, int]] = None
+              ) -> Dict[uuid.UUID, List[uuid.UUID]]:
+        """
+        Назначение переводчиков на места заказов минимальной стоимости
+
+        Args:
+            demands: Заказы из collect()
+            load: Ожидающие оферы переводчиков (interpreter_load)
+
+        Returns:
+            {order_id: [interpreter_id, ...]} - кому отправить оферы
+        """
+        assignments = {}
+        for group in cls.time_groups(demands):
+            while group:
+                solved = cls._solve_group(group, load or {})
+                # Синхронный заказ, не получивший пары, не должен занимать переводчика: решить без него
+                short = {demand.order_id for demand in group
+                         if 0 < len(solved.get(demand.order_id, ())) < demand.minimum}
+                if not short:
+                    assignments.update(solved)
+                    break
+                group = [demand for demand in group if demand.order_id not in short]
+        return assignments
+
+    @staticmethod
+    def time_groups(demands: List[OrderDemand]) -> List[List[OrderDemand]]:
+        """Группы заказов, связанных пересечением по времени (заметание по началу)"""
+        groups = []
+        group_end = None
+        for demand in sorted(demands, key=lambda demand: demand.start):
+            if group_end is None or demand.start >= group_end:
+                groups.append([])
+                group_end = demand.end
+            groups[-1].append(demand)
+            group_end = max(group_end, demand.end)
+        return groups
+
+    @classmethod
+    def _solve_group(cls, demands: List[OrderDemand], load: Dict[uuid.UUID, int]) -> Dict[uuid.UUID, List]:
+        columns = sorted({interpreter_id for demand in demands for interpreter_id in demand.candidates})
+        if not columns:
+            return {}
+        column_index = {interpreter_id: i for i, interpreter_id in enumerate(columns)}
+
+        candidate_columns = [np.array([column_index[i] for i in demand.candidates], dtype=np.intp)
+                             for demand in demands]
+        popularity = np.bincount(np.concatenate(candidate_columns), minlength=len(columns)) / len(demands)
+        base = (1.0 + cls.POPULARITY_WEIGHT * popularity
+                + cls.LOAD_WEIGHT * np.array([load.get(i, 0) for i in columns], dtype=np.float64))
+
+        # Строка на каждое место заказа: мест больше, чем кандидатов, не бывает
+        row_demands = [n for n, demand in enumerate(demands) for _ in range(min(demand.slots, len(demand.candidates)))]
+        if not row_demands:
+            return {}
+        costs = np.full((len(row_demands), len(columns)), np.inf)
+        for row, n in enumerate(row_demands):
+            demand, indices = demands[n], candidate_columns[n]
+            if row == 0 or row_demands[row - 1] != n:
+                distances = np.array([demand.distances.get(i, 0.0) for i in demand.candidates], dtype=np.float64)
+                demand_costs = base[indices] + cls.DISTANCE_WEIGHT * distances / settings.TRAVEL_MAX_RADIUS_KM
+            costs[row, indices] = demand_costs
+
+        # Недопустимая пара дороже любого полного назначения: решение максимизирует число мест
+        feasible = np.isfinite(costs)
+        infeasible_cost = costs[feasible].max() * len(row_demands) + 1
+        costs[~feasible] = infeasible_cost
+
+        assignments = defaultdict(list)
+        rows, cols = linear_sum_assignment(costs)
+        for r, c in zip(rows, cols):
+            if feasible[r, c]:
+                assignments[demands[row_demands[r]].order_id].append(columns[c])
+        return dict(assignments)
+
+    @staticmethod
+    def send(assignments: Dict[uuid.UUID, List[uuid.UUID]]) -> int:
+        """Отправить оферы по назначению заказам, которые все еще ждут переводчиков"""
+        from apps.services.order_workflow import OrderWorkflowService
+
+        sent_count = 0
+        orders = Order.objects.filter(id__in=list(assignments), status__in=PENDING_STATUSES,
+                                      accepted_count__lt=F('required_count'))
+        for order in orders:
+            # Назначение уже ограничено местами заказа: волны не нужны
+            result = OrderWorkflowService(order).send_offers([str(i) for i in assignments[order.id]], waves=False)
+            sent_count += result['sent_count']
+        return sent_count
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import logging
+from typing import Optional
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+
+from apps.models import (GoogleCalendarCredentials,
+                         GoogleCalendarWebhookChannel, Interpreter)
+from apps.services.event_hub import EventHub
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'calendar_status'
+
+
+class CalendarStatusCache:
+    """
+    Кэш статуса подключения Google Calendar для переводчика
+
+    Статус (connected, last_sync, last_error, channel_expiration) хранится в Redis
+    и сбрасывается OAuth callback, отключением календаря, задачами синхронизации
+    и обновлением webhook каналов. При SSE_ENABLED сброс публикуется в канал
+    calendar_status, и открытые потоки CalendarStatusStreamView перечитывают статус.
+    """
+
+    _client: Optional[redis.Redis] = None
+
+    KEY_PREFIX = 'calendar_status'
+    ERROR_KEY_PREFIX = 'calendar_status_error'
+    CACHE_TIMEOUT = 60 * 60  # 1 час
+    ERROR_TIMEOUT = 7 * 24 * 60 * 60  # 7 дней
+
+    @classmethod
+    def _key(cls, interpreter_id) -> str:
+        return f"{cls.KEY_PREFIX}:{interpreter_id}"
+
+    @classmethod
+    def _error_key(cls, interpreter_id) -> str:
+        return f"{cls.ERROR_KEY_PREFIX}:{interpreter_id}"
+
+    @classmethod
+    def get(cls, interpreter_id) -> dict:
+        """
+        Получить статус из кэша или собрать его из БД
+
+        Args:
+            interpreter_id: ID переводчика
+
+        Returns:
+            dict: {'status': {...}, 'etag': '...'}
+        """
+        cached = cache.get(cls._key(interpreter_id))
+        if cached is not None:
+            return cached
+
+        status = cls._build_status(interpreter_id)
+        payload = {'status': status, 'etag': cls._make_etag(status)}
+        cache.set(cls._key(interpreter_id), payload, cls.CACHE_TIMEOUT)
+        return payload
+
+    @classmethod
+    def invalidate(cls, interpreter_id):
+        """Сбросить закэшированный статус переводчика и оповестить его потоки после коммита"""
+        cache.delete(cls._key(interpreter_id))
+        if settings.SSE_ENABLED:
+            transaction.on_commit(lambda: cls._publish(interpreter_id))
+
+    @classmethod
+    def client(cls) -> redis.Redis:
+        if cls._client is None:
+            cls._client = redis.Redis.from_url(settings.CACHES['default']['LOCATION'])
+        return cls._client
+
+    @classmethod
+    def _publish(cls, interpreter_id):
+        try:
+            cls.client().publish(CHANNEL, json.dumps({'interpreter_id': str(interpreter_id)}))
+        except redis.RedisError as e:
+            logger.warning(f"Failed to publish calendar status change for {interpreter_id}: {e}")
+
+    @classmethod
+    def record_sync_result(cls, interpreter_id, error: Optional[str] = None):
+        """
+        Сохранить результат синхронизации и сбросить статус
+
+        Args:
+            interpreter_id: ID переводчика
+            error: Текст ошибки или None при успешной синхронизации
+        """
+        if error:
+            cache.set(cls._error_key(interpreter_id), error, cls.ERROR_TIMEOUT)
+        else:
+            cache.delete(cls._error_key(interpreter_id))
+        cls.invalidate(interpreter_id)
+
+    @classmethod
+    def _build_status(cls, interpreter_id) -> dict:
+        """Собрать статус из БД без создания Google Credentials"""
+        interpreter = Interpreter.objects.filter(id=interpreter_id).values('last_calendar_sync').first()
+
+        if not interpreter:
+            return {'connected': False, 'last_sync': None, 'last_error': None, 'channel_expiration': None}
+
+        has_credentials = GoogleCalendarCredentials.objects.filter(
+            user_id=interpreter_id
+        ).filter(
+            Q(token__gt='') | Q(refresh_token__gt='')
+        ).exists()
+
+        channel_expiration = GoogleCalendarWebhookChannel.objects.filter(
+            interpreter_id=interpreter_id,
+            is_active=True
+        ).order_by(F('expiration').desc(nulls_last=True)).values_list('expiration', flat=True).first()
+
+        last_sync = interpreter['last_calendar_sync']
+
+        return {
+            'connected': has_credentials,
+            'last_sync': last_sync.isoformat() if last_sync else None,
+            'last_error': cache.get(cls._error_key(interpreter_id)),
+            'channel_expiration': channel_expiration.isoformat() if channel_expiration else None,
+        }
+
+    @staticmethod
+    def _make_etag(status: dict) -> str:
+        raw = json.dumps(status, sort_keys=True).encode()
+        return f'"{hashlib.md5(raw).hexdigest()}"'
+
+
+hub = EventHub(CHANNEL, 'interpreter_id')
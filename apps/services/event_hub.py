@@ -0,0 +1,89 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EventHub:
+    """
+    Одна подписка Redis на процесс, раздающая события канала SSE подключениям
+
+    Подписка на канал создается при первом подключении и живет, пока есть
+    слушатели. События раздаются по значению поля key (например client_id
+    для заказов). Каждое подключение получает свою ограниченную
+    asyncio.Queue; медленный клиент теряет самые старые события, а не
+    задерживает остальных.
+    """
+
+    QUEUE_SIZE = 100
+
+    def __init__(self, channel: str, key: str):
+        """
+        Args:
+            channel: Канал Redis pub/sub
+            key: Поле события, по которому выбираются подключения
+        """
+        self.channel = channel
+        self.key = key
+        self.queues: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._listener: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def connections(self) -> int:
+        return sum(len(queues) for queues in self.queues.values())
+
+    def subscribe(self, key_value: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        self.queues[key_value].add(queue)
+
+        loop = asyncio.get_running_loop()
+        if self._listener is None or self._listener.done() or self._loop is not loop:
+            self._loop = loop
+            self._listener = loop.create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, key_value: str, queue: asyncio.Queue):
+        queues = self.queues.get(key_value)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.queues[key_value]
+
+        if not self.queues and self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+    def dispatch(self, payload: dict):
+        for queue in self.queues.get(payload.get(self.key), ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+    async def _listen(self):
+        """Читать канал, переподключаясь к Redis после ошибок"""
+        while True:
+            client = aioredis.Redis.from_url(settings.CACHES['default']['LOCATION'])
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    try:
+                        self.dispatch(json.loads(message['data']))
+                    except (TypeError, ValueError) as e:
+                        logger.warning(f"Malformed {self.channel} event: {e}")
+            except asyncio.CancelledError:
+                raise
+            except redis.RedisError as e:
+                logger.warning(f"{self.channel} subscription lost: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
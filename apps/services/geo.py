@@ -0,0 +1,43 @@
+import math
+from typing import Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LATITUDE = 111.32
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Прямоугольник (min_lat, max_lat, min_lng, max_lng), гарантированно содержащий круг радиуса radius_km
+
+    Используется как дешевый префильтр в SQL перед точным расстоянием.
+    Переход через антимеридиан не обрабатывается (для городов сервиса не нужен).
+    """
+    delta_latitude = radius_km / KM_PER_DEGREE_LATITUDE
+    # У полюсов градус долготы стремится к нулю: ограничиваем, чтобы не делить на ноль
+    cos_latitude = max(math.cos(math.radians(latitude)), 0.01)
+    delta_longitude = min(radius_km / (KM_PER_DEGREE_LATITUDE * cos_latitude), 180.0)
+    return (latitude - delta_latitude, latitude + delta_latitude,
+            longitude - delta_longitude, longitude + delta_longitude)
+
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    Расстояние по большому кругу от точки до массива точек, км (векторно)
+
+    Args:
+        latitude: Широта точки, градусы
+        longitude: Долгота точки, градусы
+        latitudes: Широты кандидатов, градусы
+        longitudes: Долготы кандидатов, градусы
+
+    Returns:
+        np.ndarray расстояний той же длины
+    """
+    lat1 = math.radians(latitude)
+    lat2 = np.radians(latitudes)
+    half_dlat = (lat2 - lat1) / 2
+    half_dlng = np.radians(longitudes - longitude) / 2
+    a = np.sin(half_dlat) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(half_dlng) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
@@ -4,6 +4,8 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -12,6 +14,8 @@ from googleapiclient.errors import HttpError
 
 from apps.models import (Availability, GoogleCalendarCredentials,
                          GoogleCalendarWebhookChannel, Interpreter)
+from apps.services.calendar_status import CalendarStatusCache
+from apps.services.partitioning import lock_unique_key
 
 logger = logging.getLogger(__name__)
 
@@ -48,16 +52,13 @@ class GoogleCalendarService:
             bool: True если учетные данные существуют и валидны
         """
         try:
-            credentials = GoogleCalendarCredentials.objects.filter(
+            # Credentials без expiry валидны при наличии token, поэтому объект
+            # google Credentials для проверки не создаем
+            return GoogleCalendarCredentials.objects.filter(
                 user=self.interpreter
-            ).first()
-
-            if not credentials:
-                return False
-
-            # Проверить валидность токена
-            creds = self._credentials_from_model(credentials)
-            return creds and (creds.valid or creds.refresh_token)
+            ).filter(
+                Q(token__gt='') | Q(refresh_token__gt='')
+            ).exists()
         except Exception as e:
             logger.error(f"Error checking authorization for {self.interpreter.id}: {e}")
             return False
@@ -103,7 +104,12 @@ class GoogleCalendarService:
         if not creds:
             raise ValueError("No valid credentials available")
 
-        self.service = build('calendar', 'v3', credentials=creds)
+        # GOOGLE_CALENDAR_API_ENDPOINT позволяет направить клиент на локальный фейковый API (бенчмарки)
+        client_options = None
+        if settings.GOOGLE_CALENDAR_API_ENDPOINT:
+            client_options = {'api_endpoint': settings.GOOGLE_CALENDAR_API_ENDPOINT}
+
+        self.service = build('calendar', 'v3', credentials=creds, client_options=client_options)
         return self.service
 
     def setup_watch_channel(self, calendar_id: str = 'primary') -> Optional[GoogleCalendarWebhookChannel]:
@@ -152,6 +158,8 @@ class GoogleCalendarService:
                 expiration=datetime.fromtimestamp(int(response['expiration']) / 1000, tz=timezone.utc)
             )
 
+            CalendarStatusCache.invalidate(self.interpreter.id)
+
             logger.info(f"Created webhook channel {channel_id} for interpreter {self.interpreter.id}")
             return channel
 
@@ -184,6 +192,7 @@ class GoogleCalendarService:
             # Обновить статус в БД
             channel.is_active = False
             channel.save()
+            CalendarStatusCache.invalidate(self.interpreter.id)
 
             logger.info(f"Stopped webhook channel {channel.channel_id}")
             return True
@@ -219,25 +228,36 @@ class GoogleCalendarService:
             params = {
                 'calendarId': calendar_id,
                 'singleEvents': True,
-                'orderBy': 'startTime'
             }
 
             if sync_token:
-                # Инкрементальная синхронизация
+                # Инкрементальная синхронизация (orderBy/timeMin несовместимы с syncToken)
                 params['syncToken'] = sync_token
             else:
                 # Полная синхронизация
                 if not time_min:
                     time_min = timezone.now()
                 params['timeMin'] = time_min.isoformat()
-
-            # Получить события
-            events_result = service.events().list(**params).execute()
+                params['orderBy'] = 'startTime'
+
+            # Получить все страницы: nextSyncToken приходит только с последней
+            events = []
+            events_result = {}
+            page_token = None
+            while True:
+                if page_token:
+                    params['pageToken'] = page_token
+                events_result = service.events().list(**params).execute()
+                events.extend(events_result.get('items', []))
+
+                page_token = events_result.get('nextPageToken')
+                if not page_token:
+                    break
 
             return {
-                'events': events_result.get('items', []),
+                'events': events,
                 'next_sync_token': events_result.get('nextSyncToken'),
-                'next_page_token': events_result.get('nextPageToken')
+                'next_page_token': None
             }
 
         except HttpError as e:
@@ -270,9 +290,16 @@ class GoogleCalendarService:
             int: Количество синхронизированных событий
         """
         synced_count = 0
+        removed_event_ids = []
 
         for event in events:
             try:
+                # Отмененные события (tombstones) и свободные (transparent) слоты
+                # не должны блокировать переводчика
+                if event.get('status') == 'cancelled' or event.get('transparency') == 'transparent':
+                    removed_event_ids.append(event['id'])
+                    continue
+
                 # Пропустить события без времени
                 if 'start' not in event or 'end' not in event:
                     continue
@@ -288,18 +315,25 @@ class GoogleCalendarService:
                 start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
                 end_dt = datetime.fromisoformat(end.replace('Z', '+00:00'))
 
-                # Создать или обновить Availability
-                Availability.objects.update_or_create(
-                    translator=self.interpreter,
-                    google_event_id=event['id'],
-                    defaults={
-                        'start_datetime': start_dt,
-                        'end_datetime': end_dt,
-                        'type': 'BUSY',
-                        'is_google_calendar_event': True,
-                        'last_synced_at': timezone.now()
-                    }
-                )
+                # Создать или обновить Availability. Таблица секционирована, и индекс
+                # google_event_id уникален только в секции: дубликаты исключает блокировка
+                with transaction.atomic():
+                    lock_unique_key(Availability, event['id'])
+                    if Availability.objects.filter(google_event_id=event['id']).exclude(
+                            translator=self.interpreter).exists():
+                        logger.warning(f"Event {event['id']} already belongs to another interpreter")
+                        continue
+                    Availability.objects.update_or_create(
+                        translator=self.interpreter,
+                        google_event_id=event['id'],
+                        defaults={
+                            'start_datetime': start_dt,
+                            'end_datetime': end_dt,
+                            'type': Availability.AvailabilityType.BUSY,
+                            'is_google_calendar_event': True,
+                            'last_synced_at': timezone.now()
+                        }
+                    )
 
                 synced_count += 1
 
@@ -307,6 +341,13 @@ class GoogleCalendarService:
                 logger.error(f"Error syncing event {event.get('id')}: {e}")
                 continue
 
+        if removed_event_ids:
+            deleted_count, _ = Availability.objects.filter(
+                translator=self.interpreter,
+                google_event_id__in=removed_event_ids
+            ).delete()
+            logger.info(f"Removed {deleted_count} cancelled/free events for interpreter {self.interpreter.id}")
+
         return synced_count
 
     def refresh_credentials(
@@ -375,6 +416,8 @@ class GoogleCalendarService:
             self.interpreter.last_calendar_sync = timezone.now()
             self.interpreter.save(update_fields=['last_calendar_sync'])
 
+            CalendarStatusCache.record_sync_result(self.interpreter.id)
+
             logger.info(f"Synced {synced_count} events for interpreter {self.interpreter.id}")
 
             return {
@@ -385,6 +428,7 @@ class GoogleCalendarService:
 
         except Exception as e:
             logger.error(f"Error syncing calendar for {self.interpreter.id}: {e}")
+            CalendarStatusCache.record_sync_result(self.interpreter.id, error=str(e))
             return {
                 'success': False,
                 'error': str(e)
@@ -1,13 +1,27 @@
 import logging
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
-from django.db.models import Q, QuerySet
+import numpy as np
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q, QuerySet
 
-from apps.models import Interpreter, Order
+from apps.db_router import read_database
+from apps.models import Availability, InterpreterSearchProjection, Order
+from apps.models.search import pair_type_key
+from apps.services.availability_matrix import AvailabilityMatrix
+from apps.services.geo import bounding_box, haversine_km
+from apps.services.reference_data import CityRef, ReferenceData
+from apps.services.search_cache import SearchResultCache
 
 logger = logging.getLogger(__name__)
 
+# Время слотов страницы нового заказа (локальное время)
+SLOT_TIMES = {
+    'morning': ('09:00', '14:00'),
+    'evening': ('14:00', '18:00')
+}
+
 
 class InterpreterSearchService:
     """Сервис для поиска доступных переводчиков на основе требований заказа"""
@@ -18,35 +32,149 @@ class InterpreterSearchService:
             order: Экземпляр модели Order
         """
         self.order = order
+        # Расстояние (км) для переводчиков из других городов; заполняется для onsite заказов
+        self.distances: Optional[Dict] = None
 
     def find_available_interpreters(self) -> QuerySet:
         """
         Находит переводчиков доступных для данного заказа
 
+        Читает только InterpreterSearchProjection (без JOIN таблиц пользователя,
+        переводчика и M2M), поэтому возвращает QuerySet проекций: id переводчика
+        в поле interpreter_id. Запрос идет на реплику, если она доступна и
+        текущий запрос не писал в БД (read_database).
+
         Порядок фильтрации:
-        1. Языки (должны совпадать все языки заказа)
-        2. Типы перевода
-        3. Локация (город для onsite, любой для online)
+        1-2. Направления перевода заказа с типами перевода (инвертированный индекс pair_type_keys),
+             для заказов без направлений - языки (должны совпадать все) и типы перевода
+        3. Локация (для onsite - город заказа и готовые к выезду в bounding box, для online - любая)
         4. Доступность (исключить занятых)
         5. Пол (если указан)
+        6. Точное расстояние для выезжающих из других городов (NumPy), результат в self.distances
+
+        Найденные ID кэшируются по нормализованным критериям заказа (SearchResultCache);
+        при попадании возвращается QuerySet по сохраненным ID.
 
         Returns:
-            QuerySet с доступными переводчиками, отсортированными по приоритету
+            QuerySet InterpreterSearchProjection с доступными переводчиками
         """
+        pair_ids = list(self.order.language_pairs.values_list('id', flat=True))
+
+        # Результат того же поиска из кэша (повтор или небольшая правка заказа клиентом)
+        cache_lookup = self._cache_lookup(pair_ids) if settings.SEARCH_CACHE_ENABLED else None
+        if cache_lookup is not None:
+            cache_key, cached, versions = cache_lookup
+            if cached is not None:
+                self.distances = cached.distances
+                return self._projections(cached.interpreter_ids)
+
         # Начать с всех модерированных переводчиков
-        queryset = Interpreter.objects.filter(is_moderated=True, is_active=True)
+        queryset = InterpreterSearchProjection.objects.using(read_database()).filter(is_moderated=True,
+                                                                                     is_active=True)
 
         # Применить фильтры
-        queryset = self._filter_by_languages(queryset)
-        queryset = self._filter_by_translation_types(queryset)
+        if pair_ids:
+            queryset = self._filter_by_language_pairs(queryset, pair_ids)
+        else:
+            queryset = self._filter_by_languages(queryset)
+            queryset = self._filter_by_translation_types(queryset)
         queryset = self._filter_by_location(queryset)
         queryset = self._filter_by_availability(queryset)
         queryset = self._filter_by_gender(queryset)
+        queryset = self._filter_by_travel_distance(queryset)
 
-        # Сортировка по приоритету (можно добавить рейтинг, опыт и т.д.)
-        queryset = queryset.distinct()
+        if cache_lookup is not None:
+            interpreter_ids = list(queryset.values_list('interpreter_id', flat=True))
+            if SearchResultCache.set(cache_key, versions, interpreter_ids, self.distances):
+                return self._projections(interpreter_ids)
 
-        logger.info(f"Found {queryset.count()} available interpreters for order {self.order.id}")
+        # Одна строка на переводчика - distinct не нужен
+        return queryset
+
+    def _cache_lookup(self, pair_ids: List) -> Optional[tuple]:
+        """
+        Ключ кэша по нормализованным критериям заказа и результат из кэша
+
+        Returns:
+            (ключ, CachedSearch или None, версии для SearchResultCache.set) или None,
+            если интервалы заказа вне горизонта SEARCH_CACHE_DAYS
+        """
+        ranges = SearchResultCache.merge_ranges(self._slot_ranges())
+        days = SearchResultCache.days(ranges)
+        if days is None:
+            return None
+
+        translation_type_ids = sorted(str(i) for i in self.order.translation_types.values_list('id', flat=True))
+        if pair_ids:
+            pairs = {str(pair_id) for pair_id in pair_ids}
+            language_ids = {str(language.id) for pair in ReferenceData.language_pairs() if str(pair.id) in pairs
+                            for language in (pair.source, pair.target)}
+        else:
+            language_ids = {str(i) for i in self.order.languages.values_list('id', flat=True)}
+
+        onsite = self.order.location_type == Order.LocationType.ONSITE
+        criteria = {
+            'pairs': sorted(str(pair_id) for pair_id in pair_ids),
+            # Без направлений фильтр по языкам; с направлениями языки определяются ими
+            'languages': [] if pair_ids else sorted(language_ids),
+            'translation_types': translation_type_ids,
+            'location_type': self.order.location_type,
+            'city': str(self.order.city_id) if onsite and self.order.city_id else None,
+            'gender': getattr(self.order, 'gender_requirement', None),
+            'ranges': [(start.isoformat(), end.isoformat()) for start, end in ranges],
+            'travel_max_radius_km': settings.TRAVEL_MAX_RADIUS_KM if onsite else None,
+        }
+        key = SearchResultCache.key(criteria)
+        cached, versions = SearchResultCache.get(key, SearchResultCache.version_keys(language_ids, days))
+        return key, cached, versions
+
+    @staticmethod
+    def _projections(interpreter_ids: List) -> QuerySet:
+        """Найденные переводчики по ID (поиск уже выполнен или взят из кэша)"""
+        return InterpreterSearchProjection.objects.using(read_database()).filter(
+            interpreter_id__in=interpreter_ids, is_moderated=True, is_active=True
+        )
+
+    def _order_city(self) -> Optional[CityRef]:
+        """Город onsite заказа с координатами или None"""
+        if self.order.location_type != Order.LocationType.ONSITE:
+            return None
+        city = ReferenceData.city(self.order.city_id)
+        if city is None or city.latitude is None or city.longitude is None:
+            return None
+        return city
+
+    def _filter_by_language_pairs(self, queryset: QuerySet, pair_ids: List) -> QuerySet:
+        """
+        Фильтрация по направлениям перевода
+
+        Переводчик должен переводить по каждому направлению заказа хотя бы одним
+        из типов перевода заказа (если типы не указаны - любым). Условие на
+        каждое направление - пересечение массива ключей с ключами направления;
+        PostgreSQL пересекает списки переводчиков GIN индекса search_proj_pair_types
+        (BitmapAnd) без JOIN таблиц направлений.
+
+        Args:
+            queryset: QuerySet переводчиков
+            pair_ids: ID направлений (LanguagePair) заказа
+
+        Returns:
+            Отфильтрованный QuerySet
+        """
+        translation_type_ids = list(self.order.translation_types.values_list('id', flat=True))
+        if not translation_type_ids:
+            translation_type_ids = [translation_type.id for translation_type in ReferenceData.translation_types()]
+
+        if len(translation_type_ids) == 1:
+            # Один тип перевода: все ключи в одном условии @>
+            return queryset.filter(pair_type_keys__contains=[
+                pair_type_key(pair_id, translation_type_ids[0]) for pair_id in pair_ids
+            ])
+
+        for pair_id in pair_ids:
+            queryset = queryset.filter(pair_type_keys__overlap=[
+                pair_type_key(pair_id, translation_type_id) for translation_type_id in translation_type_ids
+            ])
         return queryset
 
     def _filter_by_languages(self, queryset: QuerySet) -> QuerySet:
@@ -61,16 +189,13 @@ class InterpreterSearchService:
         Returns:
             Отфильтрованный QuerySet
         """
-        order_languages = self.order.languages.all()
+        language_ids = list(self.order.languages.values_list('id', flat=True))
 
-        if not order_languages.exists():
+        if not language_ids:
             return queryset
 
-        # Переводчик должен владеть всеми языками заказа
-        for language in order_languages:
-            queryset = queryset.filter(language=language)
-
-        return queryset
+        # Переводчик должен владеть всеми языками заказа (GIN индекс по массиву)
+        return queryset.filter(language_ids__contains=language_ids)
 
     def _filter_by_translation_types(self, queryset: QuerySet) -> QuerySet:
         """
@@ -82,21 +207,21 @@ class InterpreterSearchService:
         Returns:
             Отфильтрованный QuerySet
         """
-        translation_types = self.order.translation_types.all()
+        translation_type_ids = list(self.order.translation_types.values_list('id', flat=True))
 
-        if not translation_types.exists():
+        if not translation_type_ids:
             return queryset
 
         # Переводчик должен владеть хотя бы одним типом перевода из заказа
-        queryset = queryset.filter(translation_type__in=translation_types)
-
-        return queryset
+        return queryset.filter(translation_type_ids__overlap=translation_type_ids)
 
     def _filter_by_location(self, queryset: QuerySet) -> QuerySet:
         """
         Фильтрация по локации
 
-        Для onsite заказов - переводчики из того же города
+        Для onsite заказов - переводчики из того же города, а если у города есть
+        координаты - еще и готовые к выезду переводчики в пределах bounding box
+        радиуса TRAVEL_MAX_RADIUS_KM (индекс search_proj_travel_box)
         Для online заказов - все переводчики
 
         Args:
@@ -106,12 +231,21 @@ class InterpreterSearchService:
             Отфильтрованный QuerySet
         """
         if self.order.location_type == Order.LocationType.ONSITE:
-            if self.order.city:
-                queryset = queryset.filter(city=self.order.city)
-            else:
+            if not self.order.city_id:
                 # Если город не указан для onsite, вернуть пустой queryset
                 return queryset.none()
 
+            city = self._order_city()
+            if city is None:
+                return queryset.filter(city_id=self.order.city_id)
+
+            min_lat, max_lat, min_lng, max_lng = bounding_box(city.latitude, city.longitude,
+                                                              settings.TRAVEL_MAX_RADIUS_KM)
+            queryset = queryset.filter(
+                Q(city_id=self.order.city_id)
+                | Q(is_ready_for_trips=True, latitude__range=(min_lat, max_lat), longitude__range=(min_lng, max_lng))
+            )
+
         # Для online заказов не фильтруем по локации
         return queryset
 
@@ -119,7 +253,9 @@ class InterpreterSearchService:
         """
         Исключить переводчиков с конфликтующими записями Availability
 
-        Для каждого временного слота заказа проверяем пересечение с BUSY записями
+        Для каждого временного слота заказа проверяем пересечение с BUSY записями:
+        по битовой матрице занятости процесса (AvailabilityMatrix), а если она
+        недоступна - NOT EXISTS по Availability
 
         Args:
             queryset: QuerySet переводчиков
@@ -127,27 +263,28 @@ class InterpreterSearchService:
         Returns:
             Отфильтрованный QuerySet
         """
-        # Получить все временные диапазоны из выбранных слотов
-        slot_ranges = self._convert_slots_to_datetime_ranges(self.order.selected_slots)
+        slot_ranges = self._slot_ranges()
 
-        if not slot_ranges:
-            # Если нет слотов, использовать start_datetime и end_datetime
-            slot_ranges = [{
-                'start': self.order.start_datetime,
-                'end': self.order.end_datetime
-            }]
+        # Битовая матрица занятости процесса: без запроса к Availability
+        busy_ids = AvailabilityMatrix.busy_interpreters(slot_ranges)
+        if busy_ids is not None:
+            return queryset.exclude(interpreter_id__in=busy_ids) if busy_ids else queryset
 
         # Построить Q объект для проверки пересечений
         conflicts = Q()
-        for slot_range in slot_ranges:
+        for start, end in slot_ranges:
             conflicts |= Q(
-                availabilities__type='BUSY',
-                availabilities__start_datetime__lt=slot_range['end'],
-                availabilities__end_datetime__gt=slot_range['start']
+                start_datetime__lt=end,
+                end_datetime__gt=start
             )
 
-        # Исключить переводчиков с конфликтами
-        return queryset.exclude(conflicts)
+        # Исключить переводчиков с конфликтами (NOT EXISTS по Availability)
+        busy = Availability.objects.filter(
+            conflicts,
+            translator_id=OuterRef('interpreter_id'),
+            type=Availability.AvailabilityType.BUSY,
+        )
+        return queryset.exclude(Exists(busy))
 
     def _filter_by_gender(self, queryset: QuerySet) -> QuerySet:
         """
@@ -165,6 +302,46 @@ class InterpreterSearchService:
 
         return queryset
 
+    def _filter_by_travel_distance(self, queryset: QuerySet) -> QuerySet:
+        """
+        Оставить из других городов только тех, до кого не дальше их travel_radius_km
+
+        Кандидаты из bounding box (уже после остальных фильтров) выбираются
+        одним запросом, расстояние считается векторно в NumPy. Переводчики
+        города заказа не выбираются и считаются на расстоянии 0.
+
+        Args:
+            queryset: QuerySet переводчиков
+
+        Returns:
+            QuerySet без переводчиков вне их радиуса выезда
+        """
+        city = self._order_city()
+        if city is None:
+            return queryset
+
+        rows = list(queryset.exclude(city_id=city.id).values_list('interpreter_id', 'latitude', 'longitude',
+                                                                  'travel_radius_km'))
+        self.distances = {}
+        if not rows:
+            return queryset
+
+        interpreter_ids, latitudes, longitudes, radii = zip(*rows)
+        distances = haversine_km(city.latitude, city.longitude,
+                                 np.array(latitudes, dtype=np.float64), np.array(longitudes, dtype=np.float64))
+        reachable = distances <= np.minimum(np.array(radii, dtype=np.float64), settings.TRAVEL_MAX_RADIUS_KM)
+
+        self.distances = {interpreter_ids[i]: float(distances[i]) for i in np.flatnonzero(reachable)}
+        rejected = [interpreter_ids[i] for i in np.flatnonzero(~reachable)]
+        return queryset.exclude(interpreter_id__in=rejected) if rejected else queryset
+
+    def _slot_ranges(self) -> List[Tuple[datetime, datetime]]:
+        """Интервалы (start, end) выбранных слотов, без слотов - начало и конец заказа"""
+        slot_ranges = self._convert_slots_to_datetime_ranges(self.order.selected_slots)
+        if not slot_ranges:
+            return [(self.order.start_datetime, self.order.end_datetime)]
+        return [(slot_range['start'], slot_range['end']) for slot_range in slot_ranges]
+
     def _convert_slots_to_datetime_ranges(self, selected_slots: List[str]) -> List[dict]:
         """
         Преобразует слоты в список datetime диапазонов
@@ -178,11 +355,6 @@ class InterpreterSearchService:
         if not selected_slots:
             return []
 
-        SLOT_TIMES = {
-            'morning': ('09:00', '14:00'),
-            'evening': ('14:00', '18:00')
-        }
-
         ranges = []
         for slot in selected_slots:
             try:
@@ -0,0 +1,166 @@
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from apps.models import Booking, OfferWavePlan, Order
+from apps.services.outbox import Outbox
+
+logger = logging.getLogger(__name__)
+
+PENDING_STATUSES = (Order.OrderStatus.NEW, Order.OrderStatus.SEARCHING, Order.OrderStatus.PARTIALLY_ASSIGNED)
+FILLED_STATUSES = (Order.OrderStatus.ASSIGNED, Order.OrderStatus.IN_PROGRESS, Order.OrderStatus.COMPLETED)
+
+
+class OfferWaves:
+    """
+    Рассылка оферов волнами вместо всех выбранных переводчиков сразу
+
+    Выбранные переводчики (в порядке ранжирования) сохраняются очередью в
+    OfferWavePlan. Волна отправляет оферы следующим wave_size переводчикам на
+    каждое свободное место заказа; следующая волна уходит через
+    OFFER_WAVE_TIMEOUT_MINUTES или сразу после отказа, пока заказ не заполнится
+    или очередь не закончится. Таймеры волн - сообщения outbox с available_at
+    (задача dispatch_offer_wave); волна с номером, уже отправленным раньше,
+    игнорируется, поэтому таймер и отказ не отправят одну волну дважды.
+    """
+
+    @classmethod
+    def start(cls, order: Order, interpreter_ids: List, wave_size: Optional[int] = None) -> dict:
+        """
+        Сохранить очередь кандидатов заказа и отправить первую волну
+
+        Повторный вызов заменяет очередь и продолжает нумерацию волн.
+
+        Args:
+            order: Заказ
+            interpreter_ids: ID переводчиков в порядке ранжирования
+            wave_size: Оферов в волне на свободное место (по умолчанию OFFER_WAVE_SIZE)
+
+        Returns:
+            dict со статистикой отправки первой волны (как у send_offers) и длиной очереди
+        """
+        with transaction.atomic():
+            contacted = set(Booking.objects.filter(order=order).values_list('interpreter_id', flat=True))
+            queue = []
+            for interpreter_id in map(uuid.UUID, map(str, interpreter_ids)):
+                if interpreter_id not in contacted and interpreter_id not in queue:
+                    queue.append(interpreter_id)
+
+            plan, _ = OfferWavePlan.objects.update_or_create(
+                order=order,
+                defaults={'queue': queue, 'wave_size': wave_size or settings.OFFER_WAVE_SIZE, 'finished_at': None},
+            )
+            sent_count, expires_at = cls.dispatch(order.id, plan.waves_sent + 1)
+
+        order.refresh_from_db(fields=['status', 'accepted_count'])
+        return {
+            'sent_count': sent_count,
+            'order_status': order.status,
+            'expires_at': expires_at,
+            'queued_count': max(len(queue) - sent_count, 0),
+        }
+
+    @classmethod
+    def dispatch(cls, order_id, wave: int) -> Tuple[int, Optional[datetime]]:
+        """
+        Отправить волну оферов
+
+        Args:
+            order_id: ID заказа
+            wave: Номер волны (отправляется, только если предыдущая - последняя отправленная)
+
+        Returns:
+            (число отправленных оферов, время их истечения или None)
+        """
+        from apps.services.order_workflow import OrderWorkflowService
+        from apps.tasks.assignment_tasks import dispatch_offer_wave
+
+        now = timezone.now()
+        with transaction.atomic():
+            plan = OfferWavePlan.objects.select_for_update().filter(order_id=order_id).first()
+            if plan is None or plan.finished_at is not None or plan.waves_sent != wave - 1:
+                return 0, None
+
+            order = Order.objects.get(id=order_id)
+            open_slots = order.required_count - order.accepted_count
+            if order.status not in PENDING_STATUSES or open_slots <= 0 or not plan.queue \
+                    or order.start_datetime <= now:
+                plan.finished_at = now
+                plan.save(update_fields=['finished_at'])
+                logger.info(f"Offer waves for order {order_id} finished after {plan.waves_sent} waves, "
+                            f"{plan.offers_sent} offers")
+                return 0, None
+
+            # wave_size оферов на каждое свободное место (у синхронного заказа мест не меньше двух)
+            batch = plan.queue[:plan.wave_size * open_slots]
+            sent_count, expires_at = OrderWorkflowService(order).create_offers(batch)
+
+            plan.queue = plan.queue[len(batch):]
+            plan.waves_sent = wave
+            plan.offers_sent += sent_count
+            plan.save(update_fields=['queue', 'waves_sent', 'offers_sent'])
+
+            # Таймер следующей волны; если очередь пуста, он только завершит план
+            order_id = str(order_id)
+            Outbox.enqueue(dispatch_offer_wave, [order_id, wave + 1],
+                           available_at=now + timedelta(minutes=settings.OFFER_WAVE_TIMEOUT_MINUTES),
+                           dedup_key=f'offer_wave:{order_id}:{wave + 1}')
+
+        logger.info(f"Sent offer wave {wave} ({sent_count} offers) for order {order_id}")
+        return sent_count, expires_at
+
+    @staticmethod
+    def widen(order_id):
+        """
+        Отправить следующую волну сразу, не дожидаясь таймаута (отказ переводчика)
+
+        Вызывается в транзакции ответа: сообщение outbox коммитится вместе с отказом.
+        Несколько отказов в одной волне открывают следующую волну один раз.
+        """
+        from apps.tasks.assignment_tasks import dispatch_offer_wave
+
+        waves_sent = OfferWavePlan.objects.filter(order_id=order_id, finished_at__isnull=True).values_list(
+            'waves_sent', flat=True).first()
+        if waves_sent is None:
+            return
+        order_id = str(order_id)
+        Outbox.enqueue(dispatch_offer_wave, [order_id, waves_sent + 1],
+                       dedup_key=f'offer_wave:{order_id}:{waves_sent + 1}:declined')
+
+    @staticmethod
+    def metrics(since: datetime) -> dict:
+        """
+        Оферы на заполненный заказ: волны против рассылки всем сразу
+
+        Args:
+            since: Заказы, созданные начиная с этого времени
+
+        Returns:
+            {'waves': {...}, 'broadcast': {...}} - заказы, заполненные заказы, оферы,
+            отмененные оферы и оферы на заполненный заказ
+        """
+        rows = (
+            Order.objects.filter(created_at__gte=since)
+            .annotate(waves=Exists(OfferWavePlan.objects.filter(order_id=OuterRef('pk'))))
+            .values('waves')
+            .annotate(
+                orders=Count('id', distinct=True),
+                filled=Count('id', distinct=True, filter=Q(status__in=FILLED_STATUSES)),
+                offers=Count('bookings'),
+                filled_offers=Count('bookings', filter=Q(status__in=FILLED_STATUSES)),
+                cancelled=Count('bookings', filter=Q(bookings__status=Booking.Status.CANCELED)),
+            )
+        )
+        metrics = {mode: {'orders': 0, 'filled': 0, 'offers': 0, 'cancelled': 0, 'offers_per_filled_order': 0.0}
+                   for mode in ('waves', 'broadcast')}
+        for row in rows:
+            mode = metrics['waves' if row['waves'] else 'broadcast']
+            mode.update(orders=row['orders'], filled=row['filled'], offers=row['offers'], cancelled=row['cancelled'])
+            mode['offers_per_filled_order'] = row['filled_offers'] / row['filled'] if row['filled'] else 0.0
+        return metrics
@@ -0,0 +1,92 @@
+import json
+import logging
+from typing import Optional
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+from apps.models import Order
+from apps.services.event_hub import EventHub
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'order_events'
+
+# Заказы, которые клиент видит в живом потоке при подключении
+ACTIVE_STATUSES = (
+    Order.OrderStatus.NEW,
+    Order.OrderStatus.SEARCHING,
+    Order.OrderStatus.PARTIALLY_ASSIGNED,
+    Order.OrderStatus.ASSIGNED,
+)
+
+
+class OrderEvents:
+    """
+    Публикация изменений заказа в Redis pub/sub (канал order_events)
+
+    Событие отправляется после коммита и содержит состояние заказа из БД на
+    этот момент, поэтому порядок событий одного заказа не важен: последнее
+    всегда актуально. Доставка best-effort - при переподключении поток
+    начинается со снимка заказов клиента.
+    """
+
+    _client: Optional[redis.Redis] = None
+
+    @classmethod
+    def client(cls) -> redis.Redis:
+        if cls._client is None:
+            cls._client = redis.Redis.from_url(settings.CACHES['default']['LOCATION'])
+        return cls._client
+
+    @classmethod
+    def publish(cls, order_id, event: str, **extra):
+        """
+        Опубликовать событие заказа после коммита текущей транзакции
+
+        Args:
+            order_id: ID заказа
+            event: Тип события ('offers_sent', 'interpreter_accepted', 'offers_expired', ...)
+            **extra: Дополнительные поля события
+        """
+        transaction.on_commit(lambda: cls._publish_now(order_id, event, extra))
+
+    @classmethod
+    def _publish_now(cls, order_id, event: str, extra: dict):
+        state = cls.order_state(order_id)
+        if state is None:
+            return
+        try:
+            cls.client().publish(CHANNEL, json.dumps({**state, **extra, 'event': event}))
+        except redis.RedisError as e:
+            logger.warning(f"Failed to publish {event} for order {order_id}: {e}")
+
+    @staticmethod
+    def order_state(order_id) -> Optional[dict]:
+        order = Order.objects.filter(id=order_id).values(
+            'id', 'client_id', 'status', 'accepted_count', 'required_count', 'updated_at'
+        ).first()
+        return OrderEvents._serialize(order) if order else None
+
+    @staticmethod
+    def snapshot(client_id) -> list:
+        """Состояние активных заказов клиента: первое событие потока"""
+        orders = Order.objects.filter(client_id=client_id, status__in=ACTIVE_STATUSES).values(
+            'id', 'client_id', 'status', 'accepted_count', 'required_count', 'updated_at'
+        ).order_by('-created_at')
+        return [OrderEvents._serialize(order) for order in orders]
+
+    @staticmethod
+    def _serialize(order: dict) -> dict:
+        return {
+            'order_id': str(order['id']),
+            'client_id': str(order['client_id']),
+            'status': order['status'],
+            'accepted_count': order['accepted_count'],
+            'required_count': order['required_count'],
+            'updated_at': order['updated_at'].isoformat(),
+        }
+
+
+hub = EventHub(CHANNEL, 'client_id')
@@ -1,14 +1,25 @@
 import logging
-from datetime import timedelta
-from typing import List
-
-from django.db import transaction
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import (Case, Count, Exists, OuterRef,
+                              PositiveSmallIntegerField, Subquery, Value, When)
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
 
-from apps.models import Booking, Order, OrderInterpreter
+from apps.models import Booking, OfferWavePlan, Order, OrderInterpreter
+from apps.services.order_events import OrderEvents
+from apps.services.outbox import Outbox
+from apps.services.partitioning import lock_unique_key
+from apps.services.reference_data import ReferenceData
 
 logger = logging.getLogger(__name__)
 
+# Тип перевода, название которого содержит эту строку, требует минимум 2 переводчиков
+SYNCHRONOUS_TYPE_MARKER = 'synchronous'
+
 
 class OrderWorkflowService:
     """Сервис для управления workflow заказа"""
@@ -27,78 +38,128 @@ class OrderWorkflowService:
         Returns:
             dict с результатами поиска
         """
+        # Определить количество нужных переводчиков один раз при создании
+        # Для синхронного перевода нужно минимум 2 переводчика
+        required_count = max(self.order.interpreter_count, 2 if self._is_synchronous_translation() else 1)
+
         # Сохранить заказ
         self.order.status = Order.OrderStatus.NEW
+        self.order.required_count = required_count
         self.order.save()
+        OrderEvents.publish(self.order.id, 'created')
 
         # Запустить поиск
         from apps.services.interpreter_search import InterpreterSearchService
         search_service = InterpreterSearchService(self.order)
         interpreters = search_service.find_available_interpreters()
+        found_count = interpreters.count()
 
-        # Определить количество нужных переводчиков
-        # Для синхронного перевода нужно 2 переводчика
-        required_count = 2 if self._is_synchronous_translation() else 1
+        logger.info(f"Found {found_count} available interpreters for order {self.order.id}")
 
         return {
             'order_id': str(self.order.id),
             'interpreters': interpreters,
             'required_count': required_count,
-            'found_count': interpreters.count()
+            'found_count': found_count,
+            'distances': search_service.distances
         }
 
-    def send_offers(self, interpreter_ids: List[str]) -> dict:
+    def send_offers(self, interpreter_ids: List[str], waves: Optional[bool] = None) -> dict:
         """
         Отправить оферы выбранным переводчикам
 
         Args:
-            interpreter_ids: Список ID переводчиков
+            interpreter_ids: Список ID переводчиков (в порядке ранжирования)
+            waves: Рассылать волнами (OfferWaves); None - по настройке OFFER_WAVES_ENABLED
 
         Returns:
             dict со статистикой отправки
         """
+        if waves is None:
+            waves = settings.OFFER_WAVES_ENABLED
+        if waves:
+            from apps.services.offer_waves import OfferWaves
+            return OfferWaves.start(self.order, interpreter_ids)
+
+        # Бронирования и сообщения outbox коммитятся вместе: воркер не увидит офер без Booking
+        with transaction.atomic():
+            sent_count, expires_at = self.create_offers(interpreter_ids)
+
+        self.order.refresh_from_db(fields=['status', 'accepted_count'])
+
+        logger.info(f"Sent {sent_count} offers for order {self.order.id}")
+
+        return {
+            'sent_count': sent_count,
+            'order_status': self.order.status,
+            'expires_at': expires_at
+        }
+
+    def create_offers(self, interpreter_ids: List) -> Tuple[int, datetime]:
+        """
+        Создать оферы и сообщения outbox (вызывать внутри transaction.atomic)
+
+        Переводчики, которым офер по заказу уже отправлен, пропускаются.
+
+        Args:
+            interpreter_ids: ID переводчиков
+
+        Returns:
+            (число созданных оферов, время их истечения)
+        """
         from apps.tasks.telegram_tasks import (expire_order_offers,
                                                send_order_offer_notification)
 
         # Время истечения: текущее время + 3 часа
         expires_at = timezone.now() + timedelta(hours=3)
+        order_id = str(self.order.id)
+
+        # Booking секционирована по offered_at, и unique(order, interpreter) в БД
+        # включает offered_at: повторный офер исключает блокировка заказа
+        lock_unique_key(Booking, order_id)
+        offered = {str(interpreter_id) for interpreter_id in
+                   Booking.objects.filter(order=self.order).values_list('interpreter_id', flat=True)}
 
-        sent_count = 0
+        bookings = []
         for interpreter_id in interpreter_ids:
+            if str(interpreter_id) in offered:
+                continue
             # Создать Booking
-            booking = Booking.objects.create(
+            bookings.append(Booking.objects.create(
                 order=self.order,
                 interpreter_id=interpreter_id,
                 status=Booking.Status.OFFERED,
                 offer_expires_at=expires_at,
                 rate=0  # TODO: Рассчитать ставку на основе заказа
-            )
-
-            # Отправить Telegram уведомление
-            send_order_offer_notification.delay(str(booking.id))
-            sent_count += 1
-
-        # Обновить статус заказа
-        self.order.status = Order.OrderStatus.SEARCHING
-        self.order.save()
-
-        # Запланировать истечение оферов через 3 часа
-        expire_order_offers.apply_async(
-            args=[str(self.order.id)],
-            countdown=3 * 60 * 60  # 3 часа в секундах
+            ))
+            offered.add(str(interpreter_id))
+
+        # Telegram уведомления: релей объединит их в пакетные задачи
+        Outbox.enqueue_many(
+            send_order_offer_notification,
+            [[str(booking.id)] for booking in bookings],
+            [f'offer:{booking.id}' for booking in bookings],
         )
 
-        logger.info(f"Sent {sent_count} offers for order {self.order.id}")
+        # Обновить статус заказа (без полного save, чтобы не затереть accepted_count)
+        Order.objects.filter(
+            id=self.order.id,
+            status=Order.OrderStatus.NEW
+        ).update(status=Order.OrderStatus.SEARCHING, updated_at=timezone.now())
 
-        return {
-            'sent_count': sent_count,
-            'order_status': self.order.status,
-            'expires_at': expires_at
-        }
+        # Истечение оферов через 3 часа: релей опубликует сообщение в срок
+        Outbox.enqueue(expire_order_offers, [order_id], available_at=expires_at,
+                       dedup_key=f'expire_order_offers:{order_id}:{expires_at.timestamp():.0f}')
+        OrderEvents.publish(order_id, 'offers_sent', sent_count=len(bookings))
+        return len(bookings), expires_at
 
     def handle_interpreter_response(self, booking_id: str, accepted: bool) -> dict:
         """
-        Обработать ответ переводчика на офер (с database lock для race condition)
+        Обработать ответ переводчика на офер
+
+        Вместо блокировки строк заказа и бронирования используются условные UPDATE:
+        офер переводится из OFFERED только один раз, а место в заказе занимается
+        атомарным увеличением accepted_count, пока он меньше required_count.
 
         Args:
             booking_id: ID бронирования
@@ -107,72 +168,98 @@ class OrderWorkflowService:
         Returns:
             dict с результатом обработки
         """
+        now = timezone.now()
+        new_status = Booking.Status.ACCEPTED if accepted else Booking.Status.DECLINED
+
         with transaction.atomic():
-            # Получить booking с блокировкой строки
-            booking = Booking.objects.select_for_update().get(id=booking_id)
+            booking = Booking.objects.only('id', 'order_id', 'interpreter_id', 'is_expired').get(id=booking_id)
 
             # Проверить, не истек ли офер
             if booking.is_expired:
                 return {'success': False, 'message': 'Время для принятия заказа истекло'}
 
-            booking.responded_at = timezone.now()
+            # Перевести офер из OFFERED (ровно один раз)
+            responded = Booking.objects.filter(
+                id=booking_id,
+                status=Booking.Status.OFFERED,
+                is_expired=False
+            ).update(status=new_status, responded_at=now)
+
+            if not responded:
+                return {'success': False, 'message': 'Офер уже недействителен'}
 
-            if accepted:
-                # Получить заказ с блокировкой
-                order = Order.objects.select_for_update().get(id=booking.order_id)
+            if not accepted:
+                # Волновая рассылка: отказ открывает следующую волну, не дожидаясь таймаута
+                from apps.services.offer_waves import OfferWaves
+                OfferWaves.widen(booking.order_id)
+                logger.info(f"Interpreter {booking.interpreter_id} declined order {booking.order_id}")
+                return {'success': True, 'message': 'Вы отклонили заказ'}
 
-                # Проверить, не принят ли уже заказ
-                required_count = 2 if self._is_synchronous_translation() else 1
-                current_count = order.interpreters.count()
+            # Занять место в заказе
+            claim = self._claim_order_slot(booking.order_id, now)
+            if claim is None:
+                # Все места уже заняты - откатить перевод офера в ACCEPTED
+                transaction.set_rollback(True)
+                return {'success': False, 'message': 'Заказ уже принят другим переводчиком'}
 
-                if current_count >= required_count:
-                    return {'success': False, 'message': 'Заказ уже принят другим переводчиком'}
+            accepted_count, required_count = claim
 
-                # Принять заказ
-                booking.status = Booking.Status.ACCEPTED
-                booking.save()
+            # Создать связь OrderInterpreter
+            OrderInterpreter.objects.create(order_id=booking.order_id, interpreter_id=booking.interpreter_id)
 
-                # Создать связь OrderInterpreter
-                OrderInterpreter.objects.create(
-                    order=order,
-                    interpreter=booking.interpreter,
-                    rate=booking.rate
+            is_filled = accepted_count >= required_count
+            if is_filled:
+                OfferWavePlan.objects.filter(order_id=booking.order_id, finished_at__isnull=True).update(
+                    finished_at=now
+                )
+                # Отменить все остальные оферы
+                Booking.objects.filter(
+                    order_id=booking.order_id,
+                    status=Booking.Status.OFFERED
+                ).exclude(id=booking_id).update(
+                    status=Booking.Status.CANCELED,
+                    is_expired=True
                 )
 
-                # Обновить статус заказа
-                new_count = current_count + 1
-                if new_count >= required_count:
-                    order.status = Order.OrderStatus.ASSIGNED
-                    # Отменить все остальные оферы
-                    Booking.objects.filter(
-                        order=order,
-                        status=Booking.Status.OFFERED
-                    ).exclude(id=booking_id).update(
-                        status=Booking.Status.CANCELED,
-                        is_expired=True
-                    )
-                else:
-                    order.status = Order.OrderStatus.PARTIALLY_ASSIGNED
-
-                order.save()
-
-                # Уведомления
-                from apps.tasks.telegram_tasks import (
-                    notify_client, notify_other_interpreters)
-                notify_client.delay(str(order.id), 'interpreter_accepted')
-                if order.status == Order.OrderStatus.ASSIGNED:
-                    notify_other_interpreters.delay(str(order.id), str(booking.id))
-
-                logger.info(f"Interpreter {booking.interpreter_id} accepted order {order.id}")
-                return {'success': True, 'message': 'Вы приняли заказ!'}
-
-            else:
-                # Отклонить заказ
-                booking.status = Booking.Status.DECLINED
-                booking.save()
-
-                logger.info(f"Interpreter {booking.interpreter_id} declined order {self.order.id}")
-                return {'success': True, 'message': 'Вы отклонили заказ'}
+            # Уведомления - через outbox в этой же транзакции
+            from apps.tasks.telegram_tasks import (notify_client,
+                                                   notify_other_interpreters)
+            order_id = str(booking.order_id)
+            Outbox.enqueue(notify_client, [order_id, 'interpreter_accepted'],
+                           dedup_key=f'notify_client:{order_id}:interpreter_accepted:{booking_id}')
+            if is_filled:
+                Outbox.enqueue(notify_other_interpreters, [order_id, str(booking_id)],
+                               dedup_key=f'notify_other_interpreters:{order_id}')
+            OrderEvents.publish(order_id, 'interpreter_accepted')
+
+        logger.info(f"Interpreter {booking.interpreter_id} accepted order {booking.order_id} "
+                    f"({accepted_count}/{required_count})")
+        return {'success': True, 'message': 'Вы приняли заказ!'}
+
+    def _claim_order_slot(self, order_id, now) -> Optional[Tuple[int, int]]:
+        """
+        Атомарно занять место в заказе
+
+        UPDATE ... SET accepted_count = accepted_count + 1
+        WHERE accepted_count < required_count RETURNING ...
+
+        Returns:
+            (accepted_count, required_count) после увеличения или None, если мест нет
+        """
+        table = Order._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table}
+                SET accepted_count = accepted_count + 1,
+                    status = CASE WHEN accepted_count + 1 >= required_count THEN %s ELSE %s END,
+                    updated_at = %s
+                WHERE id = %s AND accepted_count < required_count
+                RETURNING accepted_count, required_count
+                """,
+                [Order.OrderStatus.ASSIGNED, Order.OrderStatus.PARTIALLY_ASSIGNED, now, order_id]
+            )
+            return cursor.fetchone()
 
     def _is_synchronous_translation(self) -> bool:
         """
@@ -181,5 +268,33 @@ class OrderWorkflowService:
         Returns:
             bool: True если синхронный перевод
         """
-        # Проверить типы перевода заказа
-        return self.order.translation_types.filter(name__icontains='synchronous').exists()
+        # Проверить типы перевода заказа (названия берутся из справочника в памяти)
+        names = ReferenceData.translation_type_names(self.order.translation_types.values_list('id', flat=True))
+        return any(SYNCHRONOUS_TYPE_MARKER in name.lower() for name in names)
+
+    @staticmethod
+    def backfill_counters() -> Tuple[int, int]:
+        """
+        Заполнить required_count и accepted_count заказов, созданных до появления счетчиков
+
+        required_count считается по тому же правилу, что и в create_and_search,
+        accepted_count - по принятым бронированиям. Обновляются только строки
+        с отличающимся значением, поэтому повторный запуск ничего не меняет.
+
+        Returns:
+            (обновлено required_count, обновлено accepted_count)
+        """
+        synchronous = Exists(Order.translation_types.through.objects.filter(
+            order_id=OuterRef('pk'), translationtype__name__icontains=SYNCHRONOUS_TYPE_MARKER
+        ))
+        required = Greatest('interpreter_count', Case(When(synchronous, then=Value(2)), default=Value(1)),
+                            output_field=PositiveSmallIntegerField())
+        accepted = Coalesce(Subquery(
+            Booking.objects.filter(order_id=OuterRef('pk'), status=Booking.Status.ACCEPTED)
+            .values('order_id').annotate(count=Count('pk')).values('count')
+        ), 0, output_field=PositiveSmallIntegerField())
+
+        with transaction.atomic():
+            required_updated = Order.objects.exclude(required_count=required).update(required_count=required)
+            accepted_updated = Order.objects.exclude(accepted_count=accepted).update(accepted_count=accepted)
+        return required_updated, accepted_updated
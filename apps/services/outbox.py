@@ -0,0 +1,184 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Iterable, List, Optional
+
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+# Задачи, сообщения которых релей объединяет в один вызов пакетной задачи.
+# Пакетная задача получает список args отдельных сообщений.
+BATCH_TASKS = {
+    'apps.tasks.telegram_tasks.send_order_offer_notification':
+        'apps.tasks.telegram_tasks.send_order_offer_notifications',
+}
+
+
+def task_name(task) -> str:
+    return task if isinstance(task, str) else task.name
+
+
+class Outbox:
+    """
+    Запись вызовов задач Celery в outbox вместо .delay()
+
+    Вызывается внутри transaction.atomic изменения состояния: сообщение
+    коммитится (или откатывается) вместе с данными, которые читает задача.
+    """
+
+    @classmethod
+    def enqueue(cls, task, args: Iterable = (), kwargs: Optional[dict] = None,
+                dedup_key: Optional[str] = None, available_at=None) -> bool:
+        """
+        Добавить вызов задачи в outbox
+
+        Args:
+            task: Задача Celery или ее имя
+            args: Позиционные аргументы (JSON-сериализуемые)
+            kwargs: Именованные аргументы
+            dedup_key: Ключ дедупликации: повторное сообщение с тем же ключом не записывается
+            available_at: Опубликовать не раньше этого времени (вместо countdown)
+
+        Returns:
+            True, если сообщение записано (False - дубль по dedup_key)
+        """
+        return cls.enqueue_many(task, [args], [dedup_key], kwargs=kwargs, available_at=available_at) == 1
+
+    @classmethod
+    def enqueue_many(cls, task, args_list: List[Iterable], dedup_keys: Optional[List[Optional[str]]] = None,
+                     kwargs: Optional[dict] = None, available_at=None) -> int:
+        """
+        Добавить несколько вызовов одной задачи одним INSERT
+
+        Returns:
+            Количество записанных сообщений без учета дублей
+        """
+        dedup_keys = dedup_keys or [None] * len(args_list)
+        messages = [
+            OutboxMessage(task=task_name(task), args=list(args), kwargs=kwargs or {}, dedup_key=dedup_key,
+                          available_at=available_at or timezone.now())
+            for args, dedup_key in zip(args_list, dedup_keys)
+        ]
+        if not any(dedup_keys):
+            return len(OutboxMessage.objects.bulk_create(messages))
+
+        # ON CONFLICT DO NOTHING не возвращает пропущенные строки: считаем по ключам
+        keys = [key for key in dedup_keys if key]
+        existing = set(OutboxMessage.objects.filter(dedup_key__in=keys).values_list('dedup_key', flat=True))
+        OutboxMessage.objects.bulk_create(messages, ignore_conflicts=True)
+        return sum(1 for key in dedup_keys if key is None or key not in existing)
+
+
+class OutboxRelay:
+    """
+    Публикация сообщений outbox в брокер
+
+    Пачка неопубликованных сообщений выбирается с FOR UPDATE SKIP LOCKED,
+    поэтому несколько релеев не публикуют одно сообщение одновременно.
+    Сообщения задач из BATCH_TASKS объединяются в один вызов пакетной
+    задачи, остальные публикуются по одному с task_id = id сообщения.
+    Если процесс упал после публикации, но до коммита, пачка будет
+    опубликована повторно - отсюда требование идемпотентности задач.
+    """
+
+    @classmethod
+    def relay_batch(cls, batch_size: Optional[int] = None, group: bool = True) -> dict:
+        """
+        Опубликовать одну пачку готовых сообщений
+
+        Args:
+            batch_size: Размер пачки (по умолчанию OUTBOX_BATCH_SIZE)
+            group: Объединять сообщения BATCH_TASKS в пакетные задачи
+
+        Returns:
+            dict: messages - обработано сообщений, broker_calls - публикаций, failed - ошибок
+
+        Сообщение, которое не удалось опубликовать OUTBOX_MAX_ATTEMPTS раз,
+        больше не публикуется и остается в БД с last_error.
+        """
+        import apps.tasks  # noqa: F401 - регистрация задач в current_app.tasks
+
+        now = timezone.now()
+        with transaction.atomic():
+            messages = list(
+                OutboxMessage.objects.select_for_update(skip_locked=True)
+                .filter(processed_at__isnull=True, available_at__lte=now,
+                        attempts__lt=settings.OUTBOX_MAX_ATTEMPTS)
+                .order_by('available_at')[:batch_size or settings.OUTBOX_BATCH_SIZE]
+            )
+
+            grouped = defaultdict(list)
+            calls = []
+            for message in messages:
+                if group and message.task in BATCH_TASKS and not message.kwargs:
+                    grouped[BATCH_TASKS[message.task]].append(message)
+                else:
+                    calls.append((message.task, message.args, message.kwargs, str(message.id), [message]))
+            for batch_task, batch in grouped.items():
+                calls.append((batch_task, [[message.args for message in batch]], {}, None, batch))
+
+            published, failed = [], {}
+            for name, args, kwargs, task_id, batch in calls:
+                try:
+                    current_app.tasks[name].apply_async(args=args, kwargs=kwargs, task_id=task_id)
+                    published += [message.id for message in batch]
+                except Exception as e:
+                    logger.error(f"Outbox publish of {name} failed: {e}")
+                    failed.update({message.id: (message, str(e)) for message in batch})
+
+            OutboxMessage.objects.filter(id__in=published).update(processed_at=now)
+            for message_id, (message, error) in failed.items():
+                OutboxMessage.objects.filter(id=message_id).update(
+                    attempts=F('attempts') + 1,
+                    last_error=error,
+                    available_at=now + timedelta(seconds=settings.OUTBOX_RETRY_SECONDS),
+                )
+                if message.attempts + 1 >= settings.OUTBOX_MAX_ATTEMPTS:
+                    logger.error(f"Outbox message {message_id} ({message.task}{message.args}) dropped after "
+                                 f"{settings.OUTBOX_MAX_ATTEMPTS} failed publishes: {error}")
+
+        return {'messages': len(messages), 'broker_calls': len(calls), 'failed': len(failed)}
+
+    @classmethod
+    def drain(cls, batch_size: Optional[int] = None, group: bool = True) -> dict:
+        """Публиковать пачки, пока есть готовые сообщения без ошибок"""
+        totals = {'messages': 0, 'broker_calls': 0, 'failed': 0}
+        while True:
+            result = cls.relay_batch(batch_size, group=group)
+            for key, value in result.items():
+                totals[key] += value
+            if not result['messages'] or result['failed']:
+                return totals
+
+    @classmethod
+    def purge(cls, older_than_days: Optional[int] = None, batch_size: int = 5000) -> int:
+        """
+        Удалить опубликованные сообщения старше OUTBOX_RETENTION_DAYS пачками по первичному ключу
+
+        Вместе с сообщениями освобождаются их dedup_key.
+
+        Returns:
+            Количество удаленных сообщений
+        """
+        days = settings.OUTBOX_RETENTION_DAYS if older_than_days is None else older_than_days
+        cutoff = timezone.now() - timedelta(days=days)
+
+        deleted_count = 0
+        while True:
+            batch_ids = list(
+                OutboxMessage.objects.filter(processed_at__lt=cutoff)
+                .order_by()
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not batch_ids:
+                return deleted_count
+
+            deleted, _ = OutboxMessage.objects.filter(id__in=batch_ids).delete()
+            deleted_count += deleted
@@ -0,0 +1,268 @@
+import logging
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+from typing import List, Optional
+
+from django.db import connections, transaction
+from django.db.models import Model
+
+from apps.models import Availability, Booking
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SCHEMA = 'archive'
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def lock_unique_key(model: type[Model], *values, using: str = 'default'):
+    """
+    Транзакционная advisory блокировка значения уникального ключа модели
+
+    Уникальные индексы секционированной таблицы включают ключ секционирования
+    и не запрещают дубликаты в разных секциях. Код записи берет эту
+    блокировку, проверяет существование строки и только потом вставляет.
+    Вызывать внутри transaction.atomic: блокировка снимается при завершении
+    транзакции.
+
+    Args:
+        model: Модель секционированной таблицы
+        values: Значения полей уникального ключа
+    """
+    key = ':'.join([model._meta.db_table, *map(str, values)])
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))', [key])
+
+
+class MonthlyPartitioner:
+    """
+    Декларативное RANGE секционирование таблицы модели по месяцам
+
+    Секции называются <table>_pYYYYMM, плюс <table>_default для строк вне
+    созданных секций. Первичный ключ и уникальные индексы в PostgreSQL обязаны
+    включать ключ секционирования, поэтому в БД они становятся составными
+    (id, column); в состоянии Django первичным ключом остается id. Уникальность
+    без ключа секционирования проверяется при записи (lock_unique_key).
+    """
+
+    def __init__(self, model: type[Model], column: str):
+        """
+        Args:
+            model: Модель, таблица которой секционируется
+            column: Колонка ключа секционирования (DateTimeField)
+        """
+        self.model = model
+        self.column = column
+        self.table = model._meta.db_table
+
+    def partition_name(self, month: date) -> str:
+        return f"{self.table}_p{month:%Y%m}"
+
+    @property
+    def default_partition(self) -> str:
+        return f"{self.table}_default"
+
+    def is_partitioned(self, cursor) -> bool:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace)",
+            [self.table],
+        )
+        return cursor.fetchone()[0]
+
+    def convert(self, using: str = 'default', months_ahead: int = 3):
+        """
+        Превратить обычную таблицу в секционированную с сохранением данных
+
+        Индексы и внешние ключи переносятся из исходной таблицы; уникальные
+        индексы дополняются ключом секционирования. Выполняется один раз,
+        в одной транзакции.
+        """
+        connection = connections[using]
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            if self.is_partitioned(cursor):
+                return
+
+            legacy = f"{self.table}_unpartitioned"
+            indexes = self._index_definitions(cursor)
+            foreign_keys = self._foreign_key_definitions(cursor)
+
+            cursor.execute(f'ALTER TABLE "{self.table}" RENAME TO "{legacy}"')
+            cursor.execute(f'ALTER TABLE "{legacy}" RENAME CONSTRAINT "{self.table}_pkey" TO "{legacy}_pkey"')
+
+            cursor.execute(
+                f'CREATE TABLE "{self.table}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+                f'PARTITION BY RANGE ("{self.column}")'
+            )
+            cursor.execute(f'ALTER TABLE "{self.table}" ADD CONSTRAINT "{self.table}_pkey" '
+                           f'PRIMARY KEY ("id", "{self.column}")')
+            cursor.execute(f'CREATE TABLE "{self.default_partition}" PARTITION OF "{self.table}" DEFAULT')
+
+            # Секции под существующие данные, чтобы они не попали в default
+            cursor.execute(f'SELECT min("{self.column}"), max("{self.column}") FROM "{legacy}"')
+            oldest, newest = cursor.fetchone()
+            today = month_start(datetime.now(dt_timezone.utc).date())
+            first = month_start(oldest.astimezone(dt_timezone.utc).date()) if oldest else today
+            last = max(today, month_start(newest.astimezone(dt_timezone.utc).date()) if newest else today)
+            self._create_range(cursor, first, add_months(last, months_ahead))
+
+            cursor.execute(f'INSERT INTO "{self.table}" SELECT * FROM "{legacy}"')
+            cursor.execute(f'DROP TABLE "{legacy}"')
+
+            # Имена индексов освободились вместе с исходной таблицей
+            for _, definition, is_unique in indexes:
+                if is_unique:
+                    definition = self._with_partition_key(definition)
+                cursor.execute(definition)
+            for constraint_name, definition in foreign_keys:
+                cursor.execute(f'ALTER TABLE "{self.table}" ADD CONSTRAINT "{constraint_name}" {definition}')
+
+        logger.info(f"Converted {self.table} to monthly partitions on {self.column}")
+
+    def ensure_partitions(self, using: str = 'default', months_ahead: int = 3) -> List[str]:
+        """
+        Создать секции от текущего месяца на months_ahead месяцев вперед
+
+        Returns:
+            Список созданных секций
+        """
+        today = month_start(datetime.now(dt_timezone.utc).date())
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            if not self.is_partitioned(cursor):
+                return []
+            return self._create_range(cursor, today, add_months(today, months_ahead))
+
+    def archive_partitions(self, keep_months: int, using: str = 'default') -> List[str]:
+        """
+        Отсоединить секции старше keep_months месяцев и перенести их в схему archive
+
+        Данные остаются в БД (archive.<table>_pYYYYMM), но не участвуют
+        в запросах к модели и могут быть выгружены или удалены отдельно.
+
+        Returns:
+            Список архивированных секций
+        """
+        cutoff = add_months(month_start(datetime.now(dt_timezone.utc).date()), -keep_months)
+        archived = []
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            if not self.is_partitioned(cursor):
+                return []
+
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{ARCHIVE_SCHEMA}"')
+            for partition in self._attached_partitions(cursor):
+                month = self._partition_month(partition)
+                if month is None or month >= cutoff:
+                    continue
+                cursor.execute(f'ALTER TABLE "{self.table}" DETACH PARTITION "{partition}"')
+                cursor.execute(f'ALTER TABLE "{partition}" SET SCHEMA "{ARCHIVE_SCHEMA}"')
+                archived.append(partition)
+
+        if archived:
+            logger.info(f"Archived partitions of {self.table}: {', '.join(archived)}")
+        return archived
+
+    def _create_range(self, cursor, first: date, last: date) -> List[str]:
+        """
+        Создать недостающие секции для месяцев [first, last]
+
+        Строки, уже попавшие в default (например, далекие события Google
+        Calendar), переносятся в новую секцию: иначе PostgreSQL откажет
+        в создании секции, пересекающейся с данными default.
+        """
+        existing = set(self._attached_partitions(cursor))
+        created = []
+        month = first
+        while month <= last:
+            name = self.partition_name(month)
+            if name not in existing:
+                bounds = (f"FROM ('{month.isoformat()} 00:00:00+00') "
+                          f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')")
+                moved = self._move_from_default(cursor, name, month)
+                if moved:
+                    cursor.execute(f'ALTER TABLE "{self.table}" ATTACH PARTITION "{name}" FOR VALUES {bounds}')
+                    logger.info(f"Moved {moved} rows of {self.table} from {self.default_partition} to {name}")
+                else:
+                    cursor.execute(f'CREATE TABLE "{name}" PARTITION OF "{self.table}" FOR VALUES {bounds}')
+                created.append(name)
+            month = add_months(month, 1)
+        return created
+
+    def _move_from_default(self, cursor, name: str, month: date) -> int:
+        """
+        Перенести строки месяца из default в новую таблицу name
+
+        Returns:
+            Количество перенесенных строк (0 - таблица не создана)
+        """
+        if self.default_partition not in self._attached_partitions(cursor):
+            return 0
+
+        where = (f"\"{self.column}\" >= '{month.isoformat()} 00:00:00+00' "
+                 f"AND \"{self.column}\" < '{add_months(month, 1).isoformat()} 00:00:00+00'")
+        # До ATTACH в default не должны появиться новые строки этого месяца
+        cursor.execute(f'LOCK TABLE "{self.default_partition}" IN EXCLUSIVE MODE')
+        cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{self.default_partition}" WHERE {where})')
+        if not cursor.fetchone()[0]:
+            return 0
+
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{self.table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(f'INSERT INTO "{name}" SELECT * FROM "{self.default_partition}" WHERE {where}')
+        moved = cursor.rowcount
+        cursor.execute(f'DELETE FROM "{self.default_partition}" WHERE {where}')
+        return moved
+
+    def _attached_partitions(self, cursor) -> List[str]:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s AND parent.relnamespace = current_schema()::regnamespace "
+            "ORDER BY child.relname",
+            [self.table],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def _partition_month(self, partition: str) -> Optional[date]:
+        suffix = partition[len(self.table) + 2:]
+        if not partition.startswith(f"{self.table}_p") or len(suffix) != 6 or not suffix.isdigit():
+            return None
+        return date(int(suffix[:4]), int(suffix[4:]), 1)
+
+    def _index_definitions(self, cursor) -> list:
+        """(имя, CREATE INDEX, уникальный) для всех индексов кроме первичного ключа"""
+        cursor.execute(
+            "SELECT ci.relname, pg_get_indexdef(i.indexrelid), i.indisunique FROM pg_index i "
+            "JOIN pg_class ci ON ci.oid = i.indexrelid "
+            "WHERE i.indrelid = %s::regclass AND NOT i.indisprimary",
+            [self.table],
+        )
+        return cursor.fetchall()
+
+    def _foreign_key_definitions(self, cursor) -> list:
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [self.table],
+        )
+        return cursor.fetchall()
+
+    def _with_partition_key(self, definition: str) -> str:
+        """CREATE UNIQUE INDEX ... (a, b) -> ... (a, b, column)"""
+        columns_start, columns_end = definition.rindex('('), definition.rindex(')')
+        columns = [column.strip().strip('"') for column in definition[columns_start + 1:columns_end].split(',')]
+        if self.column in columns:
+            return definition
+        return f'{definition[:columns_end]}, "{self.column}"{definition[columns_end:]}'
+
+
+PARTITIONED_MODELS = [
+    MonthlyPartitioner(Availability, 'start_datetime'),
+    MonthlyPartitioner(Booking, 'offered_at'),
+]
@@ -0,0 +1,190 @@
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.models import City, Language, LanguagePair, TranslationType
+
+logger = logging.getLogger(__name__)
+
+
+class CountryRef(NamedTuple):
+    id: uuid.UUID
+    name: str
+
+    def __str__(self):
+        return self.name
+
+
+class RegionRef(NamedTuple):
+    id: uuid.UUID
+    name: str
+    country: CountryRef
+
+    def __str__(self):
+        return self.name
+
+
+class CityRef(NamedTuple):
+    id: uuid.UUID
+    name: str
+    region: RegionRef
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+    def __str__(self):
+        return f"{self.name}, {self.region.name}"
+
+
+class LanguageRef(NamedTuple):
+    id: uuid.UUID
+    name: str
+
+    def __str__(self):
+        return self.name
+
+
+class LanguagePairRef(NamedTuple):
+    id: uuid.UUID
+    source: LanguageRef
+    target: LanguageRef
+
+    def __str__(self):
+        return f'{self.source} → {self.target}'
+
+
+class TranslationTypeRef(NamedTuple):
+    id: uuid.UUID
+    name: str
+
+    def __str__(self):
+        return self.name
+
+
+class _Snapshot(NamedTuple):
+    cities: Tuple[CityRef, ...]
+    languages: Tuple[LanguageRef, ...]
+    language_pairs: Tuple[LanguagePairRef, ...]
+    translation_types: Tuple[TranslationTypeRef, ...]
+    cities_by_id: Dict[uuid.UUID, CityRef]
+    languages_by_id: Dict[uuid.UUID, LanguageRef]
+    translation_types_by_id: Dict[uuid.UUID, TranslationTypeRef]
+
+
+class ReferenceData:
+    """
+    Справочники (города, языки, языковые пары, типы перевода) в памяти процесса
+
+    Загружаются один раз с select_related и хранятся в кортежах. Актуальность
+    проверяется по счетчику версии в Redis не чаще CHECK_INTERVAL секунд;
+    счетчик увеличивают сигналы save/delete справочных моделей (apps/signals.py)
+    после коммита, а загрузка идет из основной БД, а не из реплики.
+    """
+
+    VERSION_KEY = 'reference_data_version'
+    CHECK_INTERVAL = 5  # секунды между проверками версии в Redis
+
+    _lock = threading.Lock()
+    _snapshot: Optional[_Snapshot] = None
+    _version = None
+    _checked_at = 0.0
+
+    @classmethod
+    def cities(cls) -> Tuple[CityRef, ...]:
+        return cls._get().cities
+
+    @classmethod
+    def languages(cls) -> Tuple[LanguageRef, ...]:
+        return cls._get().languages
+
+    @classmethod
+    def language_pairs(cls) -> Tuple[LanguagePairRef, ...]:
+        return cls._get().language_pairs
+
+    @classmethod
+    def translation_types(cls) -> Tuple[TranslationTypeRef, ...]:
+        return cls._get().translation_types
+
+    @classmethod
+    def city(cls, city_id) -> Optional[CityRef]:
+        if city_id is None:
+            return None
+        return cls._get().cities_by_id.get(uuid.UUID(str(city_id)))
+
+    @classmethod
+    def language_names(cls, language_ids: Iterable) -> List[str]:
+        languages = cls._get().languages_by_id
+        return [languages[i].name for i in language_ids if i in languages]
+
+    @classmethod
+    def translation_type_names(cls, translation_type_ids: Iterable) -> List[str]:
+        translation_types = cls._get().translation_types_by_id
+        return [translation_types[i].name for i in translation_type_ids if i in translation_types]
+
+    @classmethod
+    def bump_version(cls):
+        """Пометить справочники устаревшими во всех процессах"""
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            cache.set(cls.VERSION_KEY, 1, None)
+        cls._checked_at = 0.0
+
+    @classmethod
+    def _get(cls) -> _Snapshot:
+        now = time.monotonic()
+        if cls._snapshot is not None and now - cls._checked_at < cls.CHECK_INTERVAL:
+            return cls._snapshot
+
+        with cls._lock:
+            if cls._snapshot is not None and now - cls._checked_at < cls.CHECK_INTERVAL:
+                return cls._snapshot
+
+            version = cache.get(cls.VERSION_KEY, 0)
+            if cls._snapshot is None or version != cls._version:
+                cls._snapshot = cls._load()
+                cls._version = version
+                logger.info(f"Reference data loaded (version {version})")
+            cls._checked_at = now
+            return cls._snapshot
+
+    @staticmethod
+    def _load() -> _Snapshot:
+        # Основная БД: реплика может отставать от увеличенной версии
+        using = DEFAULT_DB_ALIAS
+        countries = {}
+        regions = {}
+        cities = []
+        for city in City.objects.using(using).select_related('region__country').order_by('name'):
+            country = countries.setdefault(
+                city.region.country_id, CountryRef(city.region.country_id, city.region.country.name)
+            )
+            region = regions.setdefault(city.region_id, RegionRef(city.region_id, city.region.name, country))
+            cities.append(CityRef(city.id, city.name, region, city.latitude, city.longitude))
+
+        languages = tuple(LanguageRef(language.id, language.name) for language in Language.objects.using(using))
+        languages_by_id = {language.id: language for language in languages}
+
+        language_pairs = tuple(
+            LanguagePairRef(pair.id, languages_by_id[pair.source_id], languages_by_id[pair.target_id])
+            for pair in LanguagePair.objects.using(using).order_by('source__name', 'target__name')
+        )
+
+        translation_types = tuple(
+            TranslationTypeRef(translation_type.id, translation_type.name)
+            for translation_type in TranslationType.objects.using(using).order_by('name')
+        )
+
+        return _Snapshot(
+            cities=tuple(cities),
+            languages=languages,
+            language_pairs=language_pairs,
+            translation_types=translation_types,
+            cities_by_id={city.id: city for city in cities},
+            languages_by_id=languages_by_id,
+            translation_types_by_id={translation_type.id: translation_type for translation_type in translation_types},
+        )
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.services.reference_data import ReferenceData
+
+# Заказы без языков зависят от любого переводчика: их версия увеличивается при каждом изменении
+ANY_LANGUAGE = 'any'
+
+
+class CachedSearch(NamedTuple):
+    interpreter_ids: List[uuid.UUID]
+    distances: Optional[Dict[uuid.UUID, float]]
+    age: float  # секунды с момента сохранения
+
+
+class SearchResultCache:
+    """
+    Кэш результатов поиска переводчиков в Redis
+
+    Ключ - хэш нормализованных критериев заказа (направления, языки, типы
+    перевода, локация, город, пол, объединенные интервалы слотов), значение -
+    ID найденных переводчиков (16 байт на ID) и расстояния выезда.
+
+    Актуальность проверяется по счетчикам версий, как у SessionUserCache:
+    запись хранит версии, прочитанные до поиска, и считается устаревшей, если
+    хоть одна изменилась. Счетчики разбиты по языкам и дням, чтобы изменение
+    переводчика сбрасывало только поиски, на которые оно может повлиять:
+    - lang:<язык> - возможности переводчика (проекция поиска), для всех
+      языков переводчика до и после изменения;
+    - day:<дата>:lang:<язык> - занятость (Availability) в этот день;
+    - epoch - все записи (полный пересчет проекции, справочники).
+
+    Поиск, найденный на реплике, мог не увидеть изменение, версия которого
+    уже увеличена: при настроенных репликах версии увеличиваются повторно
+    через REPLICA_MAX_LAG_SECONDS (сообщение outbox).
+    """
+
+    KEY_PREFIX = 'search_result:v1'
+    VERSION_KEY_PREFIX = 'search_version'
+    STATS_KEY_PREFIX = 'search_cache_stats'
+    EPOCH = 'epoch'
+    STATS = ('hits', 'misses', 'stale', 'stored', 'hit_age_ms')
+    MAX_RESULTS = 5000  # большие результаты не кэшируются
+
+    @classmethod
+    def _version_key(cls, name: str) -> str:
+        return f"{cls.VERSION_KEY_PREFIX}:{name}"
+
+    @classmethod
+    def key(cls, criteria: dict) -> str:
+        """Ключ записи: sha256 канонического JSON критериев"""
+        canonical = json.dumps(criteria, sort_keys=True, separators=(',', ':'), default=str)
+        return f"{cls.KEY_PREFIX}:{hashlib.sha256(canonical.encode()).hexdigest()}"
+
+    @classmethod
+    def version_keys(cls, language_ids: Iterable, days: Iterable[date]) -> List[str]:
+        """
+        Счетчики, от которых зависит поиск
+
+        Args:
+            language_ids: Языки заказа (пусто - заказ без языков)
+            days: Дни интервалов заказа
+        """
+        languages = sorted({str(language_id) for language_id in language_ids}) or [ANY_LANGUAGE]
+        names = [cls.EPOCH] + [f"lang:{language}" for language in languages]
+        names += [f"day:{day.isoformat()}:lang:{language}" for day in sorted(set(days)) for language in languages]
+        return [cls._version_key(name) for name in names]
+
+    @classmethod
+    def get(cls, key: str, version_keys: List[str]) -> Tuple[Optional[CachedSearch], List[int]]:
+        """
+        Получить результат поиска (один round trip в Redis)
+
+        Returns:
+            (результат или None, текущие версии - передать в set())
+        """
+        values = cache.get_many([key] + version_keys)
+        versions = [values.get(version_key, 0) for version_key in version_keys]
+        cached = values.get(key)
+
+        if cached is None:
+            cls._count('misses')
+            return None, versions
+        cached_versions, stored_at, packed_ids, distances = cached
+        if cached_versions != versions:
+            cls._count('stale')
+            cls._count('misses')
+            return None, versions
+
+        age = max(time.time() - stored_at, 0.0)
+        cls._count('hits')
+        cls._count('hit_age_ms', int(age * 1000))
+        interpreter_ids = [uuid.UUID(bytes=packed_ids[i:i + 16]) for i in range(0, len(packed_ids), 16)]
+        return CachedSearch(interpreter_ids, distances, age), versions
+
+    @classmethod
+    def set(cls, key: str, versions: List[int], interpreter_ids: List[uuid.UUID],
+            distances: Optional[Dict[uuid.UUID, float]]) -> bool:
+        """
+        Сохранить результат поиска под версиями, прочитанными до поиска
+
+        Returns:
+            False, если результат больше MAX_RESULTS и не сохранен
+        """
+        if len(interpreter_ids) > cls.MAX_RESULTS:
+            return False
+        packed_ids = b''.join(interpreter_id.bytes for interpreter_id in interpreter_ids)
+        cache.set(key, (versions, time.time(), packed_ids, distances), settings.SEARCH_CACHE_TTL)
+        cls._count('stored')
+        return True
+
+    @staticmethod
+    def merge_ranges(ranges: Iterable[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+        """Объединить пересекающиеся и смежные интервалы (утро + вечер = один интервал дня)"""
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    @staticmethod
+    def days(ranges: Iterable[Tuple[datetime, datetime]]) -> Optional[List[date]]:
+        """
+        Локальные дни интервалов в горизонте SEARCH_CACHE_DAYS
+
+        Returns:
+            Список дней или None, если интервал выходит за горизонт (такие поиски не кэшируются)
+        """
+        today = timezone.localdate()
+        horizon_end = today + timedelta(days=settings.SEARCH_CACHE_DAYS)
+        days = set()
+        for start, end in ranges:
+            first, last = _local_date(start), _local_date(end - timedelta(microseconds=1))
+            if first < today or last >= horizon_end:
+                return None
+            days.update(first + timedelta(days=n) for n in range((last - first).days + 1))
+        return sorted(days)
+
+    @staticmethod
+    def interpreter_languages(language_ids: Iterable, pair_type_keys: Iterable[str]) -> Set[str]:
+        """Языки переводчика: владеет языком или переводит по направлению с этим языком"""
+        languages = {str(language_id) for language_id in language_ids}
+        pair_ids = {key.split(':', 1)[0] for key in pair_type_keys}
+        if pair_ids:
+            for pair in ReferenceData.language_pairs():
+                if str(pair.id) in pair_ids:
+                    languages.update((str(pair.source.id), str(pair.target.id)))
+        return languages
+
+    @classmethod
+    def invalidate_capabilities(cls, language_ids: Iterable):
+        """Изменилась проекция поиска переводчиков с этими языками (вызывать в транзакции изменения)"""
+        languages = {str(language_id) for language_id in language_ids} | {ANY_LANGUAGE}
+        cls.invalidate([cls._version_key(f"lang:{language}") for language in sorted(languages)])
+
+    @classmethod
+    def invalidate_availability(cls, language_ids: Iterable, start: datetime, end: datetime):
+        """Изменилась занятость переводчика с этими языками в интервале [start, end)"""
+        today = timezone.localdate()
+        first = max(_local_date(start), today)
+        last = min(_local_date(end - timedelta(microseconds=1)),
+                   today + timedelta(days=settings.SEARCH_CACHE_DAYS - 1))
+        if first > last:
+            return
+        languages = sorted({str(language_id) for language_id in language_ids} | {ANY_LANGUAGE})
+        cls.invalidate([
+            cls._version_key(f"day:{(first + timedelta(days=n)).isoformat()}:lang:{language}")
+            for n in range((last - first).days + 1) for language in languages
+        ])
+
+    @classmethod
+    def invalidate_all(cls):
+        cls.invalidate([cls._version_key(cls.EPOCH)])
+
+    @classmethod
+    def invalidate(cls, version_keys: List[str]):
+        """
+        Увеличить версии после коммита (и повторно через REPLICA_MAX_LAG_SECONDS, если есть реплики)
+
+        Вызывается в транзакции изменения: повторное увеличение пишется в outbox вместе с ним.
+        """
+        if not settings.SEARCH_CACHE_ENABLED or not version_keys:
+            return
+        transaction.on_commit(lambda: cls.bump(version_keys))
+
+        if settings.REPLICA_DATABASES:
+            from apps.services.outbox import Outbox
+            from apps.tasks.search_tasks import bump_search_cache_versions
+            Outbox.enqueue(bump_search_cache_versions, [version_keys],
+                           available_at=timezone.now() + timedelta(seconds=settings.REPLICA_MAX_LAG_SECONDS))
+
+    @staticmethod
+    def bump(version_keys: List[str]):
+        for version_key in version_keys:
+            try:
+                cache.incr(version_key)
+            except ValueError:
+                cache.set(version_key, 1, None)
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Счетчики всех процессов: попадания, промахи, устаревшие записи и средний возраст попаданий"""
+        values = cache.get_many([f"{cls.STATS_KEY_PREFIX}:{name}" for name in cls.STATS])
+        stats = {name: values.get(f"{cls.STATS_KEY_PREFIX}:{name}", 0) for name in cls.STATS}
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['stale_rate'] = stats['stale'] / lookups if lookups else 0.0
+        stats['avg_hit_age_s'] = stats.pop('hit_age_ms') / 1000 / stats['hits'] if stats['hits'] else 0.0
+        return stats
+
+    @classmethod
+    def reset_stats(cls):
+        cache.delete_many([f"{cls.STATS_KEY_PREFIX}:{name}" for name in cls.STATS])
+
+    @classmethod
+    def _count(cls, name: str, delta: int = 1):
+        key = f"{cls.STATS_KEY_PREFIX}:{name}"
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.set(key, delta, None)
+
+
+def _local_date(value: datetime) -> date:
+    """День в текущей временной зоне (naive datetime уже в ней)"""
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
@@ -0,0 +1,122 @@
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from django.core import signing
+from django.db.models import Prefetch, QuerySet
+
+from apps.models import Interpreter, Language
+
+
+class InterpreterSearchResultSerializer:
+    """
+    Сериализатор результатов поиска переводчиков
+
+    Id страницы выбираются из проекции поиска, затем одним запросом с .only()
+    и одним prefetch запросом для языков загружаются данные для отображения,
+    поэтому количество запросов не зависит от числа кандидатов.
+    Пагинация курсорная (по id), токен next подписан и привязан к заказу.
+    Если переданы расстояния (onsite заказ с координатами города), кандидаты
+    упорядочены по (расстояние, id): сначала город заказа, затем ближайшие.
+    """
+
+    PAGE_SIZE = 50
+    CURSOR_SALT = 'interpreter-search-cursor'
+
+    def __init__(self, order_id: str, queryset: QuerySet, page_size: Optional[int] = None,
+                 distances: Optional[Dict] = None):
+        """
+        Args:
+            order_id: ID заказа, к которому привязан курсор
+            queryset: QuerySet InterpreterSearchProjection из InterpreterSearchService
+            page_size: Размер страницы (по умолчанию PAGE_SIZE)
+            distances: InterpreterSearchService.distances (None - порядок по id)
+        """
+        self.order_id = str(order_id)
+        self.queryset = queryset
+        self.page_size = page_size or self.PAGE_SIZE
+        self.distances = distances
+
+    def page(self, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        Получить страницу кандидатов
+
+        Args:
+            cursor: Токен next из предыдущей страницы
+
+        Returns:
+            (список кандидатов, токен следующей страницы или None)
+
+        Raises:
+            ValueError: если курсор невалиден или принадлежит другому заказу
+        """
+        if self.distances is not None:
+            return self._ranked_page(cursor)
+
+        queryset = self.queryset.order_by('interpreter_id')
+
+        if cursor:
+            queryset = queryset.filter(interpreter_id__gt=self._decode_cursor(cursor)['after'])
+
+        ids = list(queryset.values_list('interpreter_id', flat=True)[:self.page_size + 1])
+        has_next = len(ids) > self.page_size
+        ids = ids[:self.page_size]
+
+        next_token = self._encode_cursor(ids[-1]) if has_next else None
+        return self._load(ids), next_token
+
+    def _ranked_page(self, cursor: Optional[str]) -> Tuple[List[dict], Optional[str]]:
+        """Страница по (расстояние, id): кандидатов onsite заказа немного, сортировка в памяти"""
+        ranked = sorted(
+            (self.distances.get(interpreter_id, 0.0), interpreter_id)
+            for interpreter_id in self.queryset.values_list('interpreter_id', flat=True)
+        )
+
+        if cursor:
+            data = self._decode_cursor(cursor)
+            after = (data.get('distance', 0.0), uuid.UUID(data['after']))
+            ranked = [key for key in ranked if key > after]
+
+        has_next = len(ranked) > self.page_size
+        ranked = ranked[:self.page_size]
+
+        next_token = None
+        if has_next:
+            distance, last_id = ranked[-1]
+            next_token = self._encode_cursor(last_id, distance=distance)
+
+        items = {item['id']: item for item in self._load([interpreter_id for _, interpreter_id in ranked])}
+        return [
+            {**items[str(interpreter_id)], 'distance_km': round(distance, 1)}
+            for distance, interpreter_id in ranked if str(interpreter_id) in items
+        ], next_token
+
+    def _load(self, ids: list) -> List[dict]:
+        """Данные для отображения одним запросом и одним prefetch, в порядке id"""
+        interpreters = Interpreter.objects.using(self.queryset.db).filter(id__in=ids).only(
+            'id', 'first_name', 'last_name'
+        ).prefetch_related(
+            Prefetch('language', queryset=Language.objects.only('id', 'name'))
+        ).order_by('id')
+        return [self._serialize(interpreter) for interpreter in interpreters]
+
+    @staticmethod
+    def _serialize(interpreter) -> dict:
+        return {
+            'id': str(interpreter.id),
+            'name': interpreter.get_full_name(),
+            'languages': [language.name for language in interpreter.language.all()],
+            'photo': None,
+        }
+
+    def _encode_cursor(self, last_id, **extra) -> str:
+        return signing.dumps({'order': self.order_id, 'after': str(last_id), **extra}, salt=self.CURSOR_SALT)
+
+    def _decode_cursor(self, token: str) -> dict:
+        try:
+            data = signing.loads(token, salt=self.CURSOR_SALT)
+        except signing.BadSignature:
+            raise ValueError('Invalid cursor')
+
+        if data.get('order') != self.order_id:
+            raise ValueError('Cursor belongs to another order')
+        return data
@@ -0,0 +1,449 @@
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.utils import timezone
+from scipy import sparse
+
+from apps.db_router import read_database
+from apps.models import (Availability, Interpreter,
+                         InterpreterSearchProjection, Order, OrderInterpreter,
+                         SlotCapacity, SlotCapacityInterpreter)
+from apps.services.interpreter_search import SLOT_TIMES
+
+logger = logging.getLogger(__name__)
+
+ONLINE_SCOPE = 'online'
+ANY_TYPE = 'any'
+PERIODS = ('morning', 'evening')
+# Назначение на такие заказы не занимает переводчика
+RELEASED_STATUSES = (Order.OrderStatus.CANCELLED, Order.OrderStatus.COMPLETED)
+
+
+def group_key(scope: str, pair_id, translation_type_id=ANY_TYPE) -> str:
+    """Группа куба: online или ID города, направление перевода, тип перевода (any - любой)"""
+    return f"{scope}|{pair_id}|{translation_type_id}"
+
+
+class SlotCapacityCube:
+    """
+    Свободные переводчики по слотам страницы нового заказа
+
+    Куб SlotCapacity: (область, направление, тип перевода, день) -> число
+    свободных активных модерированных переводчиков в утреннем и вечернем
+    слоте (SLOT_TIMES) на SLOT_CAPACITY_DAYS дней вперед. Область - online
+    (все переводчики) или город переводчика. Переводчик свободен в слоте, если
+    слот не пересекается с его BUSY записями Availability и заказами, на
+    которые он назначен (OrderInterpreter, кроме отмененных и завершенных).
+
+    Куб обновляется инкрементально: сигналы помечают вклад переводчика
+    (SlotCapacityInterpreter) в транзакции изменения Availability, назначения,
+    заказа или проекции поиска; задача refresh_slot_capacity пересчитывает
+    помеченных, вычитает из куба старый вклад и прибавляет новый (группы -
+    разреженная матрица группа x переводчик, умноженная на матрицу свободных
+    слотов). При смене дня горизонта куб пересчитывается целиком.
+    """
+
+    # Ключ pg_try_advisory_lock: один пересчет одновременно
+    LOCK_KEY = 0x4C540050
+    HORIZON_KEY = 'slot_capacity:horizon'
+    VERSION_KEY = 'slot_capacity:version'
+    RESPONSE_KEY_PREFIX = 'slot_capacity:response'
+    RESPONSE_TTL = 10 * 60
+    BATCH_SIZE = 5000
+
+    @classmethod
+    def run(cls, full: bool = False) -> dict:
+        """
+        Пересчитать помеченных переводчиков или весь куб
+
+        Args:
+            full: Пересчитать весь куб (иначе - только при смене дня горизонта)
+
+        Returns:
+            dict со статистикой запуска (skipped=True, если идет другой запуск)
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [cls.LOCK_KEY])
+            if not cursor.fetchone()[0]:
+                return {'skipped': True}
+
+        try:
+            started = time.perf_counter()
+            today, days = timezone.localdate(), settings.SLOT_CAPACITY_DAYS
+            horizon = f"{today.isoformat()}:{days}"
+            stats = None
+            if not full and cache.get(cls.HORIZON_KEY) == horizon:
+                stats = cls.apply_dirty(today, days)
+            if stats is None:
+                stats = cls.rebuild(today, days)
+                cache.set(cls.HORIZON_KEY, horizon, None)
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [cls.LOCK_KEY])
+
+        if stats['interpreters']:
+            cls.bump_version()
+        stats['elapsed_s'] = time.perf_counter() - started
+        logger.info(f"Slot capacity refresh: {stats}")
+        return stats
+
+    @classmethod
+    def rebuild(cls, today: date, days: int) -> dict:
+        """Пересчитать куб и вклады всех переводчиков"""
+        # Версии читаются до данных: пометка во время пересчета оставит вклад помеченным
+        versions = dict(SlotCapacityInterpreter.objects.values_list('interpreter_id', 'version'))
+        interpreter_ids, groups, free = cls.compute(None, today, days)
+        keys, sums = cls.group_sums(groups, free)
+
+        with transaction.atomic():
+            SlotCapacity.objects.all().delete()
+            # Вклады переводчиков без проекции обнуляются вместе с кубом
+            SlotCapacityInterpreter.objects.update(groups=[], free=b'')
+            rows = cls._add(today, dict(zip(keys, sums)))
+            cls._save_contributions(today, interpreter_ids, versions, groups, free)
+        return {'mode': 'rebuild', 'interpreters': len(interpreter_ids), 'rows': rows}
+
+    @classmethod
+    def apply_dirty(cls, today: date, days: int) -> Optional[dict]:
+        """
+        Пересчитать помеченных переводчиков (не больше BATCH_SIZE за запуск)
+
+        Returns:
+            dict со статистикой или None, если вклад посчитан для другого горизонта (нужен rebuild)
+        """
+        rows = list(SlotCapacityInterpreter.objects.filter(dirty=True).values_list(
+            'interpreter_id', 'version', 'groups', 'free', 'horizon_start')[:cls.BATCH_SIZE])
+        if not rows:
+            return {'mode': 'incremental', 'interpreters': 0, 'rows': 0}
+
+        slots = days * len(PERIODS)
+        old_groups, old_free = [], np.zeros((len(rows), slots), dtype=bool)
+        for i, (_, _, groups, packed, horizon_start) in enumerate(rows):
+            if groups:
+                bits = np.unpackbits(np.frombuffer(bytes(packed), dtype=np.uint8))
+                if horizon_start != today or len(bits) < slots:
+                    return None
+                old_free[i] = bits[:slots]
+            old_groups.append(groups)
+
+        interpreter_ids = [row[0] for row in rows]
+        versions = {row[0]: row[1] for row in rows}
+        _, groups, free = cls.compute(interpreter_ids, today, days)
+
+        deltas = defaultdict(lambda: np.zeros(slots, dtype=np.int64))
+        for sign, (keys, sums) in ((1, cls.group_sums(groups, free)), (-1, cls.group_sums(old_groups, old_free))):
+            for key, values in zip(keys, sums):
+                deltas[key] += sign * values
+
+        with transaction.atomic():
+            changed = cls._add(today, deltas)
+            cls._save_contributions(today, interpreter_ids, versions, groups, free)
+        return {'mode': 'incremental', 'interpreters': len(rows), 'rows': changed}
+
+    @classmethod
+    def compute(cls, interpreter_ids: Optional[List], today: date, days: int
+                ) -> Tuple[List[uuid.UUID], List[List[str]], np.ndarray]:
+        """
+        Группы и свободные слоты переводчиков
+
+        Args:
+            interpreter_ids: ID переводчиков (None - все переводчики с проекцией поиска)
+
+        Returns:
+            (ID переводчиков, группы каждого, bool матрица переводчик x слот горизонта)
+        """
+        # Только основная БД: реплика может не содержать помеченное изменение
+        projections = InterpreterSearchProjection.objects.using(DEFAULT_DB_ALIAS)
+        if interpreter_ids is not None:
+            projections = projections.filter(interpreter_id__in=interpreter_ids)
+        groups_by_id = {
+            interpreter_id: cls.groups(city_id, pair_type_keys) if is_active and is_moderated else []
+            for interpreter_id, is_active, is_moderated, city_id, pair_type_keys in projections.values_list(
+                'interpreter_id', 'is_active', 'is_moderated', 'city_id', 'pair_type_keys').iterator(chunk_size=10000)
+        }
+        everyone = interpreter_ids is None
+        if everyone:
+            interpreter_ids = list(groups_by_id)
+        groups = [groups_by_id.get(interpreter_id, []) for interpreter_id in interpreter_ids]
+        return interpreter_ids, groups, cls.free_slots(interpreter_ids, today, days, everyone)
+
+    @staticmethod
+    def groups(city_id, pair_type_keys: Iterable[str]) -> List[str]:
+        """Группы переводчика: online и его город x направления x (типы перевода по направлению и any)"""
+        combinations = set()
+        for key in pair_type_keys:
+            pair_id, translation_type_id = key.split(':', 1)
+            combinations.update(((pair_id, translation_type_id), (pair_id, ANY_TYPE)))
+        scopes = [ONLINE_SCOPE] + ([str(city_id)] if city_id else [])
+        return sorted(group_key(scope, pair_id, translation_type_id)
+                      for scope in scopes for pair_id, translation_type_id in combinations)
+
+    @classmethod
+    def free_slots(cls, interpreter_ids: List, today: date, days: int, everyone: bool = False) -> np.ndarray:
+        """
+        Свободные слоты переводчиков: bool матрица переводчик x слот (день, утро/вечер)
+
+        Слоты занятого интервала находятся бинарным поиском по границам слотов,
+        строки заполняются разностным массивом (cumsum) без цикла по слотам.
+
+        Args:
+            everyone: interpreter_ids - все переводчики (занятость читается без фильтра по ID)
+        """
+        starts, ends = cls.slot_bounds(today, days)
+        index = {interpreter_id: i for i, interpreter_id in enumerate(interpreter_ids)}
+        rows, interval_starts, interval_ends = [], [], []
+        for interpreter_id, start, end in cls.busy_intervals(None if everyone else interpreter_ids,
+                                                             _local_datetime(today, '00:00'),
+                                                             _local_datetime(today + timedelta(days=days), '00:00')):
+            row = index.get(interpreter_id)
+            if row is not None:
+                rows.append(row)
+                interval_starts.append(start.timestamp())
+                interval_ends.append(end.timestamp())
+
+        busy = np.zeros((len(interpreter_ids), len(starts) + 1), dtype=np.int32)
+        if rows:
+            rows = np.array(rows, dtype=np.intp)
+            # Слоты [first, last), пересекающиеся с интервалом: конец слота после начала, начало до конца
+            first = np.searchsorted(ends, np.array(interval_starts), side='right')
+            last = np.searchsorted(starts, np.array(interval_ends), side='left')
+            overlaps = first < last
+            np.add.at(busy, (rows[overlaps], first[overlaps]), 1)
+            np.add.at(busy, (rows[overlaps], last[overlaps]), -1)
+        return np.cumsum(busy, axis=1)[:, :-1] == 0
+
+    @staticmethod
+    def slot_bounds(today: date, days: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Начала и концы слотов горизонта (unix время) по порядку: день, утро, вечер"""
+        starts, ends = [], []
+        for n in range(days):
+            day = today + timedelta(days=n)
+            for period in PERIODS:
+                start_time, end_time = SLOT_TIMES[period]
+                starts.append(_local_datetime(day, start_time).timestamp())
+                ends.append(_local_datetime(day, end_time).timestamp())
+        return np.array(starts), np.array(ends)
+
+    @staticmethod
+    def busy_intervals(interpreter_ids: Optional[List], window_start: datetime, window_end: datetime
+                       ) -> Iterator[Tuple[uuid.UUID, datetime, datetime]]:
+        """BUSY записи Availability и слоты заказов, на которые переводчик назначен, в окне горизонта"""
+        records = Availability.objects.using(DEFAULT_DB_ALIAS).filter(
+            type=Availability.AvailabilityType.BUSY,
+            start_datetime__lt=window_end,
+            end_datetime__gt=window_start,
+        )
+        assignments = OrderInterpreter.objects.using(DEFAULT_DB_ALIAS).filter(
+            order__start_datetime__lt=window_end,
+            order__end_datetime__gt=window_start,
+        ).exclude(order__status__in=RELEASED_STATUSES)
+        if interpreter_ids is not None:
+            records = records.filter(translator_id__in=interpreter_ids)
+            assignments = assignments.filter(interpreter_id__in=interpreter_ids)
+
+        yield from records.values_list('translator_id', 'start_datetime', 'end_datetime').iterator(chunk_size=10000)
+
+        for interpreter_id, selected_slots, start, end in assignments.values_list(
+                'interpreter_id', 'order__selected_slots', 'order__start_datetime', 'order__end_datetime'
+        ).iterator(chunk_size=10000):
+            # Выбранные слоты заказа, без слотов - начало и конец заказа (как в InterpreterSearchService)
+            ranges = [slot_range for slot_range in map(_slot_range, selected_slots or ()) if slot_range]
+            for range_start, range_end in ranges or [(start, end)]:
+                yield interpreter_id, range_start, range_end
+
+    @staticmethod
+    def group_sums(groups: List[List[str]], free: np.ndarray) -> Tuple[List[str], np.ndarray]:
+        """
+        Свободных переводчиков в каждой группе по слотам
+
+        Returns:
+            (ключи групп, матрица группа x слот) - произведение разреженной
+            матрицы группа x переводчик на матрицу свободных слотов
+        """
+        keys = sorted({key for interpreter_groups in groups for key in interpreter_groups})
+        if not keys:
+            return [], np.zeros((0, free.shape[1]), dtype=np.int64)
+        index = {key: i for i, key in enumerate(keys)}
+        rows = [index[key] for interpreter_groups in groups for key in interpreter_groups]
+        columns = [i for i, interpreter_groups in enumerate(groups) for _ in interpreter_groups]
+        incidence = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, columns)),
+                                      shape=(len(keys), len(groups)))
+        return keys, np.asarray(incidence @ free.astype(np.int64))
+
+    @classmethod
+    def _add(cls, today: date, deltas: Dict[str, np.ndarray]) -> int:
+        """
+        Прибавить изменения к строкам куба (INSERT ... ON CONFLICT со сложением)
+
+        Returns:
+            Число измененных строк (группа, день)
+        """
+        keys, dates, mornings, evenings = [], [], [], []
+        for key, delta in deltas.items():
+            delta = delta.reshape(-1, len(PERIODS))
+            for day in np.flatnonzero(delta.any(axis=1)):
+                keys.append(key)
+                dates.append(today + timedelta(days=int(day)))
+                mornings.append(int(delta[day, 0]))
+                evenings.append(int(delta[day, 1]))
+
+        table = SlotCapacity._meta.db_table
+        with connection.cursor() as cursor:
+            for i in range(0, len(keys), cls.BATCH_SIZE):
+                batch = slice(i, i + cls.BATCH_SIZE)
+                cursor.execute(
+                    f"INSERT INTO {table} (group_key, date, morning, evening) "
+                    f"SELECT * FROM unnest(%s::varchar[], %s::date[], %s::integer[], %s::integer[]) "
+                    f"ON CONFLICT (group_key, date) DO UPDATE SET morning = {table}.morning + EXCLUDED.morning, "
+                    f"evening = {table}.evening + EXCLUDED.evening",
+                    [keys[batch], dates[batch], mornings[batch], evenings[batch]],
+                )
+        return len(keys)
+
+    @classmethod
+    def _save_contributions(cls, today: date, interpreter_ids: List, versions: Dict, groups: List[List[str]],
+                            free: np.ndarray):
+        """
+        Сохранить вклад переводчиков, прибавленный к кубу
+
+        Пометка снимается, только если version не изменилась с момента чтения
+        (иначе переводчик пересчитается следующим запуском).
+        """
+        table = SlotCapacityInterpreter._meta.db_table
+        interpreters, pk = Interpreter._meta.db_table, Interpreter._meta.pk.column
+        with connection.cursor() as cursor:
+            for i in range(0, len(interpreter_ids), cls.BATCH_SIZE):
+                batch = range(i, min(i + cls.BATCH_SIZE, len(interpreter_ids)))
+                cursor.execute(
+                    f"INSERT INTO {table} (interpreter_id, groups, free, horizon_start, dirty, version) "
+                    f"SELECT rows.interpreter_id, string_to_array(rows.groups, ','), rows.free, %s, false, "
+                    f"rows.version "
+                    f"FROM unnest(%s::uuid[], %s::text[], %s::bytea[], %s::integer[]) "
+                    f"AS rows(interpreter_id, groups, free, version) "
+                    f"WHERE EXISTS (SELECT 1 FROM {interpreters} WHERE {pk} = rows.interpreter_id) "
+                    f"ON CONFLICT (interpreter_id) DO UPDATE SET groups = EXCLUDED.groups, free = EXCLUDED.free, "
+                    f"horizon_start = EXCLUDED.horizon_start, dirty = {table}.version <> EXCLUDED.version",
+                    [
+                        today,
+                        [str(interpreter_ids[n]) for n in batch],
+                        [','.join(groups[n]) for n in batch],
+                        [np.packbits(free[n]).tobytes() if groups[n] else b'' for n in batch],
+                        [versions.get(interpreter_ids[n], 0) for n in batch],
+                    ],
+                )
+
+    @staticmethod
+    def mark_dirty(interpreter_ids: Optional[Iterable] = None):
+        """
+        Пометить вклад переводчиков для пересчета (вызывать в транзакции изменения)
+
+        Args:
+            interpreter_ids: ID переводчиков (None - все переводчики)
+        """
+        if not settings.SLOT_CAPACITY_ENABLED:
+            return
+
+        table = SlotCapacityInterpreter._meta.db_table
+        interpreters, pk = Interpreter._meta.db_table, Interpreter._meta.pk.column
+        params = []
+        condition = ''
+        if interpreter_ids is not None:
+            # Сортировка: одинаковый порядок блокировок строк в параллельных транзакциях
+            params = [sorted({str(interpreter_id) for interpreter_id in interpreter_ids})]
+            if not params[0]:
+                return
+            condition = f"WHERE {pk} = ANY(%s::uuid[]) "
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (interpreter_id, groups, free, dirty, version) "
+                f"SELECT {pk}, '{{}}', '', true, 1 FROM {interpreters} {condition}"
+                f"ORDER BY {pk} "
+                f"ON CONFLICT (interpreter_id) DO UPDATE SET dirty = true, version = {table}.version + 1",
+                params,
+            )
+
+    @classmethod
+    def version(cls) -> int:
+        return cache.get(cls.VERSION_KEY, 0)
+
+    @classmethod
+    def bump_version(cls):
+        """Ответы counts() для прежней версии куба больше не читаются"""
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            cache.set(cls.VERSION_KEY, 1, None)
+
+    @classmethod
+    def counts(cls, scope: str, pair_ids: List[str], translation_type_id: Optional[str], start: date,
+               end: date) -> Dict[str, Dict[str, Optional[int]]]:
+        """
+        Свободные переводчики по слотам для календаря нового заказа
+
+        Для нескольких направлений - минимум по направлениям (переводчик должен
+        переводить по всем, поэтому это оценка сверху). Ответ кэшируется в Redis
+        по версии куба.
+
+        Args:
+            scope: ONLINE_SCOPE или ID города
+            pair_ids: ID направлений перевода
+            translation_type_id: ID типа перевода (None - любой)
+            start: Первый день
+            end: Последний день
+
+        Returns:
+            {'YYYY-MM-DD': {'morning': n, 'evening': n}}; None - день вне горизонта куба
+        """
+        keys = sorted({group_key(scope, pair_id, translation_type_id or ANY_TYPE) for pair_id in pair_ids})
+        canonical = json.dumps([keys, start.isoformat(), end.isoformat()], separators=(',', ':'))
+        response_key = (f"{cls.RESPONSE_KEY_PREFIX}:{cls.version()}:"
+                        f"{hashlib.sha256(canonical.encode()).hexdigest()}")
+        result = cache.get(response_key)
+        if result is not None:
+            return result
+
+        rows = SlotCapacity.objects.using(read_database()).filter(
+            group_key__in=keys, date__range=(start, end)
+        ).values_list('group_key', 'date', 'morning', 'evening')
+        values = {(key, day): (morning, evening) for key, day, morning, evening in rows}
+
+        today = timezone.localdate()
+        horizon_end = today + timedelta(days=settings.SLOT_CAPACITY_DAYS)
+        result = {}
+        for n in range((end - start).days + 1):
+            day = start + timedelta(days=n)
+            if not keys or not today <= day < horizon_end:
+                result[day.isoformat()] = {period: None for period in PERIODS}
+                continue
+            day_values = [values.get((key, day), (0, 0)) for key in keys]
+            result[day.isoformat()] = {period: min(value[i] for value in day_values)
+                                       for i, period in enumerate(PERIODS)}
+        cache.set(response_key, result, cls.RESPONSE_TTL)
+        return result
+
+
+def _local_datetime(day: date, hhmm: str) -> datetime:
+    """Время дня в текущей временной зоне"""
+    return timezone.make_aware(datetime.strptime(f"{day.isoformat()} {hhmm}", '%Y-%m-%d %H:%M'))
+
+
+def _slot_range(slot: str) -> Optional[Tuple[datetime, datetime]]:
+    """Интервал слота заказа 'YYYY-MM-DD-period' или None, если слот не разбирается"""
+    try:
+        day, period = slot.rsplit('-', 1)
+        start_time, end_time = SLOT_TIMES.get(period, ('09:00', '18:00'))
+        day = date.fromisoformat(day)
+    except (AttributeError, ValueError):
+        return None
+    return _local_datetime(day, start_time), _local_datetime(day, end_time)
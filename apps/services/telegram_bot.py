@@ -3,10 +3,14 @@ from collections import defaultdict
 from typing import Optional
 
 from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from asgiref.sync import sync_to_async
 from django.conf import settings
 
 from apps.models import Order
+from apps.services.reference_data import ReferenceData
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +19,12 @@ class TelegramBotService:
     """Сервис для работы с Telegram Bot API через Aiogram"""
 
     def __init__(self):
-        self.bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
+        # TELEGRAM_API_SERVER позволяет направить бота на локальный фейковый Bot API (бенчмарки)
+        session = None
+        if settings.TELEGRAM_API_SERVER:
+            session = AiohttpSession(api=TelegramAPIServer.from_base(settings.TELEGRAM_API_SERVER))
+
+        self.bot = Bot(token=settings.TELEGRAM_BOT_TOKEN, session=session)
 
     async def send_order_offer(self, chat_id: str, order: Order, booking_id: str) -> bool:
         """
@@ -29,8 +38,8 @@ class TelegramBotService:
         Returns:
             bool - успешность отправки
         """
-        # Формирование сообщения
-        message = self._format_order_message(order)
+        # Формирование сообщения (запросы к БД нельзя выполнять в async контексте)
+        message = await sync_to_async(self._format_order_message)(order)
 
         # Inline кнопки через Aiogram
         keyboard = InlineKeyboardMarkup(
@@ -65,8 +74,12 @@ class TelegramBotService:
     def _format_order_message(self, order: Order) -> str:
         """Форматировать сообщение с деталями заказа"""
         slots_text = self._format_time_slots(order.selected_slots)
-        languages_text = self._format_languages(order.languages.all())
-        translation_types_text = self._format_translation_types(order.translation_types.all())
+        languages_text = self._format_names(
+            ReferenceData.language_names(order.languages.values_list('id', flat=True))
+        )
+        translation_types_text = self._format_names(
+            ReferenceData.translation_type_names(order.translation_types.values_list('id', flat=True))
+        )
 
         # Получить даты начала и конца
         start_date = order.start_datetime.strftime('%d.%m.%Y') if order.start_datetime else 'Не указано'
@@ -76,7 +89,8 @@ class TelegramBotService:
         if order.location_type == Order.LocationType.ONLINE:
             location = 'Online'
         else:
-            location = f"{order.city.name if order.city else 'Не указано'}"
+            city = ReferenceData.city(order.city_id)
+            location = f"{city.name if city else 'Не указано'}"
             if order.address:
                 location += f", {order.address}"
 
@@ -120,19 +134,12 @@ class TelegramBotService:
 
         return '\n  '.join(result) if result else "Не указано"
 
-    def _format_languages(self, languages) -> str:
-        """Форматировать языки"""
-        if not languages:
-            return "Не указано"
-
-        return ', '.join([lang.name for lang in languages])
-
-    def _format_translation_types(self, translation_types) -> str:
-        """Форматировать типы перевода"""
-        if not translation_types:
+    def _format_names(self, names) -> str:
+        """Форматировать список названий (языки, типы перевода)"""
+        if not names:
             return "Не указано"
 
-        return ', '.join([tt.name for tt in translation_types])
+        return ', '.join(names)
 
     async def send_simple_message(self, chat_id: str, text: str) -> bool:
         """
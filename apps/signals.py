@@ -0,0 +1,283 @@
+from django.db import connections, transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_init,
+                                      post_migrate, post_save, pre_delete,
+                                      pre_migrate)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.models import (Availability, City, Client, Country, Interpreter,
+                         InterpreterLanguagePair, InterpreterSearchProjection,
+                         Language, LanguagePair, Order, OrderInterpreter,
+                         Region, TranslationType, User)
+from apps.models.search import SEARCH_FIELDS
+
+REFERENCE_MODELS = (Country, Region, City, Language, LanguagePair, TranslationType)
+
+
+@receiver([post_save, post_delete])
+def bump_reference_data_version(sender, **kwargs):
+    """Сбросить кэш справочников при изменении (включая правки в админке)"""
+    if sender not in REFERENCE_MODELS:
+        return
+
+    from apps.services.reference_data import ReferenceData
+    from apps.services.search_cache import SearchResultCache
+
+    # После коммита: иначе другие процессы перезагрузят справочники до него и сохранят старые
+    transaction.on_commit(ReferenceData.bump_version)
+    # Координаты городов и языки направлений входят в результаты поиска
+    SearchResultCache.invalidate_all()
+
+
+@receiver(post_save, sender=Interpreter)
+@receiver(post_save, sender=User)
+def refresh_interpreter_search_projection(sender, instance, update_fields=None, **kwargs):
+    """Обновить проекцию поиска в транзакции сохранения переводчика"""
+    if update_fields is not None and SEARCH_FIELDS.isdisjoint(update_fields):
+        return
+    # Клиент без строки Interpreter в проекцию не входит (current_role не важен: роль можно переключить)
+    if sender is User and not Interpreter.objects.filter(pk=instance.pk).exists():
+        return
+    InterpreterSearchProjection.rebuild([instance.pk])
+
+
+@receiver(m2m_changed, sender=Interpreter.language.through)
+@receiver(m2m_changed, sender=Interpreter.translation_type.through)
+def refresh_interpreter_search_projection_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    """Языки и типы перевода хранятся в проекции массивами"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        InterpreterSearchProjection.rebuild([instance.pk])
+    elif pk_set:
+        InterpreterSearchProjection.rebuild(pk_set)
+    else:
+        # clear() со стороны языка/типа перевода: затронутые переводчики неизвестны
+        InterpreterSearchProjection.rebuild()
+
+
+@receiver([post_save, post_delete], sender=InterpreterLanguagePair)
+def refresh_search_projection_pairs(sender, instance, origin=None, **kwargs):
+    """Ключи (пара, тип перевода) хранятся в проекции для поиска по направлениям"""
+    # Каскад от удаления пользователя: проекция удаляется вместе с ним
+    if isinstance(origin, User) or getattr(origin, 'model', None) in (User, Interpreter):
+        return
+    InterpreterSearchProjection.rebuild([instance.interpreter_id])
+
+
+@receiver(m2m_changed, sender=InterpreterLanguagePair.translation_types.through)
+def refresh_search_projection_pair_types(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        InterpreterSearchProjection.rebuild([instance.interpreter_id])
+    elif pk_set:
+        InterpreterSearchProjection.rebuild(
+            InterpreterLanguagePair.objects.filter(id__in=pk_set).values_list('interpreter_id', flat=True)
+        )
+    else:
+        InterpreterSearchProjection.rebuild()
+
+
+@receiver(pre_delete, sender=Language)
+@receiver(pre_delete, sender=TranslationType)
+def remember_search_projection_interpreters(sender, instance, **kwargs):
+    """Переводчики удаляемого языка или типа перевода: строки M2M удаляются каскадом без m2m_changed"""
+    if sender is Language:
+        interpreter_ids = set(Interpreter.language.through.objects.filter(
+            language_id=instance.pk).values_list('interpreter_id', flat=True))
+    else:
+        interpreter_ids = set(Interpreter.translation_type.through.objects.filter(
+            translationtype_id=instance.pk).values_list('interpreter_id', flat=True))
+        interpreter_ids |= set(InterpreterLanguagePair.translation_types.through.objects.filter(
+            translationtype_id=instance.pk).values_list('interpreterlanguagepair__interpreter_id', flat=True))
+    instance._search_interpreter_ids = interpreter_ids
+
+
+@receiver(post_delete, sender=Language)
+@receiver(post_delete, sender=TranslationType)
+def refresh_search_projection_references(sender, instance, **kwargs):
+    """Убрать удаленный язык или тип перевода из массивов проекции"""
+    interpreter_ids = getattr(instance, '_search_interpreter_ids', None)
+    if interpreter_ids:
+        InterpreterSearchProjection.rebuild(interpreter_ids)
+
+
+@receiver(post_save, sender=City)
+def refresh_search_projection_coordinates(sender, instance, **kwargs):
+    """Координаты города переводчика хранятся в проекции для bounding box поиска"""
+    InterpreterSearchProjection.objects.filter(city_id=instance.pk).exclude(
+        latitude=instance.latitude, longitude=instance.longitude
+    ).update(latitude=instance.latitude, longitude=instance.longitude)
+
+
+@receiver([post_save, post_delete], sender=Availability)
+def mark_availability_matrix_dirty(sender, instance, **kwargs):
+    """Перечитать строку переводчика в матрицах занятости процессов после коммита"""
+    from apps.services.availability_matrix import AvailabilityMatrix
+
+    # Прошедшие записи (prune_old_availability) вне горизонта матрицы
+    if instance.end_datetime <= AvailabilityMatrix.horizon_start():
+        return
+    interpreter_id = instance.translator_id
+    transaction.on_commit(lambda: AvailabilityMatrix.mark_dirty([interpreter_id]))
+
+
+@receiver(post_init, sender=Availability)
+def remember_availability_range(sender, instance, **kwargs):
+    """Интервал до изменения: update_or_create календаря переносит событие, и кэш сбрасывается для обоих"""
+    # Через __dict__: обращение к отложенному полю (only()) выполнило бы запрос
+    instance._loaded_range = (instance.__dict__.get('start_datetime'), instance.__dict__.get('end_datetime'))
+
+
+@receiver([post_save, post_delete], sender=Availability)
+def invalidate_search_cache_availability(sender, instance, **kwargs):
+    """Сбросить кэш поиска для дней записи и языков переводчика"""
+    from django.conf import settings
+
+    from apps.services.search_cache import SearchResultCache
+
+    if not settings.SEARCH_CACHE_ENABLED:
+        return
+    ranges = {(instance.start_datetime, instance.end_datetime), getattr(instance, '_loaded_range', (None, None))}
+    ranges = [(start, end) for start, end in ranges if start is not None and end is not None]
+    # Прошедшие записи (prune_old_availability) не влияют на поиск
+    if all(end <= timezone.now() for _, end in ranges):
+        return
+
+    projection = InterpreterSearchProjection.objects.filter(interpreter_id=instance.translator_id).values_list(
+        'language_ids', 'pair_type_keys').first()
+    languages = SearchResultCache.interpreter_languages(*projection) if projection else set()
+    for start, end in ranges:
+        SearchResultCache.invalidate_availability(languages, start, end)
+    instance._loaded_range = (instance.start_datetime, instance.end_datetime)
+
+
+# Поля заказа, от которых зависит занятость назначенных переводчиков
+ORDER_CAPACITY_FIELDS = frozenset({'status', 'start_datetime', 'end_datetime', 'selected_slots'})
+
+
+@receiver([post_save, post_delete], sender=Availability)
+@receiver([post_save, post_delete], sender=OrderInterpreter)
+def mark_slot_capacity_dirty(sender, instance, origin=None, **kwargs):
+    """Пересчитать вклад переводчика в куб свободных слотов (занятость или назначение)"""
+    from apps.services.slot_capacity import SlotCapacityCube
+
+    # Каскад от удаления переводчика: его вклад удаляется вместе с ним
+    if isinstance(origin, User) or getattr(origin, 'model', None) in (User, Interpreter):
+        return
+    if sender is Availability:
+        # Удаление прошедших записей (prune_old_availability) не меняет слоты горизонта
+        if 'created' not in kwargs and instance.end_datetime <= timezone.now():
+            return
+        SlotCapacityCube.mark_dirty([instance.translator_id])
+    else:
+        SlotCapacityCube.mark_dirty([instance.interpreter_id])
+
+
+@receiver(post_save, sender=Order)
+def mark_slot_capacity_dirty_order(sender, instance, created, update_fields=None, **kwargs):
+    """Отмена, завершение или перенос заказа освобождают или занимают назначенных переводчиков"""
+    if created or (update_fields is not None and ORDER_CAPACITY_FIELDS.isdisjoint(update_fields)):
+        return
+
+    from apps.services.slot_capacity import SlotCapacityCube
+    SlotCapacityCube.mark_dirty(OrderInterpreter.objects.filter(order_id=instance.pk).values_list(
+        'interpreter_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Interpreter)
+@receiver([post_save, post_delete], sender=Client)
+def invalidate_session_user(sender, instance, **kwargs):
+    """Сбросить закэшированного пользователя сессий (профиль, switch_role, пароль)"""
+    from apps.authentication import SessionUserCache
+
+    # После коммита: иначе параллельный запрос закэширует старую строку под новой версией
+    user_id = instance.pk
+    transaction.on_commit(lambda: SessionUserCache.invalidate(user_id))
+
+
+@receiver(pre_migrate)
+def create_postgres_extensions(sender, using, **kwargs):
+    """Расширения PostgreSQL, нужные индексам моделей (pg_trgm для поиска городов)"""
+    if sender.name != 'apps':
+        return
+
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+
+# UUIDv7 из случайного UUIDv4: первые 48 бит заменяются на unix время в мс,
+# биты 52 и 53 переключают версию 4 (0100) на 7 (0111). Вариант остается RFC 4122.
+UUID7_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid AS $$
+    SELECT encode(
+        set_bit(set_bit(
+            overlay(uuid_send(gen_random_uuid())
+                    PLACING substring(int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+                    FROM 1 FOR 6),
+            52, 1), 53, 1),
+        'hex')::uuid
+$$ LANGUAGE sql VOLATILE
+"""
+
+
+@receiver(pre_migrate)
+def create_uuid7_function(sender, using, **kwargs):
+    """DB default для TimeOrderedUUIDBaseModel (GenUUIDv7)"""
+    if sender.name != 'apps':
+        return
+
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(UUID7_FUNCTION_SQL)
+
+
+@receiver(post_migrate)
+def partition_time_series_tables(sender, using, **kwargs):
+    """Секционировать Availability и Booking по месяцам после создания таблиц миграциями"""
+    if sender.name != 'apps' or connections[using].vendor != 'postgresql':
+        return
+
+    from django.conf import settings
+
+    from apps.services.partitioning import PARTITIONED_MODELS
+    for partitioner in PARTITIONED_MODELS:
+        partitioner.convert(using=using, months_ahead=settings.PARTITION_MONTHS_AHEAD)
+        partitioner.ensure_partitions(using=using, months_ahead=settings.PARTITION_MONTHS_AHEAD)
+
+
+# Синхронизация календаря до перехода на AvailabilityType.BUSY сохраняла тип как 'BUSY'
+LEGACY_BUSY_TYPE = 'BUSY'
+
+
+@receiver(post_migrate)
+def normalize_legacy_availability_type(sender, using, **kwargs):
+    """Привести старые записи занятости к AvailabilityType.BUSY, иначе поиск и кубы их не видят"""
+    if sender.name != 'apps':
+        return
+
+    legacy = Availability.objects.using(using).filter(type=LEGACY_BUSY_TYPE)
+    interpreter_ids = set(legacy.values_list('translator_id', flat=True).distinct())
+    if not interpreter_ids:
+        return
+
+    # update() не отправляет post_save: производные данные сбрасываются явно
+    legacy.update(type=Availability.AvailabilityType.BUSY)
+
+    from apps.services.availability_matrix import AvailabilityMatrix
+    from apps.services.search_cache import SearchResultCache
+    from apps.services.slot_capacity import SlotCapacityCube
+    SlotCapacityCube.mark_dirty(interpreter_ids)
+    AvailabilityMatrix.mark_dirty(interpreter_ids)
+    SearchResultCache.invalidate_all()
@@ -0,0 +1,84 @@
+// Автодополнение города через /api/cities/autocomplete/
+//
+// Разметка:
+//   <input type="text" data-city-autocomplete="order-city" list="order-city-options">
+//   <datalist id="order-city-options"></datalist>
+//   <input type="hidden" id="order-city" name="city">
+//
+// Текстовое поле показывает подсказки, в скрытое поле записывается id выбранного города.
+// Город по умолчанию задается атрибутами value обоих полей. Введенный, но не выбранный
+// из подсказок город отклоняется валидацией формы.
+(function () {
+    const MIN_QUERY_LENGTH = 2;
+    const DEBOUNCE_MS = 200;
+
+    function bind(input) {
+        const url = input.dataset.autocompleteUrl || '/api/cities/autocomplete/';
+        const hidden = document.getElementById(input.dataset.cityAutocomplete);
+        const datalist = document.getElementById(input.getAttribute('list'));
+        const initial = {label: input.value, id: hidden.value};
+        const labels = new Map();
+        let timer = null;
+        let controller = null;
+
+        function render(results) {
+            labels.clear();
+            if (initial.id) {
+                labels.set(initial.label, initial.id);
+            }
+            datalist.innerHTML = '';
+            results.forEach(city => {
+                labels.set(city.label, city.id);
+                const option = document.createElement('option');
+                option.value = city.label;
+                option.textContent = city.country;
+                datalist.appendChild(option);
+            });
+        }
+
+        function search(query) {
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            fetch(`${url}?q=${encodeURIComponent(query)}`, {signal: controller.signal})
+                .then(response => response.json())
+                .then(data => render(data.results))
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        console.error('City autocomplete failed:', error);
+                    }
+                });
+        }
+
+        function validate() {
+            input.setCustomValidity(input.value.trim() && !hidden.value ? 'Select a city from the list' : '');
+        }
+
+        input.addEventListener('input', () => {
+            const query = input.value.trim();
+            // Выбор из datalist приходит тем же событием input с полным label
+            hidden.value = labels.get(input.value) || '';
+            validate();
+
+            clearTimeout(timer);
+            if (hidden.value || query.length < MIN_QUERY_LENGTH) {
+                return;
+            }
+            timer = setTimeout(() => search(query), DEBOUNCE_MS);
+        });
+
+        if (input.form) {
+            input.form.addEventListener('reset', () => {
+                // value скрытого поля - это его атрибут, reset() формы его не восстанавливает
+                hidden.value = initial.id;
+                input.setCustomValidity('');
+                render([]);
+            });
+        }
+
+        render([]);
+    }
+
+    document.querySelectorAll('[data-city-autocomplete]').forEach(bind);
+})();
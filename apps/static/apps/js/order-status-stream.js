@@ -0,0 +1,34 @@
+// Живые статусы заказов клиента через /api/orders/stream/ (Server-Sent Events)
+//
+// Разметка:
+//   <div data-order-id="<uuid>">
+//       <span data-order-status>searching</span>
+//       <span data-order-progress>0/2</span>
+//   </div>
+//
+// Каждое событие - полное состояние заказа; кроме обновления разметки
+// на document отправляется CustomEvent 'order-status' с этим состоянием.
+(function () {
+    const STREAM_URL = '/api/orders/stream/';
+
+    function apply(state) {
+        document.querySelectorAll(`[data-order-id="${state.order_id}"]`).forEach(card => {
+            card.dataset.orderState = state.status;
+            card.querySelectorAll('[data-order-status]').forEach(el => {
+                el.textContent = state.status.replace(/_/g, ' ');
+            });
+            card.querySelectorAll('[data-order-progress]').forEach(el => {
+                el.textContent = `${state.accepted_count}/${state.required_count}`;
+            });
+        });
+        document.dispatchEvent(new CustomEvent('order-status', {detail: state}));
+    }
+
+    if (!window.EventSource) {
+        return;
+    }
+
+    // EventSource сам переподключается после завершения потока сервером
+    const source = new EventSource(STREAM_URL);
+    source.onmessage = event => apply(JSON.parse(event.data));
+})();
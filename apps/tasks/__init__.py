@@ -1,18 +1,40 @@
 # Celery tasks package
-from apps.tasks.calendar_tasks import (renew_expiring_channels,
+from apps.tasks.assignment_tasks import (dispatch_offer_wave,
+                                         run_batch_assignment)
+from apps.tasks.calendar_tasks import (prune_old_availability,
+                                       renew_expiring_channels,
                                        setup_watch_for_interpreter,
                                        sync_interpreter_calendar)
+from apps.tasks.outbox_tasks import purge_outbox
+from apps.tasks.partition_tasks import maintain_partitions
+from apps.tasks.search_tasks import (bump_search_cache_versions,
+                                     reconcile_search_projection,
+                                     refresh_slot_capacity)
 from apps.tasks.telegram_tasks import (expire_order_offers, notify_client,
                                        notify_other_interpreters,
-                                       send_order_offer_notification)
+                                       send_order_offer_notification,
+                                       send_order_offer_notifications)
 
 __all__ = [
+    # Assignment tasks
+    'run_batch_assignment',
+    'dispatch_offer_wave',
     # Calendar tasks
     'renew_expiring_channels',
     'sync_interpreter_calendar',
     'setup_watch_for_interpreter',
+    'prune_old_availability',
+    # Outbox tasks
+    'purge_outbox',
+    # Partition tasks
+    'maintain_partitions',
+    # Search tasks
+    'bump_search_cache_versions',
+    'reconcile_search_projection',
+    'refresh_slot_capacity',
     # Telegram tasks
     'send_order_offer_notification',
+    'send_order_offer_notifications',
     'expire_order_offers',
     'notify_client',
     'notify_other_interpreters',
@@ -0,0 +1,31 @@
+from celery import shared_task
+
+from apps.utils import logger
+
+
+@shared_task
+def run_batch_assignment():
+    """Периодическая задача (BATCH_ASSIGNMENT_ENABLED): назначить переводчиков на ожидающие заказы пакетом"""
+    from apps.services.batch_assignment import BatchAssignmentService
+
+    stats = BatchAssignmentService.run()
+    if stats.get('skipped'):
+        logger.info('Batch assignment skipped: previous run still in progress')
+    return stats
+
+
+@shared_task
+def dispatch_offer_wave(order_id: str, wave: int):
+    """
+    Отправить следующую волну оферов заказа
+
+    Публикуется релеем outbox по таймеру волны или сразу после отказа переводчика
+
+    Args:
+        order_id: ID заказа
+        wave: Номер волны
+    """
+    from apps.services.offer_waves import OfferWaves
+
+    sent_count, _ = OfferWaves.dispatch(order_id, wave)
+    return {'wave': wave, 'sent_count': sent_count}
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from typing import List, Optional
 
 from celery import shared_task
 from django.utils import timezone
@@ -7,11 +8,14 @@ from apps.utils import logger
 
 
 @shared_task
-def renew_expiring_channels():
+def renew_expiring_channels(interpreter_ids: Optional[List[str]] = None):
     """
     Периодическая задача для обновления каналов истекающих в течение 24 часов
 
     Запускается ежедневно через Celery Beat
+
+    Args:
+        interpreter_ids: Только каналы этих переводчиков (None - все)
     """
     from apps.models import GoogleCalendarWebhookChannel
     from apps.services.google_calendar import GoogleCalendarService
@@ -22,6 +26,8 @@ def renew_expiring_channels():
         is_active=True,
         expiration__lte=tomorrow
     )
+    if interpreter_ids is not None:
+        expiring_channels = expiring_channels.filter(interpreter_id__in=interpreter_ids)
 
     renewed_count = 0
     for channel in expiring_channels:
@@ -108,3 +114,37 @@ def setup_watch_for_interpreter(interpreter_id: str):
     except Exception as e:
         logger.error(f"Error setting up watch for interpreter {interpreter_id}: {e}")
         return {'success': False, 'error': str(e)}
+
+
+@shared_task
+def prune_old_availability(batch_size: int = 5000):
+    """
+    Периодическая задача: удалить записи Availability старше горизонта хранения
+
+    Удаление идет пачками по первичному ключу, чтобы не держать долгие
+    блокировки на горячей таблице. Горизонт задается AVAILABILITY_RETENTION_DAYS.
+
+    Args:
+        batch_size: Размер пачки удаления
+    """
+    from django.conf import settings
+
+    from apps.models import Availability
+
+    cutoff = timezone.now() - timedelta(days=settings.AVAILABILITY_RETENTION_DAYS)
+
+    deleted_count = 0
+    while True:
+        batch_ids = list(
+            Availability.objects.filter(end_datetime__lt=cutoff)
+            .order_by()
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not batch_ids:
+            break
+
+        deleted, _ = Availability.objects.filter(id__in=batch_ids).delete()
+        deleted_count += deleted
+
+    logger.info(f"Pruned {deleted_count} availability rows older than {cutoff}")
+    return {'deleted_count': deleted_count}
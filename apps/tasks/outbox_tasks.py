@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from apps.utils import logger
+
+
+@shared_task
+def purge_outbox():
+    """Периодическая задача: удалить опубликованные сообщения outbox старше OUTBOX_RETENTION_DAYS"""
+    from apps.services.outbox import OutboxRelay
+
+    deleted_count = OutboxRelay.purge()
+    logger.info(f"Purged {deleted_count} outbox messages")
+    return {'deleted_count': deleted_count}
@@ -0,0 +1,23 @@
+from celery import shared_task
+from django.conf import settings
+
+from apps.utils import logger
+
+
+@shared_task
+def maintain_partitions():
+    """
+    Периодическая задача: секции Availability и Booking на будущие месяцы и архивирование старых
+
+    Горизонт вперед - PARTITION_MONTHS_AHEAD, секции старше PARTITION_ARCHIVE_AFTER_MONTHS
+    отсоединяются и переносятся в схему archive.
+    """
+    from apps.services.partitioning import PARTITIONED_MODELS
+
+    created, archived = [], []
+    for partitioner in PARTITIONED_MODELS:
+        created += partitioner.ensure_partitions(months_ahead=settings.PARTITION_MONTHS_AHEAD)
+        archived += partitioner.archive_partitions(keep_months=settings.PARTITION_ARCHIVE_AFTER_MONTHS)
+
+    logger.info(f"Partition maintenance: created {created}, archived {archived}")
+    return {'created': created, 'archived': archived}
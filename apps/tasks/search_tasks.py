@@ -0,0 +1,38 @@
+from celery import shared_task
+
+from apps.utils import logger
+
+
+@shared_task
+def bump_search_cache_versions(version_keys: list):
+    """
+    Повторно увеличить версии кэша поиска после REPLICA_MAX_LAG_SECONDS
+
+    Записи, найденные на реплике до того, как она получила изменение, станут устаревшими
+    """
+    from apps.services.search_cache import SearchResultCache
+
+    SearchResultCache.bump(version_keys)
+    return {'bumped': len(version_keys)}
+
+
+@shared_task
+def refresh_slot_capacity():
+    """Периодическая задача (SLOT_CAPACITY_ENABLED): пересчитать куб свободных слотов для помеченных переводчиков"""
+    from apps.services.slot_capacity import SlotCapacityCube
+
+    stats = SlotCapacityCube.run()
+    if stats.get('skipped'):
+        logger.info('Slot capacity refresh skipped: previous run still in progress')
+    return stats
+
+
+@shared_task
+def reconcile_search_projection():
+    """Периодическая задача: пересчитать строки проекции поиска, изменения которых прошли в обход сигналов"""
+    from apps.models import InterpreterSearchProjection
+
+    drifted = InterpreterSearchProjection.reconcile()
+    if drifted:
+        logger.warning(f"Search projection drifted for {drifted} interpreters, rebuilt")
+    return {'drifted': drifted}
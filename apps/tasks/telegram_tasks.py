@@ -1,18 +1,24 @@
 import asyncio
+from datetime import timedelta
 
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
 
 from apps.utils import logger
 
 
-@shared_task
-def send_order_offer_notification(booking_id: str):
+@shared_task(bind=True)
+def send_order_offer_notification(self, booking_id: str, attempt: int = 0):
     """
     Отправить уведомление переводчику о новом офере через Telegram
 
+    Неудачная отправка повторяется через OUTBOX_RETRY_SECONDS, всего
+    OFFER_NOTIFICATION_MAX_ATTEMPTS попыток.
+
     Args:
         booking_id: ID бронирования
+        attempt: Номер попытки (повтор из пакетной задачи)
     """
     from apps.models import Booking
     from apps.services.telegram_bot import TelegramBotService
@@ -21,6 +27,10 @@ def send_order_offer_notification(booking_id: str):
         booking = Booking.objects.get(id=booking_id)
         interpreter = booking.interpreter
 
+        # Повторная доставка из outbox: на уже отвеченный или истекший офер не отправлять
+        if booking.status != Booking.Status.OFFERED or booking.is_expired:
+            return {'success': False, 'error': 'Offer is no longer active'}
+
         if not interpreter.telegram_chat_id:
             logger.warning(f"Interpreter {interpreter.id} has no telegram_chat_id")
             return {'success': False, 'error': 'No telegram_chat_id'}
@@ -41,16 +51,92 @@ def send_order_offer_notification(booking_id: str):
         if success:
             logger.info(f"Sent offer notification to interpreter {interpreter.id}")
             return {'success': True}
-        else:
-            logger.error(f"Failed to send offer to interpreter {interpreter.id}")
-            return {'success': False, 'error': 'Failed to send message'}
+        error = 'Failed to send message'
 
     except Booking.DoesNotExist:
         logger.error(f"Booking {booking_id} not found")
         return {'success': False, 'error': 'Booking not found'}
     except Exception as e:
-        logger.error(f"Error sending offer notification for booking {booking_id}: {e}")
-        return {'success': False, 'error': str(e)}
+        error = str(e)
+
+    attempts_left = settings.OFFER_NOTIFICATION_MAX_ATTEMPTS - attempt - self.request.retries - 1
+    logger.error(f"Error sending offer notification for booking {booking_id} "
+                 f"({attempts_left} attempts left): {error}")
+    if attempts_left <= 0:
+        return {'success': False, 'error': error}
+    raise self.retry(countdown=settings.OUTBOX_RETRY_SECONDS, max_retries=None)
+
+
+@shared_task(bind=True, max_retries=3)
+def send_order_offer_notifications(self, args_list: list):
+    """
+    Пакетная отправка оферов: одна задача и одна сессия бота на пачку outbox
+
+    Ошибка до отправки (БД, создание бота) повторяет всю пачку. Оферы, которые
+    не удалось отправить, возвращаются в outbox отдельными сообщениями со
+    следующим номером попытки, чтобы повтор не дублировал уже отправленные.
+    Ошибки после отправки пачку не повторяют.
+
+    Args:
+        args_list: Список args отдельных send_order_offer_notification ([booking_id] или [booking_id, attempt])
+    """
+    from apps.models import Booking
+    from apps.services.outbox import Outbox
+    from apps.services.telegram_bot import TelegramBotService
+
+    attempts = {args[0]: args[1] if len(args) > 1 else 0 for args in args_list}
+    try:
+        bookings = list(
+            Booking.objects.select_related('interpreter', 'order')
+            .filter(id__in=list(attempts), status=Booking.Status.OFFERED, is_expired=False)
+            .exclude(interpreter__telegram_chat_id__isnull=True)
+            .exclude(interpreter__telegram_chat_id='')
+        )
+        bot_service = TelegramBotService() if bookings else None
+    except Exception as e:
+        # Ни один офер еще не отправлен: безопасно повторить всю пачку
+        logger.error(f"Error preparing {len(args_list)} offer notifications: {e}")
+        raise self.retry(exc=e, countdown=2 ** self.request.retries)
+
+    async def send_all(bot_service):
+        failed = []
+        try:
+            for booking in bookings:
+                try:
+                    sent = await bot_service.send_order_offer(booking.interpreter.telegram_chat_id, booking.order,
+                                                              str(booking.id))
+                except Exception as e:
+                    logger.error(f"Error sending offer notification for booking {booking.id}: {e}")
+                    sent = False
+                if not sent:
+                    failed.append(str(booking.id))
+        finally:
+            # Ошибка закрытия сессии не должна повторять уже отправленные оферы
+            try:
+                await bot_service.close()
+            except Exception as e:
+                logger.warning(f"Failed to close Telegram bot session: {e}")
+        return failed
+
+    failed = asyncio.run(send_all(bot_service)) if bookings else []
+
+    retry = [booking_id for booking_id in failed
+             if attempts[booking_id] + 1 < settings.OFFER_NOTIFICATION_MAX_ATTEMPTS]
+    if retry:
+        Outbox.enqueue_many(
+            send_order_offer_notification,
+            [[booking_id, attempts[booking_id] + 1] for booking_id in retry],
+            [f'offer:{booking_id}:{attempts[booking_id] + 1}' for booking_id in retry],
+            available_at=timezone.now() + timedelta(seconds=settings.OUTBOX_RETRY_SECONDS),
+        )
+    if len(failed) > len(retry):
+        logger.error(f"Gave up on {len(failed) - len(retry)} offer notifications after "
+                     f"{settings.OFFER_NOTIFICATION_MAX_ATTEMPTS} attempts")
+
+    sent_count = len(bookings) - len(failed)
+    logger.info(f"Sent {sent_count} of {len(args_list)} offer notifications, {len(retry)} queued for retry")
+    return {'success': not failed, 'sent_count': sent_count, 'failed_count': len(failed),
+            'retry_count': len(retry), 'skipped_count': len(args_list) - len(bookings)}
 
 
 @shared_task
@@ -101,9 +187,17 @@ def expire_order_offers(order_id: str):
         # Если все оферы истекли и заказ не назначен
         if order.status == Order.OrderStatus.SEARCHING:
             assigned_count = order.bookings.filter(status=Booking.Status.ACCEPTED).count()
-            if assigned_count == 0:
+            # Оферы следующих волн еще ждут ответа
+            waiting = order.bookings.filter(status=Booking.Status.OFFERED, is_expired=False).exists()
+            if assigned_count == 0 and not waiting:
                 # Уведомить клиента
-                notify_client.delay(str(order.id), 'all_offers_expired')
+                from apps.services.outbox import Outbox
+                Outbox.enqueue(notify_client, [str(order.id), 'all_offers_expired'],
+                               dedup_key=f'notify_client:{order.id}:all_offers_expired')
+
+        if expired_count:
+            from apps.services.order_events import OrderEvents
+            OrderEvents.publish(order.id, 'offers_expired', expired_count=expired_count)
 
         logger.info(f"Expired {expired_count} offers for order {order_id}")
         return {'expired_count': expired_count}
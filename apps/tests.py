@@ -0,0 +1,74 @@
+from django.test import TestCase
+
+from apps.models import Interpreter, InterpreterSearchProjection, Language
+from apps.services.search_results import InterpreterSearchResultSerializer
+
+
+class InterpreterSearchResultSerializerTests(TestCase):
+    """Количество запросов страницы кандидатов не зависит от их числа"""
+
+    # id страницы из проекции, переводчики с .only(), prefetch языков
+    QUERIES_PER_PAGE = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.languages = Language.objects.bulk_create([Language(name=name) for name in ('English', 'Russian', 'Uzbek')])
+
+    def create_interpreters(self, count: int) -> list:
+        interpreters = []
+        for i in range(count):
+            interpreter = Interpreter.objects.create(email=f"interpreter-{i}@example.com", first_name='Test',
+                                                     last_name=f"Interpreter {i}", is_moderated=True)
+            interpreter.language.set(self.languages[:i % len(self.languages) + 1])
+            interpreters.append(interpreter)
+        InterpreterSearchProjection.rebuild([interpreter.id for interpreter in interpreters])
+        return interpreters
+
+    def serializer(self, **kwargs) -> InterpreterSearchResultSerializer:
+        return InterpreterSearchResultSerializer('order', InterpreterSearchProjection.objects.all(), **kwargs)
+
+    def test_page_queries_do_not_grow_with_candidates(self):
+        for count in (1, 10, 40):
+            with self.subTest(count=count):
+                InterpreterSearchProjection.objects.all().delete()
+                Interpreter.objects.all().delete()
+                interpreters = self.create_interpreters(count)
+
+                with self.assertNumQueries(self.QUERIES_PER_PAGE):
+                    items, next_token = self.serializer().page()
+
+                self.assertEqual(len(items), count)
+                self.assertIsNone(next_token)
+                self.assertEqual(sorted(item['id'] for item in items),
+                                 sorted(str(interpreter.id) for interpreter in interpreters))
+
+    def test_ranked_page_queries_do_not_grow_with_candidates(self):
+        interpreters = self.create_interpreters(40)
+        distances = {interpreter.id: float(i) for i, interpreter in enumerate(reversed(interpreters))}
+
+        with self.assertNumQueries(self.QUERIES_PER_PAGE):
+            items, _ = self.serializer(distances=distances).page()
+
+        self.assertEqual([item['id'] for item in items],
+                         [str(interpreter.id) for interpreter in reversed(interpreters)])
+
+    def test_cursor_pages_cover_all_candidates(self):
+        interpreters = self.create_interpreters(25)
+        serializer = self.serializer(page_size=10)
+
+        seen, cursor = [], None
+        while True:
+            with self.assertNumQueries(self.QUERIES_PER_PAGE):
+                items, cursor = serializer.page(cursor)
+            seen += [item['id'] for item in items]
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, sorted(str(interpreter.id) for interpreter in interpreters))
+
+    def test_cursor_of_another_order_is_rejected(self):
+        self.create_interpreters(3)
+        _, cursor = self.serializer(page_size=1).page()
+
+        with self.assertRaises(ValueError):
+            InterpreterSearchResultSerializer('other', InterpreterSearchProjection.objects.all()).page(cursor)
@@ -5,10 +5,11 @@ from apps.views import (BillingView, DashboardView, LoginFormView, LogoutView,
                         RegisterCreateView, RegisterInterpreterCreateView,
                         SettingsView, TelegramWebhookView, RoleSwitchView, GoogleCallbackView,
                         GoogleLoginView, InterpreterProfileView, GoogleCalendarWebhookView, OrderCreateView,
-                        OrderSendOffersView, CalendarStatusAPIView,
+                        OrderInterpretersView, OrderSendOffersView, CalendarStatusAPIView, CalendarStatusStreamView,
                         GoogleCalendarAuthorizeView,
                         GoogleCalendarCallbackView,
-                        GoogleCalendarDisconnectView)
+                        GoogleCalendarDisconnectView, MetricsView, CityAutocompleteView, OrderStatusStreamView,
+                        SlotCapacityView)
 
 urlpatterns = [
     path('', LoginFormView.as_view(), name='login_page'),
@@ -36,6 +37,7 @@ urlpatterns = [
     path('calendar/oauth2/callback/', GoogleCalendarCallbackView.as_view(), name='google_calendar_callback'),
     path('calendar/disconnect/', GoogleCalendarDisconnectView.as_view(), name='google_calendar_disconnect'),
     path('calendar/status/', CalendarStatusAPIView.as_view(), name='google_calendar_status'),
+    path('calendar/status/stream/', CalendarStatusStreamView.as_view(), name='google_calendar_status_stream'),
 
     # Webhook Endpoints
     path('webhook/google-calendar/', GoogleCalendarWebhookView.as_view(), name='google_calendar_webhook'),
@@ -43,5 +45,14 @@ urlpatterns = [
 
     # Order Workflow API
     path('api/orders/create/', OrderCreateView.as_view(), name='order_create'),
+    path('api/orders/<uuid:order_id>/interpreters/', OrderInterpretersView.as_view(), name='order_interpreters'),
     path('api/orders/<uuid:order_id>/send-offers/', OrderSendOffersView.as_view(), name='order_send_offers'),
+    path('api/orders/stream/', OrderStatusStreamView.as_view(), name='order_status_stream'),
+
+    # Reference data
+    path('api/cities/autocomplete/', CityAutocompleteView.as_view(), name='city_autocomplete'),
+    path('api/slot-capacity/', SlotCapacityView.as_view(), name='slot_capacity'),
+
+    # Instrumentation
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
@@ -1,13 +1,18 @@
 from apps.views.auth import (LoginFormView, LogoutView, RegisterCreateView,
                              RegisterInterpreterCreateView)
+from apps.views.cities import CityAutocompleteView
 from apps.views.google_calendar_oauth import (CalendarStatusAPIView,
+                                              CalendarStatusStreamView,
                                               GoogleCalendarAuthorizeView,
                                               GoogleCalendarCallbackView,
                                               GoogleCalendarDisconnectView)
 from apps.views.google_calendar_webhook import GoogleCalendarWebhookView
+from apps.views.metrics import MetricsView
 from apps.views.oauth2 import GoogleCallbackView, GoogleLoginView
-from apps.views.order_workflow import OrderCreateView, OrderSendOffersView
+from apps.views.order_workflow import (OrderCreateView, OrderInterpretersView,
+                                       OrderSendOffersView, OrderStatusStreamView)
 from apps.views.profile import (BillingView, DashboardView, NewOrderView,
                                 OrdersView, ProfileView, SettingsView, InterpreterProfileView)
 from apps.views.role_switch import RoleSwitchView
+from apps.views.slot_capacity import SlotCapacityView
 from apps.views.telegram_webhook import TelegramWebhookView
@@ -7,7 +7,8 @@ from django.views.generic import CreateView, FormView
 
 from apps.forms import (LoginForm, RegisterClientModelForm,
                         RegisterInterpreterModelForm)
-from apps.models import City, Interpreter, Language, TranslationType
+from apps.models import Interpreter
+from apps.services.reference_data import ReferenceData
 from apps.views.mixins import LoginNotRequiredMixin
 
 
@@ -38,9 +39,9 @@ class RegisterCreateView(LoginNotRequiredMixin, CreateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx['cities'] = City.objects.all()
-        ctx['languages'] = Language.objects.all()
-        ctx['translation_types'] = TranslationType.objects.all()
+        ctx['cities'] = ReferenceData.cities()
+        ctx['languages'] = ReferenceData.languages()
+        ctx['translation_types'] = ReferenceData.translation_types()
         return ctx
 
     def form_valid(self, form):
@@ -64,8 +65,8 @@ class RegisterInterpreterCreateView(LoginNotRequiredMixin, CreateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx['cities'] = City.objects.all()
-        ctx['languages'] = Language.objects.all()
+        ctx['cities'] = ReferenceData.cities()
+        ctx['languages'] = ReferenceData.languages()
         return ctx
 
     def form_valid(self, form):
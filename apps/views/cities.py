@@ -0,0 +1,59 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import Case, IntegerField, Value, When
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views import View
+
+from apps.db_router import read_database
+from apps.models import City
+
+
+class CityAutocompleteView(View):
+    """
+    Автодополнение городов (с регионом и страной)
+
+    Поиск по trigram GIN индексу city_name_upper_trgm: сначала совпадения
+    по префиксу, затем по похожести. Ответ кэшируется браузером и прокси.
+
+    GET параметры:
+        q (str): Строка поиска (минимум MIN_QUERY_LENGTH символов)
+        limit (int, optional): Количество результатов (по умолчанию DEFAULT_LIMIT)
+    """
+
+    MIN_QUERY_LENGTH = 2
+    DEFAULT_LIMIT = 10
+    MAX_LIMIT = 50
+    CACHE_MAX_AGE = 60 * 60  # 1 час
+
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+
+        try:
+            limit = min(int(request.GET.get('limit', self.DEFAULT_LIMIT)), self.MAX_LIMIT)
+        except ValueError:
+            limit = self.DEFAULT_LIMIT
+
+        results = []
+        if len(query) >= self.MIN_QUERY_LENGTH:
+            cities = City.objects.using(read_database()).filter(
+                name__icontains=query
+            ).select_related('region__country').annotate(
+                is_prefix=Case(When(name__istartswith=query, then=Value(0)), default=Value(1),
+                               output_field=IntegerField()),
+                similarity=TrigramSimilarity('name', query),
+            ).order_by('is_prefix', '-similarity', 'name')[:limit]
+
+            results = [
+                {
+                    'id': str(city.id),
+                    'name': city.name,
+                    'region': city.region.name,
+                    'country': city.region.country.name,
+                    'label': f"{city.name}, {city.region.name}",
+                }
+                for city in cities
+            ]
+
+        response = JsonResponse({'results': results})
+        patch_cache_control(response, public=True, max_age=self.CACHE_MAX_AGE)
+        return response
@@ -1,16 +1,23 @@
+import asyncio
+import json
 import logging
 import secrets
 import urllib.parse
 
 import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import JsonResponse
+from django.http import (HttpResponseNotModified, JsonResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import redirect
+from django.utils.http import parse_etags
 from django.views import View
 
 from apps.models import GoogleCalendarCredentials, User  # Import GoogleCalendarCredentials
+from apps.services.calendar_status import CalendarStatusCache
+from apps.services.calendar_status import hub as calendar_status_hub
 from apps.services.google_calendar import GoogleCalendarService
 
 logger = logging.getLogger(__name__)
@@ -44,6 +51,7 @@ class GoogleCalendarAuthorizeView(LoginRequiredMixin, View):
                 # If not authorized, reset connection status to allow re-authorization
                 interpreter.google_calendar_connected = False
                 interpreter.save(update_fields=['google_calendar_connected'])
+                CalendarStatusCache.invalidate(interpreter.id)
                 messages.warning(request, "Your Google Calendar connection needs to be re-authorized.")
 
         # Генерируем state для CSRF защиты
@@ -122,6 +130,8 @@ class GoogleCalendarCallbackView(LoginRequiredMixin, View):
             interpreter.google_calendar_connected = True
             interpreter.save(update_fields=['google_calendar_connected'])
 
+            CalendarStatusCache.invalidate(interpreter.id)
+
             # Пробуем синхронизировать календарь
             self._initial_sync(interpreter)
 
@@ -235,6 +245,7 @@ class GoogleCalendarDisconnectView(LoginRequiredMixin, View):
             interpreter = user.interpreter
             interpreter.google_calendar_connected = False
             interpreter.save(update_fields=['google_calendar_connected'])
+            CalendarStatusCache.invalidate(interpreter.id)
 
             messages.success(request, "Google Calendar disconnected successfully")
 
@@ -251,6 +262,9 @@ class CalendarStatusAPIView(LoginRequiredMixin, View):
     """
     API endpoint для проверки статуса подключения календаря.
     Используется для обновления UI в реальном времени.
+
+    Статус отдается из кэша (CalendarStatusCache) и поддерживает
+    ETag / If-None-Match с ответом 304.
     """
 
     def get(self, request):
@@ -259,11 +273,74 @@ class CalendarStatusAPIView(LoginRequiredMixin, View):
         if not request.user.is_interpreter:
             return JsonResponse({'connected': False})
 
-        calendar_service = GoogleCalendarService(request.user.interpreter)
-        is_authorized = calendar_service.is_authorized()
+        payload = CalendarStatusCache.get(request.user.id)
+
+        if payload['etag'] in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = JsonResponse({
+                **payload['status'],
+                'user_id': str(request.user.id),
+                'email': request.user.email,
+            })
+
+        response['ETag'] = payload['etag']
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class CalendarStatusStreamView(View):
+    """
+    Server-Sent Events поток статуса календаря (только под ASGI, SSE_ENABLED)
+
+    Заменяет периодический опрос CalendarStatusAPIView: первым приходит текущий
+    статус, затем событие отправляется только при изменении ETag статуса.
+    Изменения приходят из общей подписки Redis процесса на канал
+    calendar_status, поэтому ожидание не занимает поток воркера.
+    """
+
+    KEEPALIVE_INTERVAL = 15  # секунды между комментариями keep-alive
+    STREAM_DURATION = 300  # после этого клиент переподключается (EventSource делает это сам)
+
+    async def get(self, request):
+        """Открывает SSE поток"""
+        # Под WSGI асинхронный генератор читался бы целиком, удерживая поток воркера
+        if not settings.SSE_ENABLED:
+            return JsonResponse({'error': 'Calendar status stream is disabled'}, status=404)
+
+        user = await request.auser()
+        if not user.is_authenticated or not user.is_interpreter:
+            return JsonResponse({'error': 'Not authorized'}, status=403)
 
-        return JsonResponse({
-            'connected': is_authorized,
-            'user_id': str(request.user.id),
-            'email': request.user.email,
-        })
+        last_etag = request.headers.get('Last-Event-ID')
+        response = StreamingHttpResponse(
+            self._stream(str(user.id), last_etag),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def _stream(self, interpreter_id: str, last_etag):
+        """Асинхронный генератор событий: статус при каждом изменении ETag"""
+        # Подписка до чтения статуса, чтобы не потерять изменение между ними
+        queue = calendar_status_hub.subscribe(interpreter_id)
+        try:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.STREAM_DURATION
+            changed = True
+            while (remaining := deadline - loop.time()) > 0:
+                if changed:
+                    payload = await sync_to_async(CalendarStatusCache.get)(interpreter_id)
+                    if payload['etag'] != last_etag:
+                        last_etag = payload['etag']
+                        yield f"id: {last_etag}\ndata: {json.dumps(payload['status'])}\n\n"
+                try:
+                    await asyncio.wait_for(queue.get(), timeout=min(self.KEEPALIVE_INTERVAL, remaining))
+                    changed = True
+                except asyncio.TimeoutError:
+                    changed = False
+                    # Комментарий для поддержания соединения
+                    yield ": keep-alive\n\n"
+        finally:
+            calendar_status_hub.unsubscribe(interpreter_id, queue)
@@ -63,8 +63,12 @@ class GoogleCalendarWebhookView(View):
     def _handle_stop(self, channel_id):
         """Обработка stop события (канал остановлен)"""
         from apps.models import GoogleCalendarWebhookChannel
+        from apps.services.calendar_status import CalendarStatusCache
 
-        GoogleCalendarWebhookChannel.objects.filter(
-            channel_id=channel_id
-        ).update(is_active=False)
+        channels = GoogleCalendarWebhookChannel.objects.filter(channel_id=channel_id)
+        interpreter_ids = list(channels.values_list('interpreter_id', flat=True))
+        channels.update(is_active=False)
+
+        for interpreter_id in interpreter_ids:
+            CalendarStatusCache.invalidate(interpreter_id)
         logger.info(f"Channel {channel_id} marked as inactive")
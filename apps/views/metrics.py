@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views import View
+
+from apps.instrumentation import registry
+
+
+class MetricsView(View):
+    """
+    Агрегированные метрики инструментирования в формате Prometheus
+
+    Доступ: Bearer токен INSTRUMENTATION_METRICS_TOKEN или staff пользователь.
+    """
+
+    def get(self, request):
+        token = settings.INSTRUMENTATION_METRICS_TOKEN
+        authorized = (
+            (token and request.headers.get('Authorization') == f"Bearer {token}")
+            or request.user.is_staff
+        )
+        if not authorized:
+            return HttpResponseForbidden()
+
+        return HttpResponse(registry.render_prometheus(), content_type='text/plain; version=0.0.4')
@@ -1,11 +1,17 @@
+import asyncio
 import json
 
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 
-from apps.models import Order
+from apps.models import Language, Order
+from apps.services.order_events import OrderEvents, hub
+from apps.services.search_results import InterpreterSearchResultSerializer
 from apps.utils import logger
 
 
@@ -21,7 +27,7 @@ class OrderCreateView(View):
 
             # Создать заказ
             order = Order.objects.create(
-                client=request.user,
+                client_id=request.user.id,
                 location_type=data['event_type'],
                 city_id=data.get('city'),
                 address=data.get('address', ''),
@@ -32,8 +38,15 @@ class OrderCreateView(View):
                 end_datetime=data['end_datetime']
             )
 
+            # Добавить направления перевода; языки заказа - их исходные и целевые языки
+            if data.get('language_pairs'):
+                order.language_pairs.set(data['language_pairs'])
+                order.languages.set(Language.objects.filter(
+                    Q(source_pairs__in=data['language_pairs']) | Q(target_pairs__in=data['language_pairs'])
+                ).distinct())
+
             # Добавить языки
-            if 'languages' in data:
+            elif 'languages' in data:
                 order.languages.set(data['languages'])
 
             # Добавить типы перевода
@@ -45,19 +58,17 @@ class OrderCreateView(View):
             workflow = OrderWorkflowService(order)
             result = workflow.create_and_search()
 
+            serializer = InterpreterSearchResultSerializer(result['order_id'], result['interpreters'],
+                                                           distances=result['distances'])
+            items, next_token = serializer.page()
+
             return JsonResponse({
                 'success': True,
                 'order_id': result['order_id'],
-                'interpreters': [
-                    {
-                        'id': str(i.id),
-                        'name': i.get_full_name(),
-                        'languages': [str(lang) for lang in i.language.all()],
-                        'photo': i.photo.url if hasattr(i, 'photo') and i.photo else None
-                    }
-                    for i in result['interpreters']
-                ],
-                'required_count': result['required_count']
+                'interpreters': items,
+                'next': next_token,
+                'required_count': result['required_count'],
+                'found_count': result['found_count']
             })
 
         except Exception as e:
@@ -68,6 +79,41 @@ class OrderCreateView(View):
             }, status=400)
 
 
+class OrderInterpretersView(View):
+    """API для следующих страниц результатов поиска (курсор next)"""
+
+    def get(self, request, order_id):
+        """Вернуть страницу кандидатов после курсора"""
+        try:
+            order = Order.objects.get(id=order_id, client_id=request.user.id)
+
+            from apps.services.interpreter_search import \
+                InterpreterSearchService
+            search_service = InterpreterSearchService(order)
+            interpreters = search_service.find_available_interpreters()
+
+            serializer = InterpreterSearchResultSerializer(order.id, interpreters, distances=search_service.distances)
+            items, next_token = serializer.page(request.GET.get('cursor'))
+
+            return JsonResponse({
+                'success': True,
+                'order_id': str(order.id),
+                'interpreters': items,
+                'next': next_token
+            })
+
+        except Order.DoesNotExist:
+            return JsonResponse({
+                'success': False,
+                'error': 'Order not found'
+            }, status=404)
+        except ValueError as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class OrderSendOffersView(View):
     """API для отправки оферов выбранным переводчикам"""
@@ -82,12 +128,13 @@ class OrderSendOffersView(View):
 
             from apps.services.order_workflow import OrderWorkflowService
             workflow = OrderWorkflowService(order)
-            result = workflow.send_offers(interpreter_ids)
+            result = workflow.send_offers(interpreter_ids, waves=data.get('waves'))
 
             return JsonResponse({
                 'success': True,
                 'message': 'Оферы отправлены',
-                'sent_count': result['sent_count']
+                'sent_count': result['sent_count'],
+                'queued_count': result.get('queued_count', 0)
             })
 
         except Order.DoesNotExist:
@@ -101,3 +148,57 @@ class OrderSendOffersView(View):
                 'success': False,
                 'error': str(e)
             }, status=400)
+
+
+class OrderStatusStreamView(View):
+    """
+    Server-Sent Events поток статусов заказов клиента (только под ASGI, SSE_ENABLED)
+
+    Первыми приходят текущие состояния активных заказов, затем события
+    OrderEvents из общей подписки Redis процесса (EventHub). Каждое
+    событие - полное состояние заказа, поэтому клиенту достаточно заменить
+    отображаемый статус.
+    """
+
+    KEEPALIVE_INTERVAL = 15  # секунды между комментариями keep-alive
+    STREAM_DURATION = 300  # после этого клиент переподключается (EventSource делает это сам)
+
+    async def get(self, request):
+        """Открывает SSE поток"""
+        # Под WSGI асинхронный генератор читался бы целиком, удерживая поток воркера
+        if not settings.SSE_ENABLED:
+            return JsonResponse({'error': 'Order status stream is disabled'}, status=404)
+
+        user = await request.auser()
+        if not user.is_authenticated or not user.is_client:
+            return JsonResponse({'error': 'Not authorized'}, status=403)
+
+        response = StreamingHttpResponse(self._stream(str(user.id)), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def _stream(self, client_id: str):
+        """Асинхронный генератор событий; отписка при отключении клиента (CancelledError)"""
+        # Подписка до снимка, чтобы не потерять изменения между ними
+        queue = hub.subscribe(client_id)
+        try:
+            for state in await sync_to_async(OrderEvents.snapshot)(client_id):
+                yield self._event({**state, 'event': 'snapshot'})
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.STREAM_DURATION
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=min(self.KEEPALIVE_INTERVAL, remaining))
+                except asyncio.TimeoutError:
+                    # Комментарий для поддержания соединения
+                    yield ": keep-alive\n\n"
+                    continue
+                yield self._event(payload)
+        finally:
+            hub.unsubscribe(client_id, queue)
+
+    @staticmethod
+    def _event(payload: dict) -> str:
+        return f"id: {payload['order_id']}:{payload['updated_at']}\ndata: {json.dumps(payload)}\n\n"
@@ -1,7 +1,9 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.utils.dateparse import parse_datetime
 from django.views.generic import TemplateView
 
-from apps.models import City, Client, LanguagePair, TranslationType
+from apps.services.calendar_status import CalendarStatusCache
+from apps.services.reference_data import ReferenceData
 
 
 class InterpreterProfileView(LoginRequiredMixin, TemplateView):
@@ -9,7 +11,10 @@ class InterpreterProfileView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx['cities'] = Client.objects.all()
+        # Тот же источник, что у CalendarStatusAPIView и потока: страница и JS сравнивают одно значение
+        status = CalendarStatusCache.get(self.request.user.id)['status'] if self.request.user.is_interpreter else {}
+        ctx['calendar_connected'] = bool(status.get('connected'))
+        ctx['calendar_last_sync'] = parse_datetime(status['last_sync']) if status.get('last_sync') else None
         return ctx
 
 
@@ -27,12 +32,14 @@ class OrdersView(LoginRequiredMixin, TemplateView):
 
 class NewOrderView(LoginRequiredMixin, TemplateView):
     template_name = 'apps/client/new-order.html'
+    DEFAULT_CITY_NAME = 'Tashkent'
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx['cities'] = City.objects.all()
-        ctx['language_pairs'] = LanguagePair.objects.all()
-        ctx['translation_types'] = TranslationType.objects.all()
+        ctx['default_city'] = next(
+            (city for city in ReferenceData.cities() if city.name == self.DEFAULT_CITY_NAME), None)
+        ctx['language_pairs'] = ReferenceData.language_pairs()
+        ctx['translation_types'] = ReferenceData.translation_types()
         return ctx
 
 
@@ -0,0 +1,69 @@
+import uuid
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views import View
+
+from apps.models import Order
+from apps.services.slot_capacity import ONLINE_SCOPE, SlotCapacityCube
+
+
+class SlotCapacityView(View):
+    """
+    Свободные переводчики по слотам для календаря нового заказа
+
+    Читает куб SlotCapacity (задача refresh_slot_capacity) вместо поиска по
+    каждой ячейке календаря. Ответ кэшируется в Redis по версии куба и
+    браузером на CACHE_MAX_AGE.
+
+    GET параметры:
+        pairs (str): ID направлений перевода через запятую
+        location_type (str): online или onsite
+        city (str): ID города (для onsite)
+        translation_type (str, optional): ID типа перевода
+        start (str): Первый день (YYYY-MM-DD)
+        end (str): Последний день (YYYY-MM-DD), не больше MAX_DAYS дней
+    """
+
+    MAX_DAYS = 31
+    MAX_PAIRS = 10
+    CACHE_MAX_AGE = 60
+
+    def get(self, request):
+        if not settings.SLOT_CAPACITY_ENABLED:
+            return JsonResponse({'error': 'Slot capacity is disabled'}, status=404)
+
+        try:
+            scope, pair_ids, translation_type_id, start, end = self._parse(request.GET)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        response = JsonResponse({'slots': SlotCapacityCube.counts(scope, pair_ids, translation_type_id, start, end)})
+        patch_cache_control(response, public=True, max_age=self.CACHE_MAX_AGE)
+        return response
+
+    def _parse(self, params) -> tuple:
+        """Проверить параметры запроса (ValueError с описанием ошибки)"""
+        pair_ids = [str(uuid.UUID(pair_id)) for pair_id in params.get('pairs', '').split(',') if pair_id]
+        if not pair_ids:
+            raise ValueError('pairs is required')
+        if len(pair_ids) > self.MAX_PAIRS:
+            raise ValueError(f"At most {self.MAX_PAIRS} pairs")
+
+        location_type = params.get('location_type', Order.LocationType.ONSITE)
+        if location_type == Order.LocationType.ONLINE:
+            scope = ONLINE_SCOPE
+        elif location_type == Order.LocationType.ONSITE:
+            scope = str(uuid.UUID(params.get('city', '')))
+        else:
+            raise ValueError(f"Unknown location_type: {location_type}")
+
+        translation_type_id = params.get('translation_type')
+        translation_type_id = str(uuid.UUID(translation_type_id)) if translation_type_id else None
+
+        start, end = date.fromisoformat(params.get('start', '')), date.fromisoformat(params.get('end', ''))
+        if not start <= end < start + timedelta(days=self.MAX_DAYS):
+            raise ValueError(f"start..end must be at most {self.MAX_DAYS} days")
+        return scope, pair_ids, translation_type_id, start, end
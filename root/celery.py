@@ -0,0 +1,50 @@
+import os
+
+from celery import Celery
+from celery.signals import (worker_init, worker_process_init,
+                            worker_process_shutdown)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'root.settings')
+
+app = Celery('root')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+
+def close_database_pools():
+    """Закрыть соединения и пулы всех алиасов текущего процесса"""
+    from django.db import connections
+
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        if getattr(connection, 'pool', None) is not None:
+            connection.close_pool()
+
+
+@worker_init.connect
+def close_pools_before_fork(**kwargs):
+    """
+    Главный процесс prefork: закрыть пулы до создания дочерних процессов
+
+    Иначе дочерние процессы унаследуют сокеты открытых соединений и будут
+    писать в них одновременно с родителем.
+    """
+    close_database_pools()
+
+
+@worker_process_init.connect
+def limit_worker_pool(**kwargs):
+    """Дочерний процесс prefork: свой пул с лимитом CELERY_DB_POOL_MAX_SIZE"""
+    from django.conf import settings
+    from django.db import connections
+
+    for alias in connections:
+        pool = connections.settings[alias].get('OPTIONS', {}).get('pool')
+        if isinstance(pool, dict):
+            pool['max_size'] = settings.CELERY_DB_POOL_MAX_SIZE
+            pool['min_size'] = min(pool.get('min_size', 0), settings.CELERY_DB_POOL_MAX_SIZE)
+
+
+@worker_process_shutdown.connect
+def close_pools_on_shutdown(**kwargs):
+    close_database_pools()
@@ -0,0 +1,54 @@
+"""
+Пул соединений PostgreSQL (psycopg 3 + psycopg_pool через OPTIONS['pool'] Django)
+
+Модуль импортируется из settings, поэтому не должен зависеть от моделей и django.conf.
+"""
+import os
+
+# Сброс состояния сессии при возврате соединения в пул. RESET ALL не используется:
+# он сбросил бы TIME ZONE, который Django выставляет один раз при создании соединения.
+RESET_SQL = (
+    "UNLISTEN *",
+    "SELECT pg_advisory_unlock_all()",
+    "RESET statement_timeout",
+    "RESET lock_timeout",
+    "RESET idle_in_transaction_session_timeout",
+)
+
+
+def reset_connection(conn):
+    """
+    Callback reset пула: вызывается для каждого соединения, вернувшегося в пул
+
+    Незавершенную транзакцию psycopg_pool откатывает сам до вызова reset;
+    здесь снимаются advisory-блокировки, подписки LISTEN и таймауты, которые
+    задача или запрос могли выставить на уровне сессии.
+    """
+    conn.autocommit = True
+    for sql in RESET_SQL:
+        conn.execute(sql)
+
+
+def pool_options(max_size: int = None) -> dict:
+    """
+    Параметры psycopg_pool.ConnectionPool для DATABASES[...]['OPTIONS']['pool']
+
+    Лимиты действуют на процесс: gunicorn/uvicorn воркер или дочерний процесс
+    Celery prefork держит свой пул. Проверку соединения при выдаче из пула
+    (check) Django подключает сам при CONN_HEALTH_CHECKS = True.
+
+    Args:
+        max_size: Максимум соединений процесса (по умолчанию DB_POOL_MAX_SIZE)
+
+    Returns:
+        Словарь параметров пула
+    """
+    max_size = max_size or int(os.getenv('DB_POOL_MAX_SIZE', 10))
+    return {
+        'min_size': min(int(os.getenv('DB_POOL_MIN_SIZE', 2)), max_size),
+        'max_size': max_size,
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+        'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+        'reset': reset_connection,
+    }
@@ -5,6 +5,8 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
+from root.db_pool import pool_options
+
 load_dotenv('.env')
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -22,6 +24,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # My apps
     'apps.apps.AppsConfig',
@@ -36,11 +39,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'apps.middleware.ReplicaStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.middleware.RoleAwareAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -57,12 +62,18 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'apps.context_processors.sse',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'root.wsgi.application'
+ASGI_APPLICATION = 'root.asgi.application'
+
+# Потоки Server-Sent Events держат соединение минутами: включать только под ASGI сервером (make asgi).
+# Под WSGI каждый поток занимает поток воркера, поэтому страницы их не открывают
+SSE_ENABLED = os.getenv('SSE_ENABLED', 'False') == 'True'
 
 # Database
 
@@ -74,9 +85,39 @@ DATABASES = {
         "PASSWORD": os.getenv('POSTGRES_PASSWORD'),
         "HOST": os.getenv('POSTGRES_HOST'),
         "PORT": os.getenv('POSTGRES_PORT'),
+        # Проверка соединения перед использованием (и при выдаче из пула)
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Пул соединений на процесс (psycopg_pool); без пула - постоянные соединения на CONN_MAX_AGE секунд
+DB_POOL_ENABLED = os.getenv('DB_POOL_ENABLED', 'True') == 'True'
+# Лимит пула в дочернем процессе Celery prefork (задачи выполняются по одной, хватает 1-2 соединений)
+CELERY_DB_POOL_MAX_SIZE = int(os.getenv('CELERY_DB_POOL_MAX_SIZE', 2))
+if DB_POOL_ENABLED:
+    DATABASES['default']['OPTIONS'] = {'pool': pool_options()}
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('CONN_MAX_AGE', 60))
+
+# Реплики для чтения: POSTGRES_REPLICAS="host:port,host:port" (остальные параметры как у primary)
+REPLICA_DATABASES = []
+for index, address in enumerate(filter(None, os.getenv('POSTGRES_REPLICAS', '').split(',')), start=1):
+    replica_host, _, replica_port = address.strip().partition(':')
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        "OPTIONS": {'pool': pool_options()} if DB_POOL_ENABLED else {},
+        "HOST": replica_host,
+        "PORT": replica_port or DATABASES['default']['PORT'],
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['apps.db_router.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 10))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', 5))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -102,6 +143,9 @@ PASSWORD_HASHERS = [
 
 AUTH_USER_MODEL = 'apps.User'
 
+# Пользователь загружается вместе с Interpreter/Client одним запросом
+AUTHENTICATION_BACKENDS = ['apps.authentication.RoleAwareModelBackend']
+
 # Internationalization
 
 LANGUAGE_CODE = 'en'
@@ -120,11 +164,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "BACKEND": "apps.instrumentation.InstrumentedRedisCache",
         "LOCATION": os.getenv('REDIS_LOCATION'),
     }
 }
 
+# Инструментирование (SQL запросы, кэш, исходящий HTTP) по view и Celery задачам
+INSTRUMENTATION_ENABLED = os.getenv('INSTRUMENTATION_ENABLED', 'False') == 'True'
+INSTRUMENTATION_SAMPLE_RATE = float(os.getenv('INSTRUMENTATION_SAMPLE_RATE', 0.05))
+INSTRUMENTATION_METRICS_TOKEN = os.getenv('INSTRUMENTATION_METRICS_TOKEN')
+
 # EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
@@ -143,12 +192,98 @@ EMAIL_SSL_KEYFILE = None
 CELERY_BROKER_URL = os.getenv('REDIS_LOCATION')
 CELERY_RESULT_BACKEND = os.getenv('REDIS_LOCATION')
 
+CELERY_BEAT_SCHEDULE = {
+    'renew-expiring-calendar-channels': {
+        'task': 'apps.tasks.calendar_tasks.renew_expiring_channels',
+        'schedule': timedelta(days=1),
+    },
+    'prune-old-availability': {
+        'task': 'apps.tasks.calendar_tasks.prune_old_availability',
+        'schedule': timedelta(hours=6),
+    },
+    'maintain-partitions': {
+        'task': 'apps.tasks.partition_tasks.maintain_partitions',
+        'schedule': timedelta(days=1),
+    },
+    'purge-outbox': {
+        'task': 'apps.tasks.outbox_tasks.purge_outbox',
+        'schedule': timedelta(hours=6),
+    },
+    'reconcile-search-projection': {
+        'task': 'apps.tasks.search_tasks.reconcile_search_projection',
+        'schedule': timedelta(minutes=30),
+    },
+}
+
+# Сколько дней хранить прошедшие записи Availability
+AVAILABILITY_RETENTION_DAYS = int(os.getenv('AVAILABILITY_RETENTION_DAYS', 30))
+
+# Битовая матрица занятости переводчиков (15 минут) для поиска: горизонт в сутках, лимит памяти процесса в МБ
+AVAILABILITY_MATRIX_ENABLED = os.getenv('AVAILABILITY_MATRIX_ENABLED', 'True') == 'True'
+AVAILABILITY_MATRIX_DAYS = int(os.getenv('AVAILABILITY_MATRIX_DAYS', 90))
+AVAILABILITY_MATRIX_MAX_MB = int(os.getenv('AVAILABILITY_MATRIX_MAX_MB', 64))
+
+# Кэш результатов поиска переводчиков в Redis: время жизни записи (сек), горизонт дней заказа
+SEARCH_CACHE_ENABLED = os.getenv('SEARCH_CACHE_ENABLED', 'True') == 'True'
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', 300))
+SEARCH_CACHE_DAYS = int(os.getenv('SEARCH_CACHE_DAYS', 90))
+
+# Максимальный радиус выезда переводчика на onsite заказ в другой город (км)
+TRAVEL_MAX_RADIUS_KM = float(os.getenv('TRAVEL_MAX_RADIUS_KM', 300))
+
+# Месячные секции Availability (start_datetime) и Booking (offered_at)
+PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))
+PARTITION_ARCHIVE_AFTER_MONTHS = int(os.getenv('PARTITION_ARCHIVE_AFTER_MONTHS', 24))
+
+# Пакетное назначение переводчиков на ожидающие заказы (задача о назначениях): включено, период (сек),
+# заказов за запуск, оферов на одно свободное место
+BATCH_ASSIGNMENT_ENABLED = os.getenv('BATCH_ASSIGNMENT_ENABLED', 'False') == 'True'
+BATCH_ASSIGNMENT_INTERVAL = int(os.getenv('BATCH_ASSIGNMENT_INTERVAL', 60))
+BATCH_ASSIGNMENT_MAX_ORDERS = int(os.getenv('BATCH_ASSIGNMENT_MAX_ORDERS', 1000))
+BATCH_ASSIGNMENT_OFFERS_PER_SLOT = int(os.getenv('BATCH_ASSIGNMENT_OFFERS_PER_SLOT', 1))
+if BATCH_ASSIGNMENT_ENABLED:
+    CELERY_BEAT_SCHEDULE['batch-assign-orders'] = {
+        'task': 'apps.tasks.assignment_tasks.run_batch_assignment',
+        'schedule': timedelta(seconds=BATCH_ASSIGNMENT_INTERVAL),
+    }
+
+# Волны оферов вместо рассылки всем сразу: включено, оферов в волне на свободное место,
+# ожидание ответа перед следующей волной (мин)
+OFFER_WAVES_ENABLED = os.getenv('OFFER_WAVES_ENABLED', 'True') == 'True'
+OFFER_WAVE_SIZE = int(os.getenv('OFFER_WAVE_SIZE', 3))
+OFFER_WAVE_TIMEOUT_MINUTES = int(os.getenv('OFFER_WAVE_TIMEOUT_MINUTES', 10))
+
+# Куб свободных переводчиков по слотам для страницы нового заказа: включено, горизонт в днях,
+# период пересчета помеченных переводчиков (сек)
+SLOT_CAPACITY_ENABLED = os.getenv('SLOT_CAPACITY_ENABLED', 'True') == 'True'
+SLOT_CAPACITY_DAYS = int(os.getenv('SLOT_CAPACITY_DAYS', 62))
+SLOT_CAPACITY_INTERVAL = int(os.getenv('SLOT_CAPACITY_INTERVAL', 60))
+if SLOT_CAPACITY_ENABLED:
+    CELERY_BEAT_SCHEDULE['refresh-slot-capacity'] = {
+        'task': 'apps.tasks.search_tasks.refresh_slot_capacity',
+        'schedule': timedelta(seconds=SLOT_CAPACITY_INTERVAL),
+    }
+
+# Transactional outbox: пачка релея, пауза опроса (сек), повтор после ошибки брокера (сек), хранение опубликованных
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 500))
+OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 0.5))
+OUTBOX_RETRY_SECONDS = int(os.getenv('OUTBOX_RETRY_SECONDS', 30))
+OUTBOX_RETENTION_DAYS = int(os.getenv('OUTBOX_RETENTION_DAYS', 7))
+# Попыток публикации сообщения outbox, после которых релей его пропускает (остается в БД с last_error)
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 10))
+
+# Попыток доставки офера в Telegram (повтор через OUTBOX_RETRY_SECONDS)
+OFFER_NOTIFICATION_MAX_ATTEMPTS = int(os.getenv('OFFER_NOTIFICATION_MAX_ATTEMPTS', 5))
+
 GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
 GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
 GOOGLE_REDIRECT_URI = os.getenv('GOOGLE_REDIRECT_URI')
 
 GOOGLE_CALENDAR_REDIRECT_URI = os.getenv('GOOGLE_CALENDAR_REDIRECT_URI')
 
+# Переопределение базового URL Calendar API (например, фейковый API для бенчмарков)
+GOOGLE_CALENDAR_API_ENDPOINT = os.getenv('GOOGLE_CALENDAR_API_ENDPOINT')
+
 GOOGLE_OAUTH_SCOPES = {
     'basic': [
         'openid',
@@ -167,6 +302,7 @@ WEBHOOK_URL_BASE = os.getenv('WEBHOOK_URL_BASE')
 # Telegram Bot Configuration
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 TELEGRAM_WEBHOOK_URL = os.getenv('TELEGRAM_WEBHOOK_URL')  # https://your-domain.com/webhook/telegram/
+TELEGRAM_API_SERVER = os.getenv('TELEGRAM_API_SERVER')  # по умолчанию https://api.telegram.org
 
 # Путь для хранения токенов календаря
 GOOGLE_CALENDAR_TOKEN_DIR = BASE_DIR / 'tokens'